@@ -1,211 +1,296 @@
-from flask import Flask, render_template, request, jsonify
-import pandas as pd
-import joblib
-import re
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.neighbors import NearestNeighbors
-import numpy as np
-
-app = Flask(__name__)
-
-# Paths to required files
-TOKENIZER_PATH = "tfidf.pkl"
-KMEANS_PATH = "kmeans_model.pkl"
-ARTICLES_PATH = "Articles_clustered.csv"
-
-# Load articles dataset and models
-print("Loading datasets and models...")
-Articles = pd.read_csv(ARTICLES_PATH)
-tfidf_vectorizer = joblib.load(TOKENIZER_PATH)
-kmeans_model = joblib.load(KMEANS_PATH)
-
-# Download required NLTK data (run once)
-try:
-    nltk.data.find('tokenizers/punkt')
-    nltk.data.find('corpora/stopwords')
-    nltk.data.find('corpora/wordnet')
-except LookupError:
-    nltk.download('punkt')
-    nltk.download('stopwords')
-    nltk.download('wordnet')
-
-print(f"Loaded {len(Articles)} articles with {Articles['cluster'].nunique()} clusters")
-
-def clean_text(text):
-    """
-    Comprehensive text cleaning function for NLP preprocessing.
-    """
-    if not isinstance(text, str):
-        return ""
+import time
+STARTUP_STARTED = time.perf_counter()
+
+import cProfile
+import hmac
+import json
+import threading
+
+from flask import Blueprint, Flask, Response, current_app, g, render_template, request, jsonify, stream_with_context
+
+from article_batches import BatchWatcher, load_batches
+from coalescer import RequestCoalescer
+from metrics import ServiceMetrics
+from model_registry import Reloader, activate, resolve_model_config
+from profiling import SamplingProfiler, dump_profile
+from recommender import DEFAULT_CONFIG, RECOMMENDATION_MODES, Recommender
+
+routes = Blueprint('routes', __name__)
+
+# Limits of the JSON recommendation API
+MAX_BATCH_SIZE = 1000
+MAX_STREAM_SIZE = 20000
+MAX_RESULTS = 100
+# Items scored together before their NDJSON lines are sent
+STREAM_CHUNK_SIZE = 32
+TEXT_FIELDS = ('title', 'abstract', 'keywords')
+# Longest sampling profiler run accepted by /admin/profile
+MAX_SAMPLE_SECONDS = 60
+
+class ApiError(Exception):
+    """
+    Invalid API request, answered with a JSON error and an HTTP status.
+    """
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+def create_app(config=None, recommender=None):
+    """
+    Application factory.
     
-    # Convert to lowercase
-    text = text.lower()
+    Loads the dataset and models once per call. Under gunicorn with
+    preload_app (see gunicorn.conf.py) this runs in the master process, and
+    the workers share its memory copy-on-write after the fork.
     
-    # Remove special characters and numbers
-    text = re.sub(r'[^a-zA-Z\s]', ' ', text)
+    Args:
+        config (Mapping): Settings overriding DEFAULT_CONFIG
+        recommender (Recommender): Prebuilt engine, loaded from config if None
     
-    # Tokenize
-    tokens = word_tokenize(text)
+    Returns:
+        Flask: The configured application
+    """
+    app = Flask(__name__)
+    app.config.from_mapping(DEFAULT_CONFIG)
+    app.config.from_mapping(config or {})
     
-    # Remove stopwords
-    stop_words = set(stopwords.words('english')).union(set(stopwords.words('french')))
-    tokens = [token for token in tokens if token not in stop_words and len(token) > 2]
+    if recommender is None:
+        recommender = Recommender.load(app.config)
+    app.extensions['recommender'] = recommender
+    metrics = app.extensions['metrics'] = ServiceMetrics()
+    # Serializes the swaps of the served engine (ingested batches, reloads)
+    app.extensions['swap_lock'] = threading.Lock()
+    app.extensions['reloader'] = Reloader(
+        lambda: reload_recommender(app), lambda: app.extensions['recommender'].model_version,
+        lambda: resolve_model_config(app.config)[1], interval=app.config['MODEL_POLL_SECONDS']
+    )
+    if app.config['COALESCE_WINDOW_MS'] > 0:
+        app.extensions['coalescer'] = RequestCoalescer(
+            recommender, window_ms=app.config['COALESCE_WINDOW_MS'], max_batch=app.config['COALESCE_MAX_BATCH'],
+            observe_batch=lambda timings: metrics.observe_stages(timings, batch=True)
+        )
+    if app.config['INGEST_POLL_SECONDS'] > 0:
+        app.extensions['batch_watcher'] = BatchWatcher(
+            app.config['INGEST_PATH'], lambda names: add_batches(app, names),
+            lambda: app.extensions['recommender'].batches, interval=app.config['INGEST_POLL_SECONDS']
+        )
+    app.register_blueprint(routes)
     
-    # Lemmatize
-    lemmatizer = WordNetLemmatizer()
-    tokens = [lemmatizer.lemmatize(token) for token in tokens]
+    app.config['STARTUP_SECONDS'] = round(time.perf_counter() - STARTUP_STARTED, 3)
+    metrics.bind(lambda: app.extensions['recommender'], app.extensions.get('coalescer'), app.config['STARTUP_SECONDS'],
+                 app.extensions['reloader'])
+    app.extensions['sampler'] = SamplingProfiler()
+    print(f"Startup completed in {app.config['STARTUP_SECONDS']}s")
+    return app
+
+def set_recommender(app, recommender):
+    """
+    Serve a new engine. Requests that already hold the previous one finish
+    with it (see get_recommender).
+    """
+    app.extensions['recommender'] = recommender
+    coalescer = app.extensions.get('coalescer')
+    if coalescer is not None:
+        coalescer.recommender = recommender
+
+def add_batches(app, names):
+    """
+    Add ingested batches to the served articles (see ingest.py).
+    """
+    with app.extensions['swap_lock']:
+        recommender = app.extensions['recommender']
+        set_recommender(app, recommender.add_batches(load_batches(recommender.config['INGEST_PATH'], names)))
+
+def reload_recommender(app):
+    """
+    Load the active model version and its data, then swap it in.
     
-    # Join and clean extra whitespace
-    return ' '.join(tokens).strip()
+    Runs in the reloader's background thread: requests keep being served by
+    the current engine while the new one loads, and those already running
+    finish on it after the swap.
+    """
+    recommender = Recommender.load(app.config)
+    with app.extensions['swap_lock']:
+        set_recommender(app, recommender)
+
+def get_metrics():
+    """
+    Metrics registry of the application handling the current request.
+    """
+    return current_app.extensions['metrics']
 
-def get_journal_details(journal_name, articles_df):
+def record_timings(timings, batch=False):
+    """
+    Add stage timings (milliseconds) to the metrics and to the X-Timing
+    header of the current response.
     """
-    Get comprehensive journal information including metrics and scope.
+    get_metrics().observe_stages(timings, batch=batch)
+    g.setdefault('timings', {}).update(timings)
+
+def get_recommender():
     """
-    journal_articles = articles_df[articles_df['journal_name'].str.contains(
-        journal_name, case=False, na=False
-    )]
+    Recommender of the application handling the current request.
     
-    if journal_articles.empty:
-        return None
+    The engine is pinned on first use, so a request is answered by one model
+    version even if a reload swaps in another one meanwhile.
+    """
+    if 'recommender' not in g:
+        g.recommender = current_app.extensions['recommender']
+    return g.recommender
+
+def recommend(title, abstract, keywords, k=10, mode='articles', n_probe=None):
+    """
+    Recommendations for one manuscript, micro-batched with concurrent
+    requests when COALESCE_WINDOW_MS is set.
+    """
+    coalescer = current_app.extensions.get('coalescer')
+    if coalescer is not None:
+        response = coalescer.recommend(title, abstract, keywords, k=k, mode=mode, n_probe=n_probe,
+                                       recommender=get_recommender())
+        # The stages of the whole batch are recorded once per batch, by the coalescer
+        get_metrics().observe_stages({'coalesce.wait': response['timings']['coalesce.wait']})
+        g.setdefault('timings', {}).update(response['timings'])
+    else:
+        response = get_recommender().recommend(title, abstract, keywords, k=k, mode=mode, n_probe=n_probe)
+        record_timings(response['timings'])
+    get_metrics().observe_response(response)
+    return response
+
+def recommend_batch(items, k=10, mode='articles', n_probe=None):
+    """
+    Recommendations for several manuscripts, recorded in the batch metrics.
+    """
+    results, timings = get_recommender().recommend_batch(items, k=k, mode=mode, n_probe=n_probe)
+    record_timings(timings, batch=True)
+    for result in results:
+        get_metrics().observe_response(result)
+    return results, timings
+
+def parse_search_options(mode, n_probe):
+    """
+    Validate the recommendation mode and clamp n_probe to the cluster count.
+    """
+    if mode not in RECOMMENDATION_MODES:
+        mode = 'articles'
+    if n_probe is not None:
+        n_probe = min(max(int(n_probe), 1), get_recommender().kmeans_model.n_clusters)
+    return mode, n_probe
+
+def parse_api_options(options):
+    """
+    Number of articles, mode and n_probe of a JSON API request.
+    """
+    try:
+        k = min(max(int(options.get('k', 10)), 1), MAX_RESULTS)
+        mode, n_probe = parse_search_options(options.get('mode'), options.get('n_probe'))
+    except (TypeError, ValueError):
+        raise ApiError("'k' and 'n_probe' must be integers")
+    return k, mode, n_probe
+
+def parse_api_items(max_items):
+    """
+    Items and options of a batch request body.
     
-    # Get the most complete journal record
-    journal_info = journal_articles.iloc[0]
+    The body is a JSON list of {"title", "abstract", "keywords"} objects, or
+    an object {"items": [...], "k": 10, "mode": "articles", "n_probe": 1}.
+    """
+    payload = request.get_json(silent=True)
+    options = payload if isinstance(payload, dict) else {}
+    items = payload.get('items') if isinstance(payload, dict) else payload
     
-    # Calculate additional metrics
-    def safe_numeric_mean_local(series):
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise ApiError('Expected a JSON list of {"title", "abstract", "keywords"} objects')
+    if len(items) > max_items:
+        raise ApiError(f'At most {max_items} items per request', 413)
+    items = [{field: str(item.get(field) or '') for field in TEXT_FIELDS} for item in items]
+    return items, options
+
+@routes.errorhandler(ApiError)
+def handle_api_error(error):
+    return jsonify({'error': error.message}), error.status
+
+def is_admin():
+    """
+    Whether the current request carries the admin token (never, if unset).
+    """
+    token = current_app.config['ADMIN_TOKEN']
+    return bool(token) and hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token)
+
+def require_admin():
+    if not is_admin():
+        raise ApiError('Not found', 404)
+
+@routes.before_app_request
+def start_timer():
+    g.started = time.perf_counter()
+    watcher = current_app.extensions.get('batch_watcher')
+    if watcher is not None:
+        watcher.ensure_started()
+    current_app.extensions['reloader'].ensure_started()
+    # Admin requests sent with an X-Profile header run under cProfile
+    if 'X-Profile' in request.headers and is_admin():
+        profiler = cProfile.Profile()
         try:
-            numeric_series = pd.to_numeric(series, errors='coerce')
-            return numeric_series.mean() if not numeric_series.isna().all() else 0
-        except:
-            return 0
-    
-    avg_citations = safe_numeric_mean_local(journal_articles['citations']) if 'citations' in journal_articles.columns else 0
-    total_articles = len(journal_articles)
-    
-    return {
-        'name': journal_info.get('journal_name', 'N/A'),
-        'issn': journal_info.get('issn', 'N/A'),
-        'h_index': journal_info.get('H-index', 'N/A'),
-        'quartile': journal_info.get('quartile', 'N/A'),
-        'sjr_score': journal_info.get('sjr', 'N/A'),
-        'impact_factor': journal_info.get('impact_factor', 'N/A'),
-        'publisher': journal_info.get('publisher', 'N/A'),
-        'scope': journal_info.get('scope', 'N/A'),
-        'avg_citations': round(float(avg_citations), 2) if avg_citations and str(avg_citations) != 'nan' else 'N/A',
-        'total_articles': total_articles,
-        'index_type': journal_info.get('index', 'N/A')
-    }
-
-def predict_comprehensive_recommendations(title, abstract, keywords, k=10):
-    """
-    Get comprehensive recommendations including detailed journal information.
-    """
-    # Combine and clean input text
-    input_text = f"{title} {abstract} {keywords}"
-    cleaned_text = clean_text(input_text)
-    
-    if not cleaned_text:
-        return {'journals': [], 'articles': [], 'cluster_info': None}
-    
-    # Transform to TF-IDF vector
-    text_vector = tfidf_vectorizer.transform([cleaned_text])
-    
-    # Predict cluster
-    predicted_cluster = kmeans_model.predict(text_vector)[0]
-    
-    # Get articles from the predicted cluster
-    cluster_articles = Articles[Articles['cluster'] == predicted_cluster].copy()
-    
-    if cluster_articles.empty:
-        return {'journals': [], 'articles': [], 'cluster_info': None}
-    
-    # Transform cluster articles to TF-IDF vectors
-    if 'combined' in cluster_articles.columns:
-        article_vectors = tfidf_vectorizer.transform(cluster_articles['combined'])
-        
-        # Calculate similarities
-        similarities = cosine_similarity(text_vector, article_vectors)[0]
-        cluster_articles['similarity'] = similarities * 100
-        
-        # Sort by similarity
-        sorted_articles = cluster_articles.sort_values('similarity', ascending=False)
-        
-        # Get top articles
-        top_articles = sorted_articles.head(k)
-        
-        # Extract unique journals with their best similarity scores
-        journal_recommendations = []
-        seen_journals = set()
-        
-        for _, article in top_articles.iterrows():
-            journal_name = article.get('journal_name', '')
-            if journal_name and journal_name not in seen_journals:
-                journal_details = get_journal_details(journal_name, Articles)
-                if journal_details:
-                    journal_details['similarity'] = round(article['similarity'], 2)
-                    journal_details['recommended_based_on'] = article.get('title', 'Unknown Article')[:100]
-                    journal_recommendations.append(journal_details)
-                    seen_journals.add(journal_name)
-        
-        # Prepare article recommendations
-        def safe_citation_convert(val):
-            try:
-                return int(pd.to_numeric(val, errors='coerce')) if pd.notna(pd.to_numeric(val, errors='coerce')) else 0
-            except:
-                return 0
-                
-        article_recommendations = []
-        for _, article in top_articles.iterrows():
-            article_info = {
-                'title': article.get('title', 'N/A'),
-                'authors': article.get('authors', 'N/A'),
-                'journal': article.get('journal_name', 'N/A'),
-                'year': article.get('pub year', 'N/A'),
-                'citations': safe_citation_convert(article.get('citations', 0)),
-                'doi': article.get('DOI', 'N/A'),
-                'similarity': round(article['similarity'], 2),
-                'abstract': article.get('abstract', 'N/A')[:200] + '...' if article.get('abstract') else 'N/A'
-            }
-            article_recommendations.append(article_info)
-        
-        # Cluster information
-        cluster_info = {
-            'cluster_id': int(predicted_cluster),
-            'total_articles': len(cluster_articles),
-            'top_similarity': round(max(similarities) * 100, 2),
-            'avg_similarity': round(np.mean(similarities) * 100, 2)
-        }
-        
-        return {
-            'journals': journal_recommendations[:5],  # Top 5 journals
-            'articles': article_recommendations[:k],
-            'cluster_info': cluster_info
-        }
+            profiler.enable()
+        except ValueError:
+            # Another request is being profiled (one profiler at a time on Python 3.12+)
+            return
+        g.profiler = profiler
+
+def stop_profiler(response=None):
+    """
+    Dump the cProfile run of the current request, if any.
+    """
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return
+    profiler.disable()
+    path = dump_profile(profiler, current_app.config['PROFILE_DIR'], request.path)
+    if response is not None:
+        response.headers['X-Profile-Path'] = path
+
+@routes.teardown_app_request
+def stop_failed_profile(error):
+    stop_profiler()
+
+@routes.after_app_request
+def record_request(response):
+    """
+    Count the request, record its latency and add the X-Model-Version and
+    X-Timing headers.
+    """
+    stop_profiler(response)
+    metrics = get_metrics()
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    elapsed = time.perf_counter() - g.get('started', time.perf_counter())
+    metrics.requests.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+    metrics.latency.observe(elapsed, endpoint=endpoint)
+    if response.status_code >= 500:
+        metrics.errors.inc(endpoint=endpoint)
     
-    return {'journals': [], 'articles': [], 'cluster_info': None}
+    model_version = get_recommender().model_version
+    if model_version:
+        response.headers['X-Model-Version'] = model_version
+    if current_app.config['TIMING_HEADER'] or 'X-Timing' in request.headers:
+        timings = {**g.get('timings', {}), 'total': round(elapsed * 1000, 3)}
+        response.headers['X-Timing'] = ', '.join(f"{stage}={ms}" for stage, ms in timings.items())
+    return response
 
-@app.route('/')
+@routes.route('/')
 def index():
     """Home page with enhanced form."""
-    cluster_stats = {
-        'total_articles': len(Articles),
-        'total_clusters': Articles['cluster'].nunique(),
-        'total_journals': Articles['journal_name'].nunique() if 'journal_name' in Articles.columns else 0
-    }
+    cluster_stats = get_recommender().stats.summary()
     return render_template('index.html', stats=cluster_stats)
 
-@app.route('/suggest', methods=['POST'])
+@routes.route('/suggest', methods=['POST'])
 def suggest():
     """Get comprehensive recommendations."""
     # Get user inputs
     title = request.form.get('title', '').strip()
     abstract = request.form.get('abstract', '').strip()
     keywords = request.form.get('keywords', '').strip()
+    mode, n_probe = parse_search_options(request.form.get('mode'), request.form.get('n_probe', type=int))
     
     # Validate inputs
     if not any([title, abstract, keywords]):
@@ -215,70 +300,159 @@ def suggest():
     
     try:
         # Get comprehensive recommendations
-        recommendations = predict_comprehensive_recommendations(title, abstract, keywords, k=10)
+        recommendations = recommend(title, abstract, keywords, k=10, mode=mode, n_probe=n_probe)
         
-        return render_template(
+        started = time.perf_counter()
+        page = render_template(
             'results.html',
             journals=recommendations['journals'],
             articles=recommendations['articles'],
             cluster_info=recommendations['cluster_info'],
             user_input={'title': title, 'abstract': abstract, 'keywords': keywords}
         )
+        record_timings({'render': round((time.perf_counter() - started) * 1000, 3)})
+        return page
     except Exception as e:
+        get_metrics().errors.inc(endpoint=request.url_rule.rule)
         return render_template('results.html', 
                              error=f"An error occurred: {str(e)}",
                              journals=[], articles=[], cluster_info=None)
 
-@app.route('/api/journal/<journal_name>')
+@routes.route('/api/suggest', methods=['POST'])
+def suggest_api():
+    """
+    JSON counterpart of /suggest.
+    
+    The body is {"title", "abstract", "keywords"} plus optional "k", "mode"
+    and "n_probe"; the response holds journals, articles, cluster_info and
+    the time spent in each stage.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        raise ApiError('Expected a JSON object with "title", "abstract" and "keywords"')
+    k, mode, n_probe = parse_api_options(payload)
+    title, abstract, keywords = (str(payload.get(field) or '').strip() for field in TEXT_FIELDS)
+    if not any([title, abstract, keywords]):
+        raise ApiError("Please provide at least a title, abstract, or keywords.")
+    
+    return jsonify(recommend(title, abstract, keywords, k=k, mode=mode, n_probe=n_probe))
+
+@routes.route('/api/suggest/batch', methods=['POST'])
+def suggest_batch_api():
+    """
+    API endpoint recommending journals and articles for many manuscripts.
+    
+    Results are returned in the order of the items (see parse_api_items).
+    """
+    items, options = parse_api_items(MAX_BATCH_SIZE)
+    k, mode, n_probe = parse_api_options(options)
+    results, timings = recommend_batch(items, k=k, mode=mode, n_probe=n_probe)
+    return jsonify({'results': results, 'timings': timings})
+
+@routes.route('/api/suggest/stream', methods=['POST'])
+def suggest_stream_api():
+    """
+    Streaming variant of /api/suggest/batch for large jobs.
+    
+    Emits one NDJSON line {"index": i, "journals", "articles", "cluster_info"}
+    per item, in order. Items are scored STREAM_CHUNK_SIZE at a time, so the
+    first lines are sent before the rest of the batch has been scored.
+    """
+    items, options = parse_api_items(MAX_STREAM_SIZE)
+    k, mode, n_probe = parse_api_options(options)
+    
+    def generate():
+        for start in range(0, len(items), STREAM_CHUNK_SIZE):
+            results, _ = recommend_batch(
+                items[start:start + STREAM_CHUNK_SIZE], k=k, mode=mode, n_probe=n_probe
+            )
+            for offset, result in enumerate(results):
+                yield json.dumps({'index': start + offset, **result}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@routes.route('/api/journal/<journal_name>')
 def get_journal_api(journal_name):
     """API endpoint to get detailed journal information."""
-    journal_details = get_journal_details(journal_name, Articles)
+    recommender = get_recommender()
+    started = time.perf_counter()
+    journal_details = recommender.journal_details(journal_name)
+    record_timings({'journal_lookup': round((time.perf_counter() - started) * 1000, 3)})
     if journal_details:
         return jsonify(journal_details)
-    else:
-        return jsonify({'error': 'Journal not found'}), 404
+    
+    matches = recommender.catalog.search(journal_name)
+    if matches:
+        return jsonify({'error': 'Journal name is ambiguous', 'matches': matches[:20]}), 404
+    return jsonify({'error': 'Journal not found'}), 404
 
-@app.route('/stats')
+@routes.route('/stats')
 def stats():
     """Statistics page."""
-    cluster_distribution = Articles['cluster'].value_counts().sort_index().to_dict()
-    
-    # Safely convert citations to numeric, handling errors
-    def safe_numeric_mean(series):
-        try:
-            numeric_series = pd.to_numeric(series, errors='coerce')
-            return numeric_series.mean() if not numeric_series.isna().all() else 0
-        except:
-            return 0
-    
-    def safe_numeric_max(series):
-        try:
-            numeric_series = pd.to_numeric(series, errors='coerce')
-            return numeric_series.max() if not numeric_series.isna().all() else 0
-        except:
-            return 0
+    stats_data = get_recommender().stats.payload()
+    return render_template('stats.html', stats=stats_data)
+
+@routes.route('/api/status')
+def status():
+    """API endpoint reporting dataset size, versions, startup time, cache, batching and reload counters."""
+    recommender = get_recommender()
+    coalescer = current_app.extensions.get('coalescer')
+    return jsonify({
+        'articles': len(recommender.store),
+        'version': recommender.version,
+        'model_version': recommender.model_version,
+        'model_reload': current_app.extensions['reloader'].stats(),
+        'ingested_batches': len(recommender.batches),
+        'snapshot': bool(recommender.store.manifest),
+        'startup_seconds': current_app.config['STARTUP_SECONDS'],
+        'startup_timings': recommender.startup_timings,
+        'result_cache': recommender.cache.stats() if recommender.cache is not None else None,
+        'coalescer': coalescer.stats() if coalescer is not None else None
+    })
+
+@routes.route('/admin/profile', methods=['POST'])
+def start_sampling():
+    """
+    Admin endpoint sampling all request threads for ?seconds=N (default 10)
+    in the background; the collapsed stacks are written to PROFILE_DIR.
+    """
+    require_admin()
+    seconds = min(max(request.args.get('seconds', 10, type=float), 0.1), MAX_SAMPLE_SECONDS)
+    sampler = current_app.extensions['sampler']
+    path = sampler.start(seconds, current_app.config['PROFILE_DIR'])
+    if path is None:
+        raise ApiError('A sampling run is already in progress', 409)
+    return jsonify({'seconds': seconds, 'path': path}), 202
+
+@routes.route('/admin/reload', methods=['POST'])
+def reload_model():
+    """
+    Admin endpoint reloading the models and data in the background.
     
-    def safe_numeric_sum(series):
+    With ?version=NAME, that registry version is activated first (which
+    also makes the other workers reload it at their next check).
+    """
+    require_admin()
+    version = request.args.get('version')
+    if version:
+        registry = current_app.config['MODEL_REGISTRY_PATH']
+        if not registry:
+            raise ApiError('No model registry configured (MODEL_REGISTRY_PATH)')
         try:
-            numeric_series = pd.to_numeric(series, errors='coerce')
-            return numeric_series.sum() if not numeric_series.isna().all() else 0
-        except:
-            return 0
-    
-    stats_data = {
-        'total_articles': len(Articles),
-        'total_clusters': Articles['cluster'].nunique(),
-        'total_journals': Articles['journal_name'].nunique() if 'journal_name' in Articles.columns else 0,
-        'cluster_distribution': cluster_distribution,
-        'top_journals': Articles['journal_name'].value_counts().head(10).to_dict() if 'journal_name' in Articles.columns else {},
-        'citation_stats': {
-            'avg_citations': safe_numeric_mean(Articles['citations']) if 'citations' in Articles.columns else 0,
-            'max_citations': safe_numeric_max(Articles['citations']) if 'citations' in Articles.columns else 0,
-            'total_citations': safe_numeric_sum(Articles['citations']) if 'citations' in Articles.columns else 0
-        }
-    }
-    
-    return render_template('stats.html', stats=stats_data)
+            activate(registry, version)
+        except ValueError as e:
+            raise ApiError(str(e), 404)
+    if not current_app.extensions['reloader'].request():
+        raise ApiError('A reload is already in progress', 409)
+    return jsonify({
+        'model_version': get_recommender().model_version,
+        'target_version': resolve_model_config(current_app.config)[1],
+    }), 202
+
+@routes.route('/metrics')
+def metrics():
+    """Per-process metrics in the Prometheus text format."""
+    return Response(get_metrics().render(), mimetype='text/plain; version=0.0.4')
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    create_app().run(debug=True)
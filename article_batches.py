@@ -0,0 +1,188 @@
+"""
+Batches of articles ingested after the base dataset was built.
+
+A batch is a directory under INGEST_PATH holding an article snapshot of the
+new rows (see ArticleStore.save), their TF-IDF vectors and cluster labels,
+and the records as CSV rows for a later compaction (see ingest.py). Batches
+are applied in name order on top of the base snapshot and index, so adding a
+few hundred articles neither re-vectorizes the corpus nor retrains a model.
+Each batch records the model version that vectorized it; batches of another
+version are re-vectorized and re-clustered with the served model when merged.
+"""
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+from scipy import sparse
+
+from article_store import ArticleStore
+from artifacts import MANIFEST_FILE, load_array, save_arrays
+
+RECORDS_FILE = "records.csv"
+BATCH_FILE = "batch.json"
+VECTOR_ARRAYS = ('data', 'indices', 'indptr', 'shape')
+
+# Ingested articles, their TF-IDF vectors (not normalized) and the model
+# version that computed the vectors and clusters
+Batch = namedtuple('Batch', ['name', 'store', 'vectors', 'model_version'])
+
+
+def list_batches(directory):
+    """
+    Names of the complete batches in a directory, in the order to apply them.
+    """
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        name for name in os.listdir(directory)
+        if not name.startswith('.') and os.path.exists(os.path.join(directory, name, MANIFEST_FILE))
+    )
+
+
+def write_batch(directory, records_df, vectors, model_version=None):
+    """
+    Write new articles as a batch.
+
+    The batch is written under a hidden name and renamed when complete, so
+    running apps never see a partial batch.
+
+    Args:
+        directory (str): Ingestion directory
+        records_df (DataFrame): New articles in the Articles_clustered.csv
+            schema, with 'combined' and 'cluster' filled in
+        vectors (sparse matrix): TF-IDF vectors of the new articles
+        model_version (str): Version of the model that computed them, see
+            model_registry.resolve_model_config
+
+    Returns:
+        str: Name of the batch
+    """
+    name = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{len(records_df)}"
+    path = os.path.join(directory, name)
+    tmp_path = os.path.join(directory, f".{name}")
+    vectors = sparse.csr_matrix(vectors)
+    save_arrays(tmp_path, {
+        'vectors.data': vectors.data,
+        'vectors.indices': vectors.indices,
+        'vectors.indptr': vectors.indptr,
+        'vectors.shape': np.array(vectors.shape, dtype=np.int64),
+    })
+    records_df.to_csv(os.path.join(tmp_path, RECORDS_FILE), index=False)
+    with open(os.path.join(tmp_path, BATCH_FILE), 'w') as f:
+        json.dump({'model_version': model_version}, f)
+    # The snapshot manifest is written last and marks the batch as complete
+    ArticleStore.from_dataframe(records_df).save(tmp_path)
+    os.rename(tmp_path, path)
+    return name
+
+
+def load_batch(directory, name):
+    """
+    Read one batch into memory.
+    """
+    path = os.path.join(directory, name)
+    arrays = {part: load_array(path, f"vectors.{part}", mmap_mode=None) for part in VECTOR_ARRAYS}
+    vectors = sparse.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']),
+                                shape=tuple(arrays['shape']))
+    try:
+        with open(os.path.join(path, BATCH_FILE)) as f:
+            model_version = json.load(f).get('model_version')
+    except FileNotFoundError:
+        model_version = None
+    return Batch(name, ArticleStore.load(path, mmap_mode=None), vectors, model_version)
+
+
+def load_batches(directory, names=None):
+    """
+    Read the given batches, or every complete batch of the directory.
+    """
+    names = list_batches(directory) if names is None else names
+    return [load_batch(directory, name) for name in names]
+
+
+def revectorize(batch, vectorizer, kmeans_model, model_version):
+    """
+    Batch with its vectors and clusters recomputed by another model.
+    """
+    combined = batch.store.texts['combined']
+    vectors = vectorizer.transform(combined.get(i, '') for i in range(len(batch.store)))
+    batch.store.clusters = np.asarray(kmeans_model.predict(vectors), dtype=np.int64)
+    return batch._replace(vectors=vectors, model_version=model_version)
+
+
+def merge_batches(store, article_index, batches, vectorizer=None, kmeans_model=None, model_version=None):
+    """
+    Append batches to an article store and its index.
+
+    Batches written with another model than the one of model_version (the
+    part of the versions before any '+') are first re-vectorized and
+    re-clustered, when the served models are given (batches that recorded
+    no version are used as they are).
+
+    Returns:
+        tuple: (ArticleStore, ArticleIndex or None) covering every article
+    """
+    for batch in batches:
+        if (vectorizer is not None and batch.model_version is not None
+                and batch.model_version.split('+')[0] != str(model_version).split('+')[0]):
+            print(f"Re-vectorizing batch '{batch.name}' for model version {model_version}")
+            batch = revectorize(batch, vectorizer, kmeans_model, model_version)
+        first_row = len(store)
+        store = store.append(batch.store)
+        if article_index is not None:
+            article_index = article_index.append(batch.vectors, batch.store.clusters, first_row)
+    return store, article_index
+
+
+class BatchWatcher:
+    """
+    Background thread handing new batches of a directory to a callback.
+
+    Attributes:
+        directory (str): Ingestion directory
+        apply (callable): Called with the names of batches not yet known
+        known (callable): Returns the names of the batches already applied
+        interval (float): Seconds between two scans
+    """
+
+    def __init__(self, directory, apply, known, interval=10.0):
+        self.directory = directory
+        self.apply = apply
+        self.known = known
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def ensure_started(self):
+        """
+        Start the watching thread in this process (threads do not survive a fork).
+        """
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    threading.Thread(target=self._run, name='batch-watcher', daemon=True).start()
+                    self._pid = os.getpid()
+
+    def poll(self):
+        """
+        Apply the batches that appeared since the last scan.
+
+        Returns:
+            list: Names of the batches applied
+        """
+        known = set(self.known())
+        new = [name for name in list_batches(self.directory) if name not in known]
+        if new:
+            self.apply(new)
+        return new
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Could not apply ingested batches: {e}")
@@ -0,0 +1,222 @@
+"""
+Sparse TF-IDF index over the clustered articles dataset.
+
+The index holds one CSR matrix for the whole corpus, with rows grouped by
+cluster so that every cluster is a contiguous slice of the matrix. It can be
+saved as a directory of .npy arrays plus a JSON manifest and memory-mapped
+back, so that several server processes share the same pages.
+
+Usage:
+    python article_index.py build --articles Articles_clustered.csv \\
+        --vectorizer tfidf.pkl --kmeans kmeans_model.pkl --out index
+"""
+import argparse
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+from article_store import ArticleStore
+from artifacts import (load_array, read_manifest, replace_directory, save_arrays, sources_match,
+                       staging_directory, write_manifest)
+
+INDEX_FORMAT_VERSION = 1
+ARRAY_NAMES = ("data", "indices", "indptr", "row_ids", "cluster_ids", "offsets")
+
+
+class ArticleIndex:
+    """
+    Row-normalized TF-IDF vectors for every article, grouped by cluster.
+
+    Attributes:
+        matrix (csr_matrix): L2-normalized article vectors, in cluster order
+        row_ids (ndarray): Position in the articles DataFrame of each matrix row
+        cluster_ids (ndarray): Sorted cluster labels present in the index
+        offsets (ndarray): Row offsets so that cluster_ids[i] spans
+            matrix[offsets[i]:offsets[i + 1]]
+        manifest (dict): Metadata of the on-disk artifact, if any
+    """
+
+    def __init__(self, matrix, row_ids, cluster_ids, offsets, manifest=None):
+        self.matrix = matrix
+        self.row_ids = row_ids
+        self.cluster_ids = cluster_ids
+        self.offsets = offsets
+        self.manifest = manifest or {}
+
+    @classmethod
+    def build(cls, store, vectorizer):
+        """
+        Vectorize all articles once and group the rows by cluster.
+
+        Args:
+            store (ArticleStore): Articles with a 'combined' text field
+            vectorizer (TfidfVectorizer): Fitted vectorizer used for queries
+
+        Returns:
+            ArticleIndex: Index ready for per-cluster scoring
+        """
+        clusters = store.clusters
+        order = np.argsort(clusters, kind='stable')
+        sorted_clusters = clusters[order]
+
+        combined = store.texts['combined']
+        texts = (combined.get(i, '') for i in order)
+        matrix = sparse.csr_matrix(normalize(vectorizer.transform(texts)))
+
+        cluster_ids, starts = np.unique(sorted_clusters, return_index=True)
+        offsets = np.append(starts, len(order)).astype(np.int64)
+
+        return cls(matrix, order.astype(np.int64), cluster_ids, offsets)
+
+    def append(self, vectors, clusters, first_row):
+        """
+        New in-memory index with more articles, regrouped by cluster.
+
+        Only the new articles are vectorized (by the caller); the existing
+        rows are reused as they are.
+
+        Args:
+            vectors (sparse matrix): TF-IDF vectors of the new articles
+            clusters (ndarray): Cluster label of each new article
+            first_row (int): Store position of the first new article
+
+        Returns:
+            ArticleIndex: Index over the existing and the new articles
+        """
+        row_clusters = np.concatenate([
+            np.repeat(self.cluster_ids, np.diff(self.offsets)), np.asarray(clusters, dtype=np.int64)
+        ])
+        row_ids = np.concatenate([self.row_ids, first_row + np.arange(vectors.shape[0], dtype=np.int64)])
+        order = np.argsort(row_clusters, kind='stable')
+        matrix = sparse.vstack([self.matrix, normalize(vectors)], format='csr')[order]
+
+        cluster_ids, starts = np.unique(row_clusters[order], return_index=True)
+        offsets = np.append(starts, len(order)).astype(np.int64)
+        return ArticleIndex(matrix, row_ids[order], cluster_ids, offsets)
+
+    def save(self, directory, sources=()):
+        """
+        Write the index arrays and a manifest describing them.
+
+        Args:
+            directory (str): Output directory, created if needed
+            sources (iterable): Input files recorded in the manifest fingerprint
+        """
+        save_arrays(directory, {
+            'data': self.matrix.data,
+            'indices': self.matrix.indices,
+            'indptr': self.matrix.indptr,
+            'row_ids': self.row_ids,
+            'cluster_ids': self.cluster_ids,
+            'offsets': self.offsets,
+        })
+        self.manifest = write_manifest(directory, {
+            'format_version': INDEX_FORMAT_VERSION,
+            'n_rows': int(self.matrix.shape[0]),
+            'n_features': int(self.matrix.shape[1]),
+            'nnz': int(self.matrix.nnz),
+            'n_clusters': int(len(self.cluster_ids)),
+        }, sources)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """
+        Load a saved index, memory-mapping its arrays by default.
+
+        Raises:
+            FileNotFoundError: If the directory holds no manifest
+            ValueError: If the index was written by another format version
+        """
+        manifest = read_manifest(directory, INDEX_FORMAT_VERSION)
+        arrays = {name: load_array(directory, name, mmap_mode) for name in ARRAY_NAMES}
+        matrix = sparse.csr_matrix(
+            (arrays['data'], arrays['indices'], arrays['indptr']),
+            shape=(manifest['n_rows'], manifest['n_features']),
+            copy=False
+        )
+        # Keep the memmaps themselves on the matrix: scipy copies slices of a
+        # plain ndarray view when building row subsets, but not of a memmap
+        matrix.data, matrix.indices, matrix.indptr = arrays['data'], arrays['indices'], arrays['indptr']
+        return cls(matrix, arrays['row_ids'], arrays['cluster_ids'], arrays['offsets'], manifest)
+
+    def is_current(self, sources):
+        """
+        Check that the index was built from the given input files as they are
+        now (a missing file does not match).
+        """
+        return sources_match(self.manifest, sources)
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    def cluster_slice(self, cluster):
+        """
+        Return the (start, stop) matrix rows of a cluster, or (0, 0) if unknown.
+        """
+        pos = np.searchsorted(self.cluster_ids, cluster)
+        if pos >= len(self.cluster_ids) or self.cluster_ids[pos] != cluster:
+            return 0, 0
+        return int(self.offsets[pos]), int(self.offsets[pos + 1])
+
+    def rows(self, start, stop):
+        """
+        CSR matrix of rows [start, stop) built from slices of the index arrays,
+        so a memory-mapped index is scored without copying its pages.
+        """
+        indptr = self.matrix.indptr
+        lo, hi = indptr[start], indptr[stop]
+        return sparse.csr_matrix(
+            (self.matrix.data[lo:hi], self.matrix.indices[lo:hi], indptr[start:stop + 1] - lo),
+            shape=(stop - start, self.matrix.shape[1]),
+            copy=False
+        )
+
+    def score_cluster(self, query_vector, cluster):
+        """
+        Cosine similarity between a query and every article of one cluster.
+
+        Args:
+            query_vector (sparse matrix): 1 x n_features TF-IDF query vector
+            cluster (int): Cluster label to search
+
+        Returns:
+            tuple: (row_ids, similarities) for the articles of the cluster, in
+            articles DataFrame order
+        """
+        start, stop = self.cluster_slice(cluster)
+        query = normalize(query_vector)
+        similarities = (self.rows(start, stop) @ query.T).toarray().ravel()
+        return self.row_ids[start:stop], similarities
+
+
+def main():
+    """
+    Command-line entry point to (re)build the on-disk article index.
+    """
+    parser = argparse.ArgumentParser(description="Build the memory-mapped article index.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help="Vectorize the articles and write the index")
+    build_parser.add_argument('--articles', default="Articles_clustered.csv")
+    build_parser.add_argument('--vectorizer', default="tfidf.pkl")
+    build_parser.add_argument('--kmeans', default="kmeans_model.pkl")
+    build_parser.add_argument('--out', default="index")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = ArticleStore.from_dataframe(pd.read_csv(args.articles))
+    vectorizer = joblib.load(args.vectorizer)
+    index = ArticleIndex.build(store, vectorizer)
+    # Built aside and swapped in, as running apps may have the index memory-mapped
+    new_path = staging_directory(args.out)
+    index.save(new_path, sources=[args.articles, args.vectorizer, args.kmeans])
+    replace_directory(new_path, args.out)
+    print(f"Indexed {len(index)} articles in {len(index.cluster_ids)} clusters "
+          f"({index.matrix.nnz} non-zeros) into '{args.out}' in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
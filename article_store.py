@@ -0,0 +1,412 @@
+"""
+Typed, compact in-memory representation of Articles_clustered.csv.
+
+Numeric columns are float64 arrays with NaN for missing or non-numeric values
+(e.g. "No SJR"), journal names are categorical codes, repeated short strings
+are interned, and long text fields (abstract, combined) live in one UTF-8
+buffer per column with row offsets.
+
+The store can be saved as a snapshot (a directory of .npy arrays plus a JSON
+manifest) that starts much faster than parsing the CSV: arrays are
+memory-mapped, and each column is only read when the app first uses it.
+
+Usage:
+    python article_store.py convert --articles Articles_clustered.csv --out snapshot
+"""
+import argparse
+import sys
+import time
+from collections.abc import Mapping
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from artifacts import (load_array, read_manifest, replace_directory, save_arrays, sources_match,
+                       staging_directory, write_manifest)
+from columnar import StringColumn
+
+# Column names of the notebook datasets (articles_cleaned.csv) -> their
+# Articles_clustered.csv names, which the app reads
+COLUMN_ALIASES = {
+    'journal name': 'journal_name',
+}
+# Store field -> Articles_clustered.csv column
+NUMERIC_FIELDS = {
+    'citations': 'citations',
+    'year': 'pub year',
+    'h_index': 'H-index',
+    'sjr': 'sjr',
+    'impact_factor': 'impact_factor',
+}
+SHORT_TEXT_FIELDS = {
+    'title': 'title',
+    'authors': 'authors',
+    'doi': 'DOI',
+    'issn': 'issn',
+    'publisher': 'publisher',
+    'quartile': 'quartile',
+    'scope': 'scope',
+    'index_type': 'index',
+}
+LONG_TEXT_FIELDS = {
+    'abstract': 'abstract',
+    'combined': 'combined',
+}
+MISSING_CODE = -1
+SNAPSHOT_FORMAT_VERSION = 1
+STRING_COLUMN_PARTS = ('buffer', 'offsets', 'missing')
+
+
+def canonical_columns(articles_df):
+    """
+    Articles with the notebook column names renamed as in Articles_clustered.csv
+    (a column that already exists under its app name is kept instead).
+    """
+    renames = {
+        alias: column for alias, column in COLUMN_ALIASES.items()
+        if alias in articles_df.columns and column not in articles_df.columns
+    }
+    return articles_df.rename(columns=renames) if renames else articles_df
+
+
+def _interned(values):
+    """
+    Object array of interned strings, None for missing values.
+    """
+    return np.array(
+        [sys.intern(value) if isinstance(value, str) else None for value in values],
+        dtype=object
+    )
+
+
+def _string_column_arrays(prefix, column):
+    """
+    Snapshot arrays of a StringColumn, named <prefix>.buffer etc.
+    """
+    return {f"{prefix}.{part}": getattr(column, part) for part in STRING_COLUMN_PARTS}
+
+
+def _load_string_column(directory, prefix, mmap_mode):
+    """
+    StringColumn backed by the snapshot arrays written under a prefix.
+    """
+    return StringColumn(*(load_array(directory, f"{prefix}.{part}", mmap_mode) for part in STRING_COLUMN_PARTS))
+
+
+def _load_interned(directory, prefix, mmap_mode):
+    """
+    Decode a snapshot string column into an object array of interned str.
+    """
+    return _interned(_load_string_column(directory, prefix, mmap_mode))
+
+
+class LazyColumns(Mapping):
+    """
+    Read-only field -> column mapping that loads each column on first access.
+
+    Membership tests and iteration only look at the field names, so checking
+    whether a field exists never reads it.
+    """
+
+    def __init__(self, loaders):
+        self._loaders = loaders
+        self._columns = {}
+
+    def __getitem__(self, field):
+        if field not in self._columns:
+            self._columns[field] = self._loaders[field]()
+        return self._columns[field]
+
+    def __contains__(self, field):
+        return field in self._loaders
+
+    def __iter__(self):
+        return iter(self._loaders)
+
+    def __len__(self):
+        return len(self._loaders)
+
+    def loaded(self):
+        """
+        Names of the fields read so far.
+        """
+        return list(self._columns)
+
+
+class ArticleStore:
+    """
+    Column store of the articles dataset.
+
+    Attributes:
+        numbers (dict): Field -> float64 array, NaN when missing
+        strings (dict): Field -> object array of interned str (None when missing)
+        texts (dict): Field -> StringColumn for long text fields
+        journal_codes (ndarray): int32 index into journal_names, MISSING_CODE if none
+        journal_names (ndarray): Distinct journal names, in order of first appearance
+        clusters (ndarray): int64 cluster label of each article
+        manifest (dict): Metadata of the snapshot the store was loaded from, if any
+        encoded_strings (Mapping): Field -> StringColumn of the short text
+            fields as stored in the snapshot, if any
+    """
+
+    def __init__(self, numbers, strings, texts, journal_codes, journal_names, clusters, manifest=None,
+                 encoded_strings=None):
+        self.numbers = numbers
+        self.strings = strings
+        self.texts = texts
+        self.journal_codes = journal_codes
+        self.journal_names = journal_names
+        self.clusters = clusters
+        self.manifest = manifest or {}
+        self.encoded_strings = encoded_strings or {}
+
+    @classmethod
+    def from_dataframe(cls, articles_df):
+        """
+        Convert an articles DataFrame (as read from Articles_clustered.csv).
+
+        Columns absent from the DataFrame are simply left out of the store;
+        notebook column names are accepted (see COLUMN_ALIASES).
+        """
+        articles_df = canonical_columns(articles_df)
+        numbers = {
+            field: pd.to_numeric(articles_df[column], errors='coerce').to_numpy(dtype=np.float64)
+            for field, column in NUMERIC_FIELDS.items() if column in articles_df.columns
+        }
+        strings = {
+            field: _interned(articles_df[column].to_numpy(dtype=object))
+            for field, column in SHORT_TEXT_FIELDS.items() if column in articles_df.columns
+        }
+        texts = {
+            field: StringColumn.from_values(articles_df[column].to_numpy(dtype=object))
+            for field, column in LONG_TEXT_FIELDS.items() if column in articles_df.columns
+        }
+
+        if 'journal_name' in articles_df.columns:
+            names = articles_df['journal_name'].where(articles_df['journal_name'].map(
+                lambda value: isinstance(value, str) and value.strip() != ''
+            ))
+            codes, categories = pd.factorize(names)
+            journal_codes = codes.astype(np.int32)
+            journal_names = _interned(categories)
+        else:
+            journal_codes = np.full(len(articles_df), MISSING_CODE, dtype=np.int32)
+            journal_names = np.zeros(0, dtype=object)
+
+        clusters = articles_df['cluster'].to_numpy(dtype=np.int64)
+        return cls(numbers, strings, texts, journal_codes, journal_names, clusters)
+
+    def append(self, other):
+        """
+        New in-memory store holding these articles followed by another store's.
+
+        Fields missing from one side are NaN / None for its rows, and journal
+        names new to this store get codes after the existing ones, so the
+        codes of existing articles do not change.
+
+        Args:
+            other (ArticleStore): Articles to add
+
+        Returns:
+            ArticleStore: Combined store (columns are copied into memory)
+        """
+        n_self, n_other = len(self), len(other)
+
+        def combined(fields_self, fields_other, fill, dtype):
+            return {
+                field: np.concatenate([
+                    np.asarray(fields[field]) if field in fields else np.full(n, fill, dtype=dtype)
+                    for fields, n in ((fields_self, n_self), (fields_other, n_other))
+                ])
+                for field in dict.fromkeys([*fields_self, *fields_other])
+            }
+
+        numbers = combined(self.numbers, other.numbers, np.nan, np.float64)
+        strings = combined(self.strings, other.strings, None, object)
+        texts = {
+            field: StringColumn.concat([
+                store.texts[field] if field in store.texts else StringColumn.from_values([None] * len(store))
+                for store in (self, other)
+            ])
+            for field in dict.fromkeys([*self.texts, *other.texts])
+        }
+
+        journal_names = list(self.journal_names)
+        codes = {name: code for code, name in enumerate(journal_names)}
+        remap = np.empty(len(other.journal_names) + 1, dtype=np.int32)
+        for code, name in enumerate(other.journal_names):
+            if name not in codes:
+                codes[name] = len(journal_names)
+                journal_names.append(name)
+            remap[code] = codes[name]
+        # MISSING_CODE (-1) maps to the trailing MISSING_CODE
+        remap[-1] = MISSING_CODE
+        journal_codes = np.concatenate([np.asarray(self.journal_codes), remap[np.asarray(other.journal_codes)]])
+
+        return ArticleStore(
+            numbers, strings, texts, journal_codes, _interned(journal_names),
+            np.concatenate([np.asarray(self.clusters), np.asarray(other.clusters)]).astype(np.int64)
+        )
+
+    def save(self, directory, sources=()):
+        """
+        Write the store as a snapshot directory.
+
+        Args:
+            directory (str): Output directory, created if needed
+            sources (iterable): Input files recorded in the manifest fingerprint
+        """
+        arrays = {'clusters': self.clusters, 'journal_codes': self.journal_codes}
+        arrays.update(_string_column_arrays('journal_names', StringColumn.from_values(self.journal_names)))
+        for field, values in self.numbers.items():
+            arrays[f"numbers.{field}"] = values
+        for field, values in self.strings.items():
+            arrays.update(_string_column_arrays(f"strings.{field}", StringColumn.from_values(values)))
+        for field, column in self.texts.items():
+            arrays.update(_string_column_arrays(f"texts.{field}", column))
+        save_arrays(directory, arrays)
+
+        self.manifest = write_manifest(directory, {
+            'format_version': SNAPSHOT_FORMAT_VERSION,
+            'n_rows': len(self),
+            'n_journals': len(self.journal_names),
+            'numbers': list(self.numbers),
+            'strings': list(self.strings),
+            'texts': list(self.texts),
+        }, sources)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """
+        Open a snapshot. Cluster labels and journal codes are read right away;
+        every other column is memory-mapped or decoded on first access.
+
+        Raises:
+            FileNotFoundError: If the directory holds no manifest
+            ValueError: If the snapshot was written by another format version
+        """
+        manifest = read_manifest(directory, SNAPSHOT_FORMAT_VERSION)
+        numbers = LazyColumns({
+            field: partial(load_array, directory, f"numbers.{field}", mmap_mode)
+            for field in manifest['numbers']
+        })
+        strings = LazyColumns({
+            field: partial(_load_interned, directory, f"strings.{field}", mmap_mode)
+            for field in manifest['strings']
+        })
+        texts = LazyColumns({
+            field: partial(_load_string_column, directory, f"texts.{field}", mmap_mode)
+            for field in manifest['texts']
+        })
+        encoded_strings = LazyColumns({
+            field: partial(_load_string_column, directory, f"strings.{field}", mmap_mode)
+            for field in manifest['strings']
+        })
+        return cls(
+            numbers, strings, texts,
+            load_array(directory, 'journal_codes', mmap_mode),
+            _load_interned(directory, 'journal_names', mmap_mode),
+            load_array(directory, 'clusters', mmap_mode),
+            manifest, encoded_strings
+        )
+
+    def is_current(self, sources):
+        """
+        Check that the snapshot was converted from the given files as they are
+        now (a missing file does not match).
+        """
+        return sources_match(self.manifest, sources)
+
+    def __len__(self):
+        return len(self.clusters)
+
+    def has(self, field):
+        """
+        Whether the store holds a field.
+        """
+        return (field in self.numbers or field in self.strings or field in self.texts
+                or (field == 'journal_name' and len(self.journal_names) > 0))
+
+    def journal_name(self, i):
+        """
+        Journal name of article i, or None.
+        """
+        code = self.journal_codes[i]
+        return self.journal_names[code] if code != MISSING_CODE else None
+
+    def get(self, field, i):
+        """
+        Value of a field for article i: str, float (NaN if missing) or None.
+        """
+        if field == 'journal_name':
+            return self.journal_name(i)
+        if field in self.numbers:
+            return float(self.numbers[field][i])
+        if field in self.strings:
+            return self.strings[field][i]
+        if field in self.texts:
+            return self.texts[field][i]
+        return None
+
+    def string_column(self, field):
+        """
+        Text field as a StringColumn, taken from the snapshot without decoding
+        when the store was loaded from one.
+
+        Unlike object arrays of str, a StringColumn is a few flat NumPy
+        buffers, so reading it does not write reference counts into memory
+        shared with forked processes.
+        """
+        if field in self.texts:
+            return self.texts[field]
+        if field in self.encoded_strings:
+            return self.encoded_strings[field]
+        if field in self.strings:
+            return StringColumn.from_values(self.strings[field])
+        return StringColumn.from_values([None] * len(self))
+
+    def column(self, field):
+        """
+        Whole column as a NumPy array (object dtype for text fields).
+        """
+        if field == 'journal_name':
+            # MISSING_CODE (-1) picks the trailing None
+            names = np.append(self.journal_names, None)
+            return names[self.journal_codes]
+        if field in self.numbers:
+            return self.numbers[field]
+        if field in self.strings:
+            return self.strings[field]
+        if field in self.texts:
+            return np.array(list(self.texts[field]), dtype=object)
+        raise KeyError(field)
+
+
+def main():
+    """
+    Command-line entry point converting the articles CSV into a snapshot.
+    """
+    parser = argparse.ArgumentParser(description="Convert the articles dataset into a fast-start snapshot.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    convert_parser = subparsers.add_parser('convert', help="Parse the CSV once and write the snapshot")
+    convert_parser.add_argument('--articles', default="Articles_clustered.csv")
+    convert_parser.add_argument('--out', default="snapshot")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = ArticleStore.from_dataframe(pd.read_csv(args.articles))
+    converted = time.perf_counter()
+    # Written aside and swapped in, as running apps may have the snapshot memory-mapped
+    new_path = staging_directory(args.out)
+    store.save(new_path, sources=[args.articles])
+    replace_directory(new_path, args.out)
+    saved = time.perf_counter()
+    ArticleStore.load(args.out)
+    print(f"Converted {len(store)} articles into '{args.out}' "
+          f"(parse {converted - start:.2f}s, write {saved - converted:.2f}s, "
+          f"snapshot open {(time.perf_counter() - saved) * 1000:.1f}ms)")
+
+
+if __name__ == "__main__":
+    main()
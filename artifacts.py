@@ -0,0 +1,120 @@
+"""
+Helpers shared by the on-disk artifacts (article index, article snapshot).
+
+An artifact is a directory of .npy arrays plus a JSON manifest. The manifest
+is written last, so a directory without one is never treated as complete.
+"""
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+MANIFEST_FILE = "manifest.json"
+
+
+def source_fingerprint(paths):
+    """
+    Identify the input files of an artifact by name, size and modification time.
+    """
+    fingerprint = {}
+    for path in paths:
+        stat = os.stat(path)
+        fingerprint[os.path.basename(path)] = [stat.st_size, stat.st_mtime_ns]
+    return fingerprint
+
+
+def sources_match(manifest, paths):
+    """
+    Whether the given input files exist and are unchanged since the artifact
+    recorded them in its manifest.
+
+    A missing file is a mismatch: callers that accept artifacts shipped
+    without some of their inputs leave those out of paths.
+    """
+    if not all(os.path.exists(path) for path in paths):
+        return False
+    recorded = manifest.get('sources') or {}
+    current = source_fingerprint(paths)
+    return all(recorded.get(name) == fingerprint for name, fingerprint in current.items())
+
+
+def save_arrays(directory, arrays):
+    """
+    Write each named array to <directory>/<name>.npy, creating the directory.
+
+    Files of a directory that running processes memory-mapped must not be
+    rewritten (they may crash with SIGBUS): write a staging_directory and
+    put it in place with replace_directory instead.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(array))
+
+
+def load_array(directory, name, mmap_mode='r'):
+    """
+    Load <directory>/<name>.npy, memory-mapped by default.
+    """
+    return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+
+
+def write_manifest(directory, manifest, sources=()):
+    """
+    Atomically write the manifest, adding creation time and source fingerprint.
+
+    Returns:
+        dict: The manifest as written
+    """
+    manifest = dict(manifest)
+    manifest['created_at'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    manifest['sources'] = source_fingerprint(sources)
+    tmp_path = os.path.join(directory, MANIFEST_FILE + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(directory, MANIFEST_FILE))
+    return manifest
+
+
+def read_manifest(directory, format_version):
+    """
+    Read an artifact manifest and check its format version.
+
+    Raises:
+        FileNotFoundError: If the directory holds no manifest
+        ValueError: If the artifact was written by another format version
+    """
+    with open(os.path.join(directory, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != format_version:
+        raise ValueError(f"Unsupported format version in '{directory}': {manifest.get('format_version')}")
+    return manifest
+
+
+def staging_directory(directory):
+    """
+    Empty <directory>.new, to write the next version of an artifact into.
+    """
+    new_directory = f"{directory}.new"
+    if os.path.exists(new_directory):
+        shutil.rmtree(new_directory)
+    return new_directory
+
+
+def replace_directory(new_directory, directory):
+    """
+    Put a freshly written artifact in place of an existing one.
+
+    The old directory is renamed away before being deleted, so processes
+    that memory-mapped its files keep reading the old pages instead of
+    seeing them overwritten.
+    """
+    old_directory = f"{directory}.old"
+    if os.path.exists(old_directory):
+        shutil.rmtree(old_directory)
+    if os.path.exists(directory):
+        os.rename(directory, old_directory)
+    os.rename(new_directory, directory)
+    if os.path.exists(old_directory):
+        shutil.rmtree(old_directory)
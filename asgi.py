@@ -0,0 +1,233 @@
+"""
+ASGI entry point serving the Flask application.
+
+    uvicorn asgi:app --workers 2
+
+The event loop accepts connections and reads request bodies, so slow
+clients never hold a worker thread. The Flask routes themselves run
+unchanged in a bounded thread pool. To keep tail latency stable under
+bursts, requests beyond MAX_PENDING (running or queued) are refused at once
+with 503 instead of waiting in an unbounded queue. A request that has not
+produced its response within REQUEST_TIMEOUT seconds gets 504.
+"""
+import asyncio
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from app import create_app
+
+EXECUTOR_THREADS = int(os.environ.get("ASGI_THREADS", "4"))
+MAX_PENDING = int(os.environ.get("ASGI_MAX_PENDING", "64"))
+REQUEST_TIMEOUT = float(os.environ.get("ASGI_REQUEST_TIMEOUT", "30"))
+
+
+def build_environ(scope, body):
+    """
+    WSGI environ (PEP 3333) for an ASGI HTTP scope and its request body.
+    """
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for raw_name, raw_value in scope.get('headers', []):
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        value = raw_value.decode('latin-1')
+        if name == 'CONTENT_TYPE' or name == 'CONTENT_LENGTH':
+            key = name
+        else:
+            key = f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    # The body is fully buffered, so its length is known even when the
+    # client used chunked transfer encoding
+    environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
+
+
+class WSGIBridge:
+    """
+    ASGI application running a WSGI application in a bounded thread pool.
+
+    Attributes:
+        max_pending (int): Requests allowed to run or wait for a thread
+        timeout (float): Seconds allowed to produce a response
+        pending (int): Requests currently running or waiting
+        rejected (int): Requests refused with 503 since startup
+        timed_out (int): Requests answered with 504 since startup
+    """
+
+    def __init__(self, wsgi_app, threads=EXECUTOR_THREADS, max_pending=MAX_PENDING, timeout=REQUEST_TIMEOUT):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='wsgi')
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pending = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        # Backpressure: refuse rather than queue without bound
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            await self._send_error(send, 503, b"Server is overloaded, retry later", [(b'retry-after', b'1')])
+            return
+
+        self.pending += 1
+        release = True
+        try:
+            release = await self._handle(scope, receive, send)
+        finally:
+            if release:
+                self.pending -= 1
+
+    def _release(self):
+        self.pending -= 1
+
+    async def _handle(self, scope, receive, send):
+        """
+        Serve one request.
+
+        The WSGI call and the iteration of its body run on one pool thread
+        (Flask's contexts, e.g. those kept by stream_with_context, are bound
+        to it); the chunks are handed to the event loop through a queue.
+
+        Returns:
+            bool: False when the request timed out while its thread kept
+            running; it then stays pending until that thread finishes
+        """
+        body = await self._read_body(receive)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        events = asyncio.Queue()
+        cancelled = threading.Event()
+
+        def emit(kind, value=None):
+            loop.call_soon_threadsafe(events.put_nowait, (kind, value))
+
+        worker = self.executor.submit(self._run, build_environ(scope, body), emit, cancelled)
+        started = False
+        try:
+            while True:
+                kind, value = await asyncio.wait_for(events.get(), max(deadline - loop.time(), 0))
+                if kind == 'start':
+                    status, headers = value
+                    await send({
+                        'type': 'http.response.start',
+                        'status': int(status.split(' ', 1)[0]),
+                        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                    for name, value in headers],
+                    })
+                    started = True
+                elif kind == 'body':
+                    if value:
+                        await send({'type': 'http.response.body', 'body': value, 'more_body': True})
+                elif kind == 'error' and not started:
+                    raise value
+                else:
+                    break
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            # The thread stops iterating the body at its next chunk
+            cancelled.set()
+            if not started:
+                await self._send_error(send, 504, b"Request timed out")
+                if worker.cancel():
+                    return True
+            else:
+                await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+            worker.add_done_callback(lambda future: loop.call_soon_threadsafe(self._release))
+            return False
+
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        await asyncio.wrap_future(worker)
+        return True
+
+    def _run(self, environ, emit, cancelled):
+        """
+        Call the WSGI application and iterate its body; runs in the thread pool.
+
+        Emits ('start', (status, headers)) before the first chunk, then
+        ('body', chunk) events and finally ('end', None), or ('error', exception).
+        """
+        response = {}
+
+        def write(data):
+            if 'sent' not in response:
+                # The status is only known once the first chunk has been produced
+                emit('start', (response['status'], response['headers']))
+                response['sent'] = True
+            emit('body', data)
+
+        def start_response(status, headers, exc_info=None):
+            response['status'], response['headers'] = status, headers
+            return write
+
+        try:
+            iterable = self.wsgi_app(environ, start_response)
+            try:
+                for chunk in iterable:
+                    write(chunk)
+                    if cancelled.is_set():
+                        break
+            finally:
+                close = getattr(iterable, 'close', None)
+                if close is not None:
+                    close()
+            if 'sent' not in response:
+                write(b'')
+            emit('end')
+        except Exception as e:
+            emit('error', e)
+
+    @staticmethod
+    async def _read_body(receive):
+        body = bytearray()
+        while True:
+            message = await receive()
+            body.extend(message.get('body', b''))
+            if not message.get('more_body', False):
+                return bytes(body)
+
+    @staticmethod
+    async def _send_error(send, status, message, headers=()):
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'text/plain; charset=utf-8'), *headers],
+        })
+        await send({'type': 'http.response.body', 'body': message, 'more_body': False})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+app = WSGIBridge(create_app())
@@ -0,0 +1,127 @@
+"""
+Micro-batching of concurrent single recommendation requests.
+
+Requests handled by different threads at the same time are collected for at
+most window_ms milliseconds (or until max_batch requests are waiting) and
+answered with one Recommender.recommend_batch call, so that they share one
+vectorize -> predict -> score pass instead of each paying the fixed cost of
+the sparse transform and matrix products.
+"""
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+
+class RequestCoalescer:
+    """
+    Background thread turning concurrent recommend() calls into batches.
+
+    Attributes:
+        recommender (Recommender): Engine answering requests that do not name one
+        window_ms (float): Longest wait for more requests once one arrived
+        max_batch (int): Batch size that triggers scoring immediately
+        observe_batch (callable): Receives the stage timings of each
+            recommend_batch call, once per batch (e.g. for the metrics)
+        batch_sizes (Counter): Number of batches of each size
+        requests (int): Requests answered through the coalescer
+    """
+
+    def __init__(self, recommender, window_ms=5, max_batch=32, observe_batch=None):
+        self.recommender = recommender
+        self.window_ms = window_ms
+        self.max_batch = max_batch
+        self.observe_batch = observe_batch
+        self.batch_sizes = Counter()
+        self.requests = 0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _ensure_worker(self):
+        """
+        Start the batching thread in this process (threads do not survive a fork).
+        """
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue()
+                    threading.Thread(target=self._run, name='coalescer', daemon=True).start()
+                    self._pid = os.getpid()
+
+    def recommend(self, title, abstract, keywords, k=10, mode='articles', n_probe=None, recommender=None):
+        """
+        Same contract as Recommender.recommend, answered as part of a batch.
+
+        The returned timings are those of the whole batch, plus the time the
+        request waited for its batch under 'coalesce.wait'; the batch timings
+        are shared by its requests, so they are reported to observe_batch
+        once rather than by each request. Requests naming
+        different engines (before and after a reload) are never batched
+        together.
+        """
+        self._ensure_worker()
+        future = Future()
+        item = {'title': title, 'abstract': abstract, 'keywords': keywords}
+        options = (recommender or self.recommender, k, mode, n_probe)
+        self._queue.put((item, options, time.perf_counter(), future))
+        return future.result()
+
+    def _collect(self):
+        """
+        Block for a first request, then gather more until the window closes
+        or the batch is full.
+        """
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.window_ms / 1000
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            self.batch_sizes[len(batch)] += 1
+            self.requests += len(batch)
+
+            # Requests with different engines or options are scored in separate calls
+            groups = {}
+            for request in batch:
+                groups.setdefault(request[1], []).append(request)
+            for (recommender, k, mode, n_probe), requests in groups.items():
+                started = time.perf_counter()
+                try:
+                    responses, timings = recommender.recommend_batch(
+                        [item for item, _, _, _ in requests], k=k, mode=mode, n_probe=n_probe
+                    )
+                    if self.observe_batch is not None:
+                        self.observe_batch(timings)
+                except Exception as e:
+                    for _, _, _, future in requests:
+                        future.set_exception(e)
+                    continue
+                for response, (_, _, queued, future) in zip(responses, requests):
+                    response['timings'] = {'coalesce.wait': round((started - queued) * 1000, 3), **timings}
+                    future.set_result(response)
+
+    def stats(self):
+        """
+        Batch size distribution, for the status endpoint.
+        """
+        batches = sum(self.batch_sizes.values())
+        return {
+            'window_ms': self.window_ms,
+            'max_batch': self.max_batch,
+            'requests': self.requests,
+            'batches': batches,
+            'mean_batch_size': round(self.requests / batches, 3) if batches else 0.0,
+            'batch_sizes': {str(size): count for size, count in sorted(self.batch_sizes.items())},
+        }
@@ -0,0 +1,70 @@
+"""
+Compact column types for read-mostly tables held in memory by the app.
+"""
+import numpy as np
+
+
+class StringColumn:
+    """
+    Variable-length strings stored as one UTF-8 buffer plus row offsets.
+
+    Row i is buffer[offsets[i]:offsets[i + 1]]; missing values are flagged in
+    a boolean mask so that they can be told apart from empty strings.
+    """
+
+    def __init__(self, buffer, offsets, missing):
+        self.buffer = buffer
+        self.offsets = offsets
+        self.missing = missing
+
+    @classmethod
+    def from_values(cls, values):
+        """
+        Encode an iterable of str (or None/NaN for missing values).
+        """
+        encoded, missing = [], []
+        for value in values:
+            is_missing = not isinstance(value, str)
+            missing.append(is_missing)
+            encoded.append(b'' if is_missing else value.encode('utf-8'))
+
+        lengths = np.fromiter((len(item) for item in encoded), dtype=np.int64, count=len(encoded))
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        buffer = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return cls(buffer, offsets, np.array(missing, dtype=bool))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        """
+        Decode row i, returning None for missing values.
+        """
+        if self.missing[i]:
+            return None
+        return self.buffer[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf-8')
+
+    def get(self, i, default=None):
+        value = self[i]
+        return default if value is None else value
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @classmethod
+    def concat(cls, columns):
+        """
+        Rows of several columns, in order, without decoding them.
+        """
+        buffers, offsets, base = [], [np.zeros(1, dtype=np.int64)], 0
+        for column in columns:
+            buffers.append(np.asarray(column.buffer[column.offsets[0]:column.offsets[-1]]))
+            offsets.append(np.asarray(column.offsets[1:]) - column.offsets[0] + base)
+            base += int(column.offsets[-1] - column.offsets[0])
+        return cls(
+            np.concatenate(buffers) if buffers else np.zeros(0, dtype=np.uint8),
+            np.concatenate(offsets),
+            np.concatenate([np.asarray(column.missing) for column in columns]) if columns else np.zeros(0, dtype=bool)
+        )
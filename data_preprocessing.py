@@ -0,0 +1,174 @@
+"""
+Text normalization shared by model training and the recommendation app.
+
+Usage:
+    python data_preprocessing.py parity --articles Articles_clustered.csv
+"""
+import argparse
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import pandas as pd
+from nltk.corpus import stopwords
+from nltk.stem import WordNetLemmatizer
+from nltk.tokenize import word_tokenize
+
+# Runs of ASCII letters: after lowercasing, these are exactly the tokens that
+# word_tokenize produces once every other character has been replaced by a space
+TOKEN_PATTERN = re.compile(r'[a-zA-Z]+')
+
+# Contractions that NLTK's Treebank tokenizer still splits in letters-only text
+TREEBANK_SPLITS = {
+    'cannot': ('can', 'not'),
+    'gimme': ('gim', 'me'),
+    'gonna': ('gon', 'na'),
+    'gotta': ('got', 'ta'),
+    'lemme': ('lem', 'me'),
+    'wanna': ('wan', 'na'),
+}
+# Documents per task sent to a cleaning worker
+CLEAN_CHUNK_SIZE = 2000
+
+_normalizer = None
+
+
+class TextNormalizer:
+    """
+    Reusable equivalent of clean_text: lowercase, keep letters only, drop
+    English/French stopwords and short tokens, then lemmatize.
+
+    The stopword set, the tokenizer regex and the lemmatizer are built once,
+    and lemmas are memoized in a bounded LRU cache.
+    """
+
+    def __init__(self, languages=('english', 'french'), min_length=3, lemma_cache_size=200000):
+        stop_words = set()
+        for language in languages:
+            stop_words.update(stopwords.words(language))
+        self.stop_words = frozenset(stop_words)
+        self.min_length = min_length
+        self.lemmatize = lru_cache(maxsize=lemma_cache_size)(WordNetLemmatizer().lemmatize)
+
+    def tokenize(self, text):
+        """
+        Split text into lowercase letter-only tokens, as word_tokenize would.
+        """
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        if not TREEBANK_SPLITS.keys().isdisjoint(tokens):
+            tokens = [part for token in tokens for part in TREEBANK_SPLITS.get(token, (token,))]
+        return tokens
+
+    def __call__(self, text):
+        if not isinstance(text, str):
+            return ""
+
+        stop_words = self.stop_words
+        min_length = self.min_length
+        lemmatize = self.lemmatize
+        return ' '.join([
+            lemmatize(token) for token in self.tokenize(text)
+            if len(token) >= min_length and token not in stop_words
+        ])
+
+    def cache_info(self):
+        """
+        Hit/miss statistics of the lemma cache.
+        """
+        return self.lemmatize.cache_info()
+
+
+def _init_worker():
+    global _normalizer
+    _normalizer = TextNormalizer()
+
+
+def _clean_chunk(texts):
+    return [_normalizer(text) for text in texts]
+
+
+def clean_texts(texts, workers=None, chunk_size=CLEAN_CHUNK_SIZE):
+    """
+    Normalize documents with TextNormalizer across a pool of processes.
+
+    Each worker builds its own normalizer (stopwords, lemmatizer and lemma
+    cache) once and cleans chunks of chunk_size documents, so the per-task
+    overhead is paid once per chunk rather than once per document.
+
+    Args:
+        texts (list): Documents to clean
+        workers (int): Number of processes, all cores if None
+        chunk_size (int): Documents per task
+
+    Returns:
+        list: Cleaned documents, in input order
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+    if workers == 1 or len(chunks) <= 1:
+        _init_worker()
+        return [cleaned for chunk in chunks for cleaned in _clean_chunk(chunk)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_init_worker) as executor:
+        return [cleaned for chunk in executor.map(_clean_chunk, chunks) for cleaned in chunk]
+
+
+def clean_text_reference(text):
+    """
+    Original NLTK-based cleaning pipeline, kept to verify TextNormalizer parity.
+    """
+    if not isinstance(text, str):
+        return ""
+
+    text = text.lower()
+    text = re.sub(r'[^a-zA-Z\s]', ' ', text)
+    tokens = word_tokenize(text)
+    stop_words = set(stopwords.words('english')).union(set(stopwords.words('french')))
+    tokens = [token for token in tokens if token not in stop_words and len(token) > 2]
+    lemmatizer = WordNetLemmatizer()
+    tokens = [lemmatizer.lemmatize(token) for token in tokens]
+    return ' '.join(tokens).strip()
+
+
+def check_parity(texts, normalizer=None):
+    """
+    Compare TextNormalizer against the reference pipeline.
+
+    Args:
+        texts (iterable): Documents to normalize with both implementations
+        normalizer (TextNormalizer): Normalizer under test, built if omitted
+
+    Returns:
+        list: (position, expected, actual) for every document that differs
+    """
+    normalizer = normalizer or TextNormalizer()
+    mismatches = []
+    for position, text in enumerate(texts):
+        expected = clean_text_reference(text)
+        actual = normalizer(text)
+        if actual != expected:
+            mismatches.append((position, expected, actual))
+    return mismatches
+
+
+def main():
+    """
+    Command-line entry point for the normalizer parity check.
+    """
+    parser = argparse.ArgumentParser(description="Text normalization utilities.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    parity_parser = subparsers.add_parser('parity', help="Check TextNormalizer against the reference cleaner")
+    parity_parser.add_argument('--articles', default="Articles_clustered.csv")
+    parity_parser.add_argument('--column', default="combined")
+    args = parser.parse_args()
+
+    texts = pd.read_csv(args.articles, usecols=[args.column])[args.column]
+    mismatches = check_parity(texts)
+    for position, expected, actual in mismatches[:10]:
+        print(f"Row {position}:\n  expected: {expected[:200]}\n  actual:   {actual[:200]}")
+    print(f"{len(texts) - len(mismatches)}/{len(texts)} documents identical")
+    raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Aggregates shown on the home and statistics pages.
+
+Counts per cluster and per journal and the citation totals are computed once
+from the article store and kept up to date incrementally when articles are
+added, so that page views only read the stored payload.
+"""
+import numpy as np
+
+TOP_JOURNALS = 10
+
+
+class DatasetStats:
+    """
+    Running aggregates over the articles dataset.
+
+    Attributes:
+        n_articles (int): Number of articles
+        cluster_counts (dict): Cluster label -> number of articles
+        journal_counts (ndarray): Articles per journal code of the store
+        journal_names (ndarray): Journal name of each code
+        citation_sum (float): Sum of the known citation counts
+        citation_count (int): Number of articles with a known citation count
+        citation_max (float): Largest citation count, NaN if none is known
+    """
+
+    def __init__(self, n_articles, cluster_counts, journal_counts, journal_names,
+                 citation_sum, citation_count, citation_max):
+        self.n_articles = n_articles
+        self.cluster_counts = cluster_counts
+        self.journal_counts = journal_counts
+        self.journal_names = journal_names
+        self.citation_sum = citation_sum
+        self.citation_count = citation_count
+        self.citation_max = citation_max
+        self._payload = None
+
+    @classmethod
+    def build(cls, store):
+        """
+        Compute the aggregates of a whole article store.
+        """
+        stats = cls(0, {}, np.zeros(len(store.journal_names), dtype=np.int64), store.journal_names,
+                    0.0, 0, np.nan)
+        stats.add(store.clusters, store.journal_codes, store.numbers.get('citations'))
+        return stats
+
+    def add(self, clusters, journal_codes, citations=None, journal_names=None):
+        """
+        Account for newly added articles.
+
+        Args:
+            clusters (ndarray): Cluster label of each new article
+            journal_codes (ndarray): Journal code of each new article (-1 if none)
+            citations (ndarray): float citation counts, NaN when unknown
+            journal_names (ndarray): Updated code -> name array, when the new
+                articles introduce journals
+        """
+        if journal_names is not None:
+            self.journal_names = journal_names
+        labels, counts = np.unique(np.asarray(clusters), return_counts=True)
+        for label, count in zip(labels.tolist(), counts.tolist()):
+            self.cluster_counts[label] = self.cluster_counts.get(label, 0) + count
+
+        codes = np.asarray(journal_codes)
+        codes = codes[codes >= 0]
+        added = np.bincount(codes, minlength=len(self.journal_names))
+        if len(added) > len(self.journal_counts):
+            self.journal_counts = np.concatenate([
+                self.journal_counts, np.zeros(len(added) - len(self.journal_counts), dtype=np.int64)
+            ])
+        self.journal_counts[:len(added)] += added
+
+        if citations is not None:
+            known = np.asarray(citations)[~np.isnan(citations)]
+            if len(known):
+                self.citation_sum += float(known.sum())
+                self.citation_count += len(known)
+                self.citation_max = float(np.fmax(self.citation_max, known.max()))
+
+        self.n_articles += len(clusters)
+        self._payload = None
+
+    def summary(self):
+        """
+        Article, cluster and journal counts for the home page.
+        """
+        return {
+            'total_articles': self.n_articles,
+            'total_clusters': len(self.cluster_counts),
+            'total_journals': int(np.count_nonzero(self.journal_counts)),
+        }
+
+    def payload(self):
+        """
+        Full statistics page payload, recomputed only after an update.
+        """
+        if self._payload is None:
+            top_codes = np.argsort(-self.journal_counts, kind='stable')[:TOP_JOURNALS]
+            if self.citation_count:
+                citation_stats = {
+                    'avg_citations': self.citation_sum / self.citation_count,
+                    'max_citations': self.citation_max,
+                    'total_citations': self.citation_sum
+                }
+            else:
+                citation_stats = {'avg_citations': 0, 'max_citations': 0, 'total_citations': 0}
+            self._payload = {
+                **self.summary(),
+                'cluster_distribution': dict(sorted(self.cluster_counts.items())),
+                'top_journals': {
+                    self.journal_names[code]: int(self.journal_counts[code])
+                    for code in top_codes.tolist() if self.journal_counts[code]
+                },
+                'citation_stats': citation_stats
+            }
+        return self._payload
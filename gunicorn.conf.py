@@ -0,0 +1,26 @@
+"""
+Gunicorn settings for the preload-and-fork serving mode.
+
+    gunicorn -c gunicorn.conf.py "app:create_app()"
+
+The app is created once in the master process and the workers are forked
+from it, so the dataset, models and indexes are shared copy-on-write
+instead of being loaded by every worker.
+"""
+import gc
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", "4"))
+preload_app = True
+
+
+def when_ready(server):
+    """
+    Move every object loaded by the master into the permanent GC generation
+    before forking, so that collections in the workers never touch (and
+    copy) the pages holding them.
+    """
+    gc.collect()
+    gc.freeze()
+    server.log.info("Froze %d objects before forking workers", gc.get_freeze_count())
@@ -0,0 +1,261 @@
+"""
+Vocabulary-free TF-IDF featurization.
+
+HashingTfidfVectorizer maps terms to a fixed number of features with a hash
+function instead of a vocabulary, and weights them with inverse document
+frequencies counted per feature. It has the fit/transform interface of the
+TfidfVectorizer in tfidf.pkl (same tokenization, smoothed IDF, L2 norm), so
+train.py can fit it (`--vectorizer hashing`) and the app serves it from
+TOKENIZER_PATH unchanged. Documents are read as a stream, batch_size at a
+time: fitting keeps only the per-feature document counts in memory, and
+terms that appear after training are featurized without a refit.
+
+Usage:
+    python hashing_vectorizer.py evaluate --articles Articles_clustered.csv --vectorizer tfidf.pkl \
+        --holdout 0.1 --k 10 --report hashing_evaluation.json
+"""
+import argparse
+import json
+import pickle
+import time
+from itertools import islice
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+from article_index import ArticleIndex
+from article_store import ArticleStore
+from retrievers import ExactRetriever
+
+N_FEATURES = 2 ** 18
+BATCH_SIZE = 1000
+
+
+class HashingTfidfVectorizer:
+    """
+    TF-IDF vectorizer over hashed term features.
+
+    Attributes:
+        n_features (int): Number of hashed features (columns of the vectors)
+        batch_size (int): Documents featurized at a time
+        hasher (HashingVectorizer): Term counts per hashed feature
+        n_documents (int): Documents seen by fit and partial_fit
+        document_counts (ndarray): Documents containing each feature
+        idf_ (ndarray): Inverse document frequency of each feature
+    """
+
+    def __init__(self, n_features=N_FEATURES, batch_size=BATCH_SIZE):
+        self.n_features = n_features
+        self.batch_size = batch_size
+        # Same tokenization as TfidfVectorizer; weighting and norm are applied afterwards
+        self.hasher = HashingVectorizer(n_features=n_features, alternate_sign=False, norm=None)
+        self.n_documents = 0
+        self.document_counts = np.zeros(n_features, dtype=np.int64)
+        self.idf_ = None
+
+    def _batches(self, texts):
+        if isinstance(texts, str):
+            raise ValueError("Iterable over raw text documents expected, string object received.")
+        iterator = iter(texts)
+        while True:
+            batch = list(islice(iterator, self.batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def _update_idf(self):
+        # Smoothed IDF, as TfidfVectorizer(smooth_idf=True)
+        self.idf_ = np.log((1 + self.n_documents) / (1 + self.document_counts)) + 1
+
+    def partial_fit(self, texts):
+        """
+        Add the document frequencies of more documents.
+
+        Returns:
+            HashingTfidfVectorizer: self
+        """
+        for batch in self._batches(texts):
+            counts = self.hasher.transform(batch)
+            # Hashed rows hold each feature once, so the column entries count documents
+            self.document_counts += np.bincount(counts.indices, minlength=self.n_features)
+            self.n_documents += counts.shape[0]
+        self._update_idf()
+        return self
+
+    def fit(self, texts):
+        """
+        Count the document frequencies of a corpus, from scratch.
+
+        Returns:
+            HashingTfidfVectorizer: self
+        """
+        self.n_documents = 0
+        self.document_counts = np.zeros(self.n_features, dtype=np.int64)
+        return self.partial_fit(texts)
+
+    def transform_batches(self, texts):
+        """
+        TF-IDF vectors of the documents, one sparse matrix per batch.
+        """
+        if self.idf_ is None:
+            raise ValueError("HashingTfidfVectorizer is not fitted")
+        for batch in self._batches(texts):
+            counts = self.hasher.transform(batch)
+            counts.data *= self.idf_[counts.indices]
+            yield normalize(counts)
+
+    def transform(self, texts):
+        """
+        TF-IDF vectors of the documents, one row per document.
+
+        Returns:
+            csr_matrix: Matrix of shape (documents, n_features)
+        """
+        batches = list(self.transform_batches(texts))
+        if not batches:
+            return sparse.csr_matrix((0, self.n_features))
+        return sparse.vstack(batches, format='csr')
+
+    def fit_transform(self, texts):
+        """
+        Fit on the documents and return their vectors.
+        """
+        texts = list(texts)
+        return self.fit(texts).transform(texts)
+
+    def __getstate__(self):
+        # Only the features seen in training are pickled; the IDF is rebuilt on load
+        state = self.__dict__.copy()
+        features = np.flatnonzero(self.document_counts)
+        state['document_counts'] = (features.astype(np.int32), self.document_counts[features])
+        del state['idf_']
+        return state
+
+    def __setstate__(self, state):
+        features, counts = state['document_counts']
+        state['document_counts'] = np.zeros(state['n_features'], dtype=np.int64)
+        state['document_counts'][features] = counts
+        self.__dict__.update(state)
+        self._update_idf()
+
+
+def featurizer_report(vectorizer, train_store, held_out_store, k):
+    """
+    Exact-search quality and costs of one featurizer.
+
+    Returns:
+        tuple: (report dict, neighbour rows of every query)
+    """
+    payload = pickle.dumps(vectorizer)
+    start = time.perf_counter()
+    pickle.loads(payload)
+    load_seconds = time.perf_counter() - start
+
+    retriever = ExactRetriever(ArticleIndex.build(train_store, vectorizer))
+    combined = held_out_store.texts['combined']
+    start = time.perf_counter()
+    queries = vectorizer.transform(combined.get(i, '') for i in range(len(held_out_store)))
+    transform_seconds = time.perf_counter() - start
+    neighbours = [result.rows for result in retriever.search_batch(queries, k)]
+
+    # Share of the neighbours published in the held-out article's journal
+    precisions = []
+    for i, rows in enumerate(neighbours):
+        journal = held_out_store.journal_name(i)
+        if journal is not None and len(rows):
+            precisions.append(np.mean([train_store.journal_name(row) == journal for row in rows]))
+    return {
+        'journal_precision_at_k': float(np.mean(precisions)) if precisions else 0.0,
+        'transform_ms_per_document': transform_seconds * 1000 / max(len(held_out_store), 1),
+        'pickle_bytes': len(payload),
+        'load_seconds': load_seconds,
+    }, neighbours
+
+
+def evaluate(articles_df, reference, n_features=N_FEATURES, holdout=0.1, k=10, seed=0):
+    """
+    Compare a hashing vectorizer with the current one on held-out articles.
+
+    A random share of the articles is held out; the hashing vectorizer is
+    fitted on the others only, while the reference is used as trained
+    (normally on every article, which slightly favours it). Each held-out
+    article queries the remaining ones by exact cosine search.
+
+    Args:
+        articles_df (DataFrame): Articles with 'combined' texts and journal names
+        reference (TfidfVectorizer): Current vectorizer (tfidf.pkl)
+        n_features (int): Hashed features of the evaluated vectorizer
+        holdout (float): Share of the articles used as queries
+        k (int): Neighbours retrieved per query
+        seed (int): Seed of the held-out split
+
+    Returns:
+        dict: Per-featurizer journal precision@k, transform time, pickle size
+        and load time, and the overlap of their top-k neighbours
+    """
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(articles_df))
+    n_held_out = max(1, int(round(len(articles_df) * holdout)))
+    held_out_df = articles_df.iloc[np.sort(order[:n_held_out])].reset_index(drop=True)
+    train_df = articles_df.iloc[np.sort(order[n_held_out:])].reset_index(drop=True)
+    train_store = ArticleStore.from_dataframe(train_df)
+    held_out_store = ArticleStore.from_dataframe(held_out_df)
+
+    start = time.perf_counter()
+    hashing = HashingTfidfVectorizer(n_features).fit(train_df['combined'].fillna(''))
+    fit_seconds = time.perf_counter() - start
+
+    current_report, current_neighbours = featurizer_report(reference, train_store, held_out_store, k)
+    hashing_report, hashing_neighbours = featurizer_report(hashing, train_store, held_out_store, k)
+    hashing_report['fit_seconds'] = fit_seconds
+    overlaps = [len(np.intersect1d(a, b)) / len(a) for a, b in zip(current_neighbours, hashing_neighbours) if len(a)]
+    return {
+        'k': k,
+        'articles': len(train_df),
+        'queries': len(held_out_df),
+        'n_features': n_features,
+        'current': current_report,
+        'hashing': hashing_report,
+        'overlap_at_k': float(np.mean(overlaps)) if overlaps else 0.0,
+    }
+
+
+def main():
+    """
+    Command-line entry point comparing the hashing vectorizer with tfidf.pkl.
+    """
+    parser = argparse.ArgumentParser(description="Evaluate the hashing TF-IDF vectorizer.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    evaluate_parser = subparsers.add_parser('evaluate', help="Compare retrieval with the current vectorizer")
+    evaluate_parser.add_argument('--articles', default="Articles_clustered.csv")
+    evaluate_parser.add_argument('--vectorizer', default="tfidf.pkl", help="Current vectorizer")
+    evaluate_parser.add_argument('--n-features', type=int, default=N_FEATURES)
+    evaluate_parser.add_argument('--holdout', type=float, default=0.1, help="Share of articles used as queries")
+    evaluate_parser.add_argument('--k', type=int, default=10)
+    evaluate_parser.add_argument('--seed', type=int, default=0)
+    evaluate_parser.add_argument('--report', default=None, help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = evaluate(pd.read_csv(args.articles), joblib.load(args.vectorizer), n_features=args.n_features,
+                      holdout=args.holdout, k=args.k, seed=args.seed)
+    print(f"{report['queries']} held-out queries against {report['articles']} articles, k={args.k}")
+    for name in ('current', 'hashing'):
+        row = report[name]
+        print(f"{name:>8}: journal precision@{args.k}={row['journal_precision_at_k']:.3f} "
+              f"transform={row['transform_ms_per_document']:.3f}ms/doc "
+              f"pickle={row['pickle_bytes'] / 1024:.0f}KiB load={row['load_seconds'] * 1000:.2f}ms")
+    print(f"Top-{args.k} overlap with the current vectorizer: {report['overlap_at_k']:.3f}")
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    # Run from the imported module, so that the vectorizers it creates pickle
+    # as hashing_vectorizer.HashingTfidfVectorizer rather than __main__'s copy
+    import hashing_vectorizer
+    hashing_vectorizer.main()
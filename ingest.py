@@ -0,0 +1,228 @@
+"""
+Incremental ingestion of new articles.
+
+    python ingest.py add --records new_articles.csv
+    python ingest.py compact
+
+`add` cleans the new records, vectorizes them with the existing tfidf.pkl,
+assigns their clusters with kmeans_model.pkl and writes them as a batch under
+INGEST_PATH (see article_batches.py). Apps load pending batches at startup;
+running apps only apply them live when INGEST_POLL_SECONDS is set.
+
+`compact` folds the batches into Articles_clustered.csv, the snapshot and the
+index, reusing the stored vectors, then removes them; running apps see the
+new articles file and reload the memory-mapped artifacts (see
+model_registry.Reloader). With a model registry
+(MODEL_REGISTRY_PATH), published versions are left untouched: the merged
+data is published as a new version of the active model instead, which the
+running apps then reload.
+"""
+import argparse
+import os
+import shutil
+import time
+
+import joblib
+import pandas as pd
+
+from article_batches import RECORDS_FILE, list_batches, load_batches, merge_batches, write_batch
+from article_store import ArticleStore, canonical_columns
+from artifacts import replace_directory
+from data_preprocessing import clean_texts
+from model_registry import activate, publish, resolve_model_config
+from recommender import DEFAULT_CONFIG, load_article_index, load_article_store
+from train import COMBINED_COLUMNS, prepare_articles
+
+
+def drop_known(records_df, store):
+    """
+    Remove records whose DOI is already in the store or repeated in the input.
+    """
+    if 'DOI' not in records_df.columns or 'doi' not in store.strings:
+        return records_df
+    known = {doi.strip().lower() for doi in store.strings['doi'] if doi}
+    dois = records_df['DOI'].map(lambda doi: doi.strip().lower() if isinstance(doi, str) and doi.strip() else None)
+    duplicate = dois.isin(known) | (dois.notna() & dois.duplicated())
+    return records_df[~duplicate]
+
+
+def prepare_records(records_df, vectorizer, kmeans_model, workers=None, partial_fit=False):
+    """
+    Clean, vectorize and cluster new records.
+
+    Args:
+        records_df (DataFrame): New articles in the Articles_clustered.csv schema
+        vectorizer (TfidfVectorizer): The fitted vectorizer being served
+        kmeans_model (KMeans): The fitted clustering model being served
+        workers (int): Processes used for text cleaning, all cores if None
+        partial_fit (bool): Update the centroids with the new articles first
+            (MiniBatchKMeans models only)
+
+    Returns:
+        tuple: (records with 'combined' and 'cluster', TF-IDF vectors)
+    """
+    records_df = canonical_columns(records_df)
+    if not any(column in records_df.columns for column in COMBINED_COLUMNS):
+        raise ValueError(f"Records have none of the text columns {COMBINED_COLUMNS}")
+    # Same text fields and cleaning as in training, so vectors are comparable
+    records_df = prepare_articles(records_df)
+    records_df['combined'] = clean_texts(records_df['combined'].tolist(), workers)
+    vectors = vectorizer.transform(records_df['combined'])
+    if partial_fit:
+        if not hasattr(kmeans_model, 'partial_fit'):
+            raise ValueError(f"{type(kmeans_model).__name__} does not support partial_fit, use MiniBatchKMeans")
+        kmeans_model.partial_fit(vectors)
+    records_df['cluster'] = kmeans_model.predict(vectors)
+    return records_df, vectors
+
+
+def add(config, records_path, workers=None, partial_fit=False):
+    """
+    Ingest a CSV of new articles as a batch, vectorized and clustered by the
+    active model version.
+
+    Returns:
+        str: Name of the batch written, or None if every record was known
+    """
+    config, model_version = resolve_model_config(config)
+    if partial_fit and config['MODEL_REGISTRY_PATH']:
+        raise ValueError("Published model versions are immutable, train and publish a new version instead")
+    store, _ = merge_batches(load_article_store(config), None, load_batches(config['INGEST_PATH']))
+    records_df = pd.read_csv(records_path)
+    new_df = drop_known(records_df, store)
+    if len(new_df) < len(records_df):
+        print(f"Skipping {len(records_df) - len(new_df)} records already ingested")
+    if not len(new_df):
+        return None
+
+    vectorizer = joblib.load(config['TOKENIZER_PATH'])
+    kmeans_model = joblib.load(config['KMEANS_PATH'])
+    new_df, vectors = prepare_records(new_df, vectorizer, kmeans_model, workers, partial_fit)
+    if partial_fit:
+        tmp_path = config['KMEANS_PATH'] + '.tmp'
+        joblib.dump(kmeans_model, tmp_path)
+        os.replace(tmp_path, config['KMEANS_PATH'])
+        print(f"Updated the centroids in '{config['KMEANS_PATH']}'")
+        # Batches are tagged with the updated model, whose files just changed
+        _, model_version = resolve_model_config(config)
+    return write_batch(config['INGEST_PATH'], new_df, vectors, model_version)
+
+
+def compact(config):
+    """
+    Fold every batch into the articles CSV, the snapshot and the index.
+
+    The snapshot and index are rewritten from the merged data without
+    re-vectorizing it, next to the live ones, and swapped in first: until
+    the CSV is replaced they are stale, so a process starting meanwhile
+    parses the old CSV and applies the batches. The CSV is replaced next,
+    which makes running apps reload, and the batches are removed right
+    after it, so an interruption never loses articles. Batches of another
+    model version are re-clustered with the active one.
+
+    Returns:
+        int: Number of articles folded in
+    """
+    ingest_path = config['INGEST_PATH']
+    names = list_batches(ingest_path)
+    if not names:
+        return 0
+    config, model_version = resolve_model_config(config)
+    articles_path = config['ARTICLES_PATH']
+    vectorizer = joblib.load(config['TOKENIZER_PATH'])
+    kmeans_model = joblib.load(config['KMEANS_PATH'])
+    base_store = load_article_store(config)
+    article_index = load_article_index(config, base_store, vectorizer)
+    batches = load_batches(ingest_path, names)
+    store, article_index = merge_batches(base_store, article_index, batches, vectorizer, kmeans_model, model_version)
+
+    articles_df = canonical_columns(pd.read_csv(articles_path))
+    records = [canonical_columns(pd.read_csv(os.path.join(ingest_path, name, RECORDS_FILE))) for name in names]
+    articles_df = pd.concat([articles_df, *records], ignore_index=True)
+    articles_df['cluster'] = store.clusters
+    if config['MODEL_REGISTRY_PATH']:
+        return publish_compacted(config, model_version, articles_df, article_index, names, batches)
+
+    # The new CSV is staged under its final name, so that the fingerprints
+    # recorded by the snapshot and index still match once it is moved
+    staging = os.path.join(os.path.dirname(os.path.abspath(articles_path)), '.compact')
+    if os.path.exists(staging):
+        shutil.rmtree(staging)
+    os.makedirs(staging)
+    staged_path = os.path.join(staging, os.path.basename(articles_path))
+    articles_df.to_csv(staged_path, index=False)
+
+    snapshot_path, index_path = config['SNAPSHOT_PATH'], config['INDEX_PATH']
+    ArticleStore.from_dataframe(articles_df).save(f"{snapshot_path}.new", sources=[staged_path])
+    if article_index is not None:
+        article_index.save(f"{index_path}.new",
+                           sources=[staged_path, config['TOKENIZER_PATH'], config['KMEANS_PATH']])
+    replace_directory(f"{snapshot_path}.new", snapshot_path)
+    if article_index is not None:
+        replace_directory(f"{index_path}.new", index_path)
+    os.replace(staged_path, articles_path)
+    for name in names:
+        shutil.rmtree(os.path.join(ingest_path, name))
+    shutil.rmtree(staging)
+    return sum(len(batch.store) for batch in batches)
+
+
+def publish_compacted(config, model_version, articles_df, article_index, names, batches):
+    """
+    Publish the compacted data with the active model as a new registry
+    version, then remove the batches it includes.
+    """
+    registry, ingest_path = config['MODEL_REGISTRY_PATH'], config['INGEST_PATH']
+    # Named after the model it was trained as, plus the time of the compaction
+    version = f"{model_version.split('+')[0]}+{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}"
+    tmp_path = os.path.join(registry, f".{version}.csv")
+    articles_df.to_csv(tmp_path, index=False)
+    try:
+        version = publish(registry, config['TOKENIZER_PATH'], config['KMEANS_PATH'], tmp_path, version,
+                          make_active=False, article_index=article_index)
+    finally:
+        os.remove(tmp_path)
+    activate(registry, version)
+    for name in names:
+        shutil.rmtree(os.path.join(ingest_path, name))
+    print(f"Published the compacted articles as model version '{version}'")
+    return sum(len(batch.store) for batch in batches)
+
+
+def main():
+    """
+    Command-line entry point for incremental ingestion.
+    """
+    parser = argparse.ArgumentParser(description="Add new articles without retraining or rebuilding.")
+    parser.add_argument('--ingest-path', default=DEFAULT_CONFIG['INGEST_PATH'])
+    parser.add_argument('--registry', default=DEFAULT_CONFIG['MODEL_REGISTRY_PATH'],
+                        help="Model registry (default: none, use the top-level artifacts)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    add_parser = subparsers.add_parser('add', help="Clean, vectorize and cluster new records into a batch")
+    add_parser.add_argument('--records', required=True, help="CSV in the Articles_clustered.csv schema")
+    add_parser.add_argument('--workers', type=int, default=None, help="Cleaning processes (default: all cores)")
+    add_parser.add_argument('--partial-fit', action='store_true',
+                            help="Update the MiniBatchKMeans centroids with the new articles")
+    subparsers.add_parser('compact', help="Fold the batches into the articles CSV, snapshot and index")
+    subparsers.add_parser('list', help="List the pending batches")
+    args = parser.parse_args()
+
+    config = {**DEFAULT_CONFIG, 'INGEST_PATH': args.ingest_path, 'MODEL_REGISTRY_PATH': args.registry}
+    start = time.perf_counter()
+    if args.command == 'add':
+        name = add(config, args.records, args.workers, args.partial_fit)
+        if name is None:
+            print("Nothing to ingest")
+        else:
+            print(f"Wrote batch '{name}' in {time.perf_counter() - start:.2f}s")
+    elif args.command == 'compact':
+        count = compact(config)
+        target = f"model registry '{args.registry}'" if args.registry else f"'{config['ARTICLES_PATH']}'"
+        print(f"Folded {count} ingested articles into {target} in {time.perf_counter() - start:.2f}s")
+    else:
+        for name in list_batches(config['INGEST_PATH']):
+            print(name)
+
+
+if __name__ == "__main__":
+    main()
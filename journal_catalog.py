@@ -0,0 +1,364 @@
+"""
+Journal catalog combining journal_info.csv with metrics from the articles dataset.
+
+Journals are stored column-wise (NumPy arrays and UTF-8 string buffers) with
+one row per journal, and can be looked up in O(1) by normalized name or ISSN.
+Rows come from journal_info.csv first; article journals are joined on ISSN,
+then on name (exact, without filler words, then fuzzy), and journals missing
+from journal_info.csv get a row built from their first article. A name match
+is rejected when both sides have valid, different ISSNs: many distinct
+journals have near-identical names (Physical Review A and E, Hepatology and
+Journal of Hepatology).
+"""
+import difflib
+import re
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from article_store import MISSING_CODE
+from columnar import StringColumn
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+_NAME_FILLERS = frozenset(['the', 'of', 'and', 'in', 'on', 'for'])
+# Words too common to narrow down fuzzy candidates
+_BLOCK_SKIP_WORDS = _NAME_FILLERS | {'journal'}
+FUZZY_NAME_CUTOFF = 0.9
+# Close names considered per fuzzy lookup
+FUZZY_CANDIDATES = 3
+# Leading and trailing characters of a normalized name that block fuzzy candidates
+FUZZY_AFFIX_LENGTH = 4
+# Shortest word in which a fuzzy match tolerates a typo (shorter words,
+# such as section letters, must be identical)
+FUZZY_TYPO_MIN_LENGTH = 6
+
+STRING_FIELDS = ('name', 'issn', 'publisher', 'scope', 'quartile', 'quartile_category', 'index_type')
+NUMERIC_FIELDS = ('h_index', 'sjr_score', 'impact_factor', 'quartile_year', 'sjr_year', 'impact_factor_year')
+INTEGER_FIELDS = ('h_index', 'quartile_year', 'sjr_year', 'impact_factor_year')
+
+# journal_info.csv column -> catalog field
+JOURNAL_INFO_COLUMNS = {
+    'title': 'name',
+    'issn': 'issn',
+    'publisher': 'publisher',
+    'thematic_scope': 'scope',
+    'quartile': 'quartile',
+    'quartile_category': 'quartile_category',
+    'h_index': 'h_index',
+    'sjr_score': 'sjr_score',
+    'impact_factor_score': 'impact_factor',
+    'quartile_year': 'quartile_year',
+    'sjr_year': 'sjr_year',
+    'impact_factor_year': 'impact_factor_year',
+}
+
+# ArticleStore field -> catalog field
+ARTICLE_FIELDS = {
+    'journal_name': 'name',
+    'issn': 'issn',
+    'publisher': 'publisher',
+    'scope': 'scope',
+    'quartile': 'quartile',
+    'index_type': 'index_type',
+    'h_index': 'h_index',
+    'sjr': 'sjr_score',
+    'impact_factor': 'impact_factor',
+}
+
+
+def normalize_journal_name(name):
+    """
+    Case- and punctuation-insensitive key for a journal name.
+    """
+    if not isinstance(name, str):
+        return ""
+    return _NON_ALNUM.sub(' ', name.casefold().replace('&', ' and ')).strip()
+
+
+def journal_words(name):
+    """
+    Words of a journal name that tell journals apart, in order (every word
+    but fillers such as 'the' and 'of').
+    """
+    return [word for word in normalize_journal_name(name).split() if word not in _NAME_FILLERS]
+
+
+def loose_journal_key(name):
+    """
+    Key that ignores filler words, so that "The Journal of X" matches "Journal of X".
+    """
+    return ' '.join(journal_words(name))
+
+
+def same_journal_words(name, other):
+    """
+    Whether two journal names have the same distinguishing words, allowing a
+    letter typo (one substitution or two swapped letters) in long words.
+    """
+    words, other_words = journal_words(name), journal_words(other)
+    return len(words) == len(other_words) and all(
+        word == other_word or (
+            len(word) == len(other_word) >= FUZZY_TYPO_MIN_LENGTH
+            and sum(a != b for a, b in zip(word, other_word)) <= 2
+        )
+        for word, other_word in zip(words, other_words)
+    )
+
+
+def normalize_issn(issn):
+    """
+    Canonical 8-character ISSN (no hyphen, uppercase check digit), or "".
+    """
+    if not isinstance(issn, str):
+        return ""
+    compact = issn.replace('-', '').strip().upper()
+    return compact if re.fullmatch(r'\d{7}[\dX]', compact) else ""
+
+
+def issns_conflict(record, other):
+    """
+    Whether two journal records both have a valid ISSN, and they differ.
+    """
+    issn, other_issn = normalize_issn(record.get('issn')), normalize_issn(other.get('issn'))
+    return bool(issn and other_issn and issn != other_issn)
+
+
+def _as_text(value):
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return None
+
+
+def _as_number(value):
+    number = pd.to_numeric(value, errors='coerce')
+    return float(number) if pd.notna(number) else np.nan
+
+
+class FuzzyNameIndex:
+    """
+    Close matches of normalized journal names, compared by blocks.
+
+    A name is only compared with the names sharing one of its significant
+    words or its first or last FUZZY_AFFIX_LENGTH characters: names similar
+    enough to pass the cutoff (a few characters apart) practically always
+    do, and each lookup scores a few candidates instead of the whole
+    catalog. Close names are only accepted with the same distinguishing
+    words (see same_journal_words), so Physical Review B never matches
+    Physical Review D, nor Journal of Pathology Journal of Hepatology.
+    """
+
+    def __init__(self, names, cutoff=FUZZY_NAME_CUTOFF):
+        self.cutoff = cutoff
+        self.blocks = defaultdict(list)
+        for name in names:
+            for key in self._keys(name):
+                self.blocks[key].append(name)
+
+    @staticmethod
+    def _keys(name):
+        keys = {('word', word) for word in name.split() if word not in _BLOCK_SKIP_WORDS}
+        keys.add(('prefix', name[:FUZZY_AFFIX_LENGTH]))
+        keys.add(('suffix', name[-FUZZY_AFFIX_LENGTH:]))
+        return keys
+
+    def matches(self, name):
+        """
+        Indexed names with a similarity ratio of at least cutoff and the same
+        distinguishing words, closest first.
+        """
+        candidates = sorted({candidate for key in self._keys(name) for candidate in self.blocks.get(key, ())})
+        close = difflib.get_close_matches(name, candidates, n=FUZZY_CANDIDATES, cutoff=self.cutoff)
+        return [candidate for candidate in close if same_journal_words(name, candidate)]
+
+
+class JournalCatalog:
+    """
+    One row per journal, stored column-wise.
+
+    Attributes:
+        strings (dict): Field name -> StringColumn
+        numbers (dict): Field name -> float64 array (NaN when missing)
+        avg_citations (ndarray): Mean citations of the journal's articles
+        total_articles (ndarray): Number of articles of the journal in the dataset
+        name_index (dict): Normalized journal name -> row
+        issn_index (dict): Normalized ISSN -> row
+        article_rows (ndarray): Catalog row of each article's journal, in
+            articles DataFrame order (-1 when the article has no journal)
+    """
+
+    def __init__(self, strings, numbers, avg_citations, total_articles, name_index, issn_index,
+                 article_rows=None):
+        self.strings = strings
+        self.numbers = numbers
+        self.avg_citations = avg_citations
+        self.total_articles = total_articles
+        self.name_index = name_index
+        self.issn_index = issn_index
+        self.article_rows = article_rows if article_rows is not None else np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def build(cls, store, journal_info_df=None):
+        """
+        Build the catalog from journal_info.csv rows and the articles table.
+
+        Args:
+            store (ArticleStore): Articles dataset
+            journal_info_df (DataFrame): Contents of journal_info.csv, optional
+
+        Returns:
+            JournalCatalog: Catalog covering every journal of both inputs
+        """
+        rows, citation_sums, citation_counts, total_articles = [], [], [], []
+        name_index, issn_index, loose_index = {}, {}, {}
+
+        def add_row(record):
+            row = len(rows)
+            rows.append(record)
+            citation_sums.append(0.0)
+            citation_counts.append(0)
+            total_articles.append(0)
+            name_key = normalize_journal_name(record.get('name'))
+            if name_key:
+                name_index.setdefault(name_key, row)
+                loose_index.setdefault(loose_journal_key(record.get('name')), row)
+            issn = normalize_issn(record.get('issn'))
+            if issn:
+                issn_index.setdefault(issn, row)
+            return row
+
+        def name_matches(key, name):
+            yield name_index.get(key)
+            yield loose_index.get(loose_journal_key(name))
+            for close in fuzzy_names.matches(key):
+                yield name_index[close]
+
+        if journal_info_df is not None:
+            for info in journal_info_df.to_dict('records'):
+                if normalize_issn(info.get('issn')) in issn_index:
+                    continue
+                add_row({field: info.get(column) for column, field in JOURNAL_INFO_COLUMNS.items()})
+        fuzzy_names = FuzzyNameIndex(list(name_index))
+
+        codes = store.journal_codes
+        name_rows = np.full(len(store.journal_names), -1, dtype=np.int64)
+        if len(store.journal_names):
+            # Per journal name: first article, article count and citation totals
+            articles_with_journal = np.flatnonzero(codes != MISSING_CODE)
+            journal_codes = codes[articles_with_journal]
+            _, first_positions = np.unique(journal_codes, return_index=True)
+            first_articles = articles_with_journal[first_positions]
+            name_counts = np.bincount(journal_codes, minlength=len(store.journal_names))
+
+            citations = store.numbers.get('citations', np.full(len(store), np.nan))[articles_with_journal]
+            known = ~np.isnan(citations)
+            name_citation_sums = np.bincount(journal_codes[known], weights=citations[known],
+                                             minlength=len(store.journal_names))
+            name_citation_counts = np.bincount(journal_codes[known], minlength=len(store.journal_names))
+
+            key_rows = {}
+            for code, journal_name in enumerate(store.journal_names):
+                key = normalize_journal_name(journal_name)
+                if not key:
+                    continue
+                row = key_rows.get(key)
+                if row is None:
+                    article = first_articles[code]
+                    record = {field: store.get(store_field, article) for store_field, field in ARTICLE_FIELDS.items()}
+                    row = issn_index.get(normalize_issn(record['issn']))
+                    if row is None:
+                        row = next((match for match in name_matches(key, record['name'])
+                                    if match is not None and not issns_conflict(record, rows[match])), None)
+
+                    if row is None:
+                        row = add_row(record)
+                    else:
+                        # journal_info.csv wins; article metadata only fills its gaps
+                        matched = rows[row]
+                        for field, value in record.items():
+                            if matched.get(field) is None or (isinstance(matched[field], float) and np.isnan(matched[field])):
+                                matched[field] = value
+                        name_index.setdefault(key, row)
+                        issn = normalize_issn(record['issn'])
+                        if issn:
+                            issn_index.setdefault(issn, row)
+                    key_rows[key] = row
+
+                # Several spellings of a journal may resolve to the same row
+                name_rows[code] = row
+                citation_sums[row] += float(name_citation_sums[code])
+                citation_counts[row] += int(name_citation_counts[code])
+                total_articles[row] += int(name_counts[code])
+
+        # MISSING_CODE (-1) picks the trailing -1
+        article_rows = np.append(name_rows, -1)[codes]
+
+        strings = {
+            field: StringColumn.from_values([_as_text(record.get(field)) for record in rows])
+            for field in STRING_FIELDS
+        }
+        numbers = {
+            field: np.array([_as_number(record.get(field)) for record in rows], dtype=np.float64)
+            for field in NUMERIC_FIELDS
+        }
+        citation_counts = np.array(citation_counts, dtype=np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg_citations = np.array(citation_sums, dtype=np.float64) / citation_counts
+        return cls(
+            strings, numbers,
+            avg_citations,
+            np.array(total_articles, dtype=np.int64),
+            name_index, issn_index, article_rows
+        )
+
+    def __len__(self):
+        return len(self.total_articles)
+
+    def profile(self, row):
+        """
+        Journal details dictionary for one catalog row.
+        """
+        details = {field: self.strings[field].get(row, 'N/A') for field in STRING_FIELDS}
+        for field in NUMERIC_FIELDS:
+            value = self.numbers[field][row]
+            if np.isnan(value):
+                details[field] = 'N/A'
+            else:
+                details[field] = int(value) if field in INTEGER_FIELDS else float(value)
+        avg = self.avg_citations[row]
+        details['avg_citations'] = round(float(avg), 2) if avg and not np.isnan(avg) else 'N/A'
+        details['total_articles'] = int(self.total_articles[row])
+        return details
+
+    def search(self, query):
+        """
+        Names of all journals whose normalized name contains the query.
+        """
+        key = normalize_journal_name(query)
+        if not key:
+            return []
+        rows = sorted({row for name, row in self.name_index.items() if key in name})
+        return [self.strings['name'][row] for row in rows]
+
+    def find(self, query):
+        """
+        Row of a journal given by exact name or ISSN, falling back to a partial
+        name only when it identifies a single journal. Returns None otherwise.
+        """
+        key = normalize_journal_name(query)
+        row = self.name_index.get(key)
+        if row is None:
+            row = self.issn_index.get(normalize_issn(query))
+        if row is None and key:
+            matches = {r for name, r in self.name_index.items() if key in name}
+            if len(matches) == 1:
+                row = matches.pop()
+        return row
+
+    def lookup(self, query):
+        """
+        Journal details for a name or ISSN, or None if not found or ambiguous.
+        """
+        row = self.find(query)
+        return self.profile(row) if row is not None else None
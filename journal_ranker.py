@@ -0,0 +1,91 @@
+"""
+Journal-level retrieval using one TF-IDF centroid per catalog journal.
+
+A journal vector is the normalized mean of its articles' vectors, blended with
+the TF-IDF vector of its thematic scope from journal_info.csv, so that
+journals without indexed articles can still be ranked.
+"""
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+SCOPE_WEIGHT = 0.5
+
+
+class JournalRanker:
+    """
+    Ranks catalog journals against a query with a single sparse mat-vec.
+
+    Attributes:
+        matrix (csr_matrix): L2-normalized journal vectors, one row per catalog row
+    """
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+
+    @classmethod
+    def build(cls, catalog, article_index, vectorizer, normalizer, scope_weight=SCOPE_WEIGHT):
+        """
+        Aggregate article vectors and scope vectors into journal centroids.
+
+        Args:
+            catalog (JournalCatalog): Journal catalog with article_rows mapping
+            article_index (ArticleIndex): Precomputed article vectors, or None
+            vectorizer (TfidfVectorizer): Fitted vectorizer for scope texts
+            normalizer (callable): Text cleaning function applied to scopes
+            scope_weight (float): Weight of the scope vector relative to the
+                article centroid
+
+        Returns:
+            JournalRanker: Ranker over all catalog journals
+        """
+        scopes = [normalizer(scope) if scope else '' for scope in catalog.strings['scope']]
+        scope_vectors = normalize(vectorizer.transform(scopes))
+
+        n_journals = len(catalog)
+        centroids = sparse.csr_matrix(scope_vectors.shape)
+        if article_index is not None and len(article_index):
+            # Sum the normalized article vectors of each journal
+            journal_of_row = catalog.article_rows[article_index.row_ids]
+            matched = np.flatnonzero(journal_of_row >= 0)
+            membership = sparse.csr_matrix(
+                (np.ones(len(matched)), (journal_of_row[matched], matched)),
+                shape=(n_journals, len(article_index))
+            )
+            centroids = normalize(membership @ article_index.matrix)
+
+        return cls(sparse.csr_matrix(normalize(centroids + scope_weight * scope_vectors)))
+
+    def rank(self, query_vector, k=5):
+        """
+        Top-k journals by cosine similarity to the query.
+
+        Returns:
+            tuple: (catalog rows, similarities), best first, excluding journals
+            with zero similarity
+        """
+        scores = (self.matrix @ normalize(query_vector).T).toarray().ravel()
+        return self._top(scores, k)
+
+    def rank_batch(self, query_vectors, k=5):
+        """
+        Top-k journals for every row of a query matrix, with one matrix product.
+
+        Returns:
+            list: One (catalog rows, similarities) tuple per query
+        """
+        scores = (self.matrix @ normalize(query_vectors).T).toarray()
+        return [self._top(scores[:, j], k) for j in range(scores.shape[1])]
+
+    @staticmethod
+    def _top(scores, k):
+        """
+        Best k positions of a score vector, excluding zero scores.
+        """
+        k = min(k, len(scores))
+        if k == 0:
+            return np.zeros(0, dtype=np.int64), scores[:0]
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        top = top[scores[top] > 0]
+        return top, scores[top]
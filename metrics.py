@@ -0,0 +1,244 @@
+"""
+Minimal in-process metrics exposed in the Prometheus text format.
+
+Counters, gauges and fixed-bucket histograms keep one small list per label
+set behind a lock, so recording a value costs a bisect and a few additions
+and can stay enabled in production. Values are per process; with several
+gunicorn workers each one reports its own series.
+"""
+import bisect
+import threading
+
+# Latency buckets in seconds, from 0.1 ms to 10 s
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Candidate-set size buckets, in articles
+SIZE_BUCKETS = (10, 100, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """
+    Base class: a named family of series, one per combination of label values.
+    """
+    kind = None
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(labels.get(name, '') for name in self.labels)
+
+    def render(self):
+        """
+        Lines of this metric in the Prometheus text format.
+        """
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for key, value in series:
+            lines.extend(self._render_series(key, value))
+        return lines
+
+    def clear(self):
+        """
+        Drop every series (for label values that no longer apply).
+        """
+        with self._lock:
+            self._series.clear()
+
+    def _render_series(self, key, value):
+        return [f"{self.name}{_label_text(self.labels, key)} {_number(value)}"]
+
+
+class Counter(Metric):
+    """
+    Monotonically increasing count.
+    """
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def set(self, value, **labels):
+        """
+        Mirror a total counted elsewhere (e.g. by the result cache).
+        """
+        with self._lock:
+            self._series[self._key(labels)] = value
+
+
+class Gauge(Metric):
+    """
+    Value that can go up and down, set by the caller.
+    """
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._series[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values over fixed bucket upper bounds.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, description, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (last one is +Inf), then sum and count
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[position] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def _render_series(self, key, series):
+        lines, cumulative = [], 0
+        bounds = [_number(bound) for bound in self.buckets] + ['+Inf']
+        for bound, count in zip(bounds, series[:-2]):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{_label_text(self.labels, key, [('le', bound)])} {cumulative}")
+        lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {_number(series[-2])}")
+        lines.append(f"{self.name}_count{_label_text(self.labels, key)} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Set of metrics rendered together, plus collectors called at scrape time
+    to refresh gauges from state kept elsewhere (e.g. cache counters).
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, description, labels=()):
+        return self._add(Counter(name, description, labels))
+
+    def gauge(self, name, description, labels=()):
+        return self._add(Gauge(name, description, labels))
+
+    def histogram(self, name, description, labels=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, description, labels, buckets))
+
+    def render(self):
+        """
+        Full exposition text of every metric.
+        """
+        for collect in self.collectors:
+            collect()
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class ServiceMetrics(MetricsRegistry):
+    """
+    Metrics of the recommendation service.
+
+    Stage timings arrive in milliseconds, as returned under 'timings' by the
+    Recommender, and are recorded in seconds.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.requests = self.counter(
+            'http_requests_total', "HTTP requests handled", ('endpoint', 'method', 'status'))
+        self.latency = self.histogram(
+            'http_request_duration_seconds', "HTTP request latency", ('endpoint',))
+        self.errors = self.counter(
+            'recommender_errors_total', "Requests that failed with an error", ('endpoint',))
+        self.stages = self.histogram(
+            'recommender_stage_duration_seconds', "Time spent in each stage of a single request", ('stage',))
+        self.batch_stages = self.histogram(
+            'recommender_batch_stage_duration_seconds', "Time spent in each stage of a batch", ('stage',))
+        self.candidates = self.histogram(
+            'recommender_candidates', "Candidate articles scored per query", buckets=SIZE_BUCKETS)
+        self.cache_lookups = self.counter(
+            'recommender_result_cache_lookups_total', "Result cache lookups", ('result',))
+        self.cache_evictions = self.counter(
+            'recommender_result_cache_evictions_total', "Result cache evictions")
+        self.cache_size = self.gauge('recommender_result_cache_entries', "Entries in the result cache")
+        self.coalesced_batches = self.counter(
+            'recommender_coalesced_batches_total', "Micro-batches formed by the coalescer", ('size',))
+        self.startup = self.gauge('recommender_startup_seconds', "Time taken to start the application")
+        self.info = self.gauge('recommender_info', "Artifact and model versions being served",
+                               ('version', 'model_version'))
+        self.reloads = self.counter('recommender_model_reloads_total', "Model reloads", ('result',))
+
+    def observe_stages(self, timings, batch=False):
+        """
+        Record the stage timings (milliseconds) of a request or batch.
+        """
+        histogram = self.batch_stages if batch else self.stages
+        for stage, elapsed in timings.items():
+            histogram.observe(elapsed / 1000, stage=stage)
+
+    def observe_response(self, response):
+        """
+        Record the candidate-set size of a recommendation response.
+        """
+        if response.get('cluster_info'):
+            self.candidates.observe(response['cluster_info']['total_articles'])
+
+    def bind(self, get_recommender, coalescer=None, startup_seconds=None, reloader=None):
+        """
+        Refresh the cache, coalescer, reload and version series at every scrape.
+
+        get_recommender returns the engine currently served, which changes
+        when ingested articles are added or the model is reloaded.
+        """
+        def collect():
+            recommender = get_recommender()
+            if recommender.cache is not None:
+                stats = recommender.cache.stats()
+                self.cache_lookups.set(stats['hits'], result='hit')
+                self.cache_lookups.set(stats['misses'], result='miss')
+                self.cache_evictions.set(stats['evictions'])
+                self.cache_size.set(stats['size'])
+            if coalescer is not None:
+                for size, count in list(coalescer.batch_sizes.items()):
+                    self.coalesced_batches.set(count, size=size)
+            if startup_seconds is not None:
+                self.startup.set(startup_seconds)
+            if reloader is not None:
+                self.reloads.set(reloader.reloads, result='success')
+                self.reloads.set(reloader.failures, result='failure')
+            self.info.clear()
+            self.info.set(1, version=recommender.version, model_version=recommender.model_version or '')
+
+        self.collectors.append(collect)
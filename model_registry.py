@@ -0,0 +1,300 @@
+"""
+Versioned model registry and hot reload of the served artifacts.
+
+A registry is a directory holding one subdirectory per published version
+(tfidf.pkl, kmeans_model.pkl, Articles_clustered.csv and the snapshot and
+index built from them) and a CURRENT file naming the active version:
+
+    models/
+        CURRENT
+        20250101T120000/
+            manifest.json  tfidf.pkl  kmeans_model.pkl  Articles_clustered.csv
+            snapshot/  index/
+
+Versions are never modified once published; activating one only rewrites
+CURRENT, atomically. Apps started with MODEL_REGISTRY_PATH serve the active
+version and reload when CURRENT changes (or on POST /admin/reload).
+
+Usage:
+    python model_registry.py publish --tfidf tfidf.pkl --kmeans kmeans_model.pkl \
+        --articles Articles_clustered.csv
+    python model_registry.py activate 20250101T120000
+    python model_registry.py list
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+import joblib
+import pandas as pd
+
+from article_index import ArticleIndex
+from article_store import ArticleStore
+from artifacts import MANIFEST_FILE, source_fingerprint
+
+CURRENT_FILE = "CURRENT"
+ARTIFACT_FILES = {
+    'TOKENIZER_PATH': "tfidf.pkl",
+    'KMEANS_PATH': "kmeans_model.pkl",
+    'ARTICLES_PATH': "Articles_clustered.csv",
+}
+
+
+def list_versions(registry):
+    """
+    Published versions, oldest first.
+    """
+    if not os.path.isdir(registry):
+        return []
+    return sorted(
+        name for name in os.listdir(registry)
+        if os.path.exists(os.path.join(registry, name, MANIFEST_FILE))
+    )
+
+
+def current_version(registry):
+    """
+    Name of the active version, or None if none was activated.
+    """
+    try:
+        with open(os.path.join(registry, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def activate(registry, version):
+    """
+    Make a published version the active one.
+
+    Raises:
+        ValueError: If the version was not published
+    """
+    if version not in list_versions(registry):
+        raise ValueError(f"Unknown model version '{version}' in '{registry}'")
+    tmp_path = os.path.join(registry, CURRENT_FILE + '.tmp')
+    with open(tmp_path, 'w') as f:
+        f.write(version + '\n')
+    os.replace(tmp_path, os.path.join(registry, CURRENT_FILE))
+
+
+def publish(registry, tfidf_path, kmeans_path, articles_path, version=None, make_active=True, article_index=None):
+    """
+    Copy a trained model and its dataset into a new version, with the
+    snapshot and index the app needs to start from it.
+
+    Args:
+        registry (str): Registry directory
+        tfidf_path (str): Fitted TF-IDF vectorizer
+        kmeans_path (str): Fitted clustering model
+        articles_path (str): Articles labelled by that model
+        version (str): Version name, the current UTC time if None
+        make_active (bool): Serve the new version once published
+        article_index (ArticleIndex): Index of these articles, built if None
+
+    Returns:
+        str: Name of the published version
+    """
+    version = version or time.strftime('%Y%m%dT%H%M%S', time.gmtime())
+    path = os.path.join(registry, version)
+    if os.path.exists(path):
+        raise ValueError(f"Model version '{version}' already exists in '{registry}'")
+    tmp_path = os.path.join(registry, f".{version}")
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+
+    sources = dict(zip(ARTIFACT_FILES, (tfidf_path, kmeans_path, articles_path)))
+    for name, file_name in ARTIFACT_FILES.items():
+        shutil.copy2(sources[name], os.path.join(tmp_path, file_name))
+    paths = {name: os.path.join(tmp_path, file_name) for name, file_name in ARTIFACT_FILES.items()}
+
+    store = ArticleStore.from_dataframe(pd.read_csv(paths['ARTICLES_PATH']))
+    store.save(os.path.join(tmp_path, 'snapshot'), sources=[paths['ARTICLES_PATH']])
+    if article_index is None and store.has('combined'):
+        article_index = ArticleIndex.build(store, joblib.load(paths['TOKENIZER_PATH']))
+    if article_index is not None:
+        article_index.save(os.path.join(tmp_path, 'index'), sources=list(paths.values()))
+
+    with open(os.path.join(tmp_path, MANIFEST_FILE), 'w') as f:
+        json.dump({
+            'version': version,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'n_articles': len(store),
+            'sources': {name: os.path.abspath(source) for name, source in sources.items()},
+        }, f, indent=2)
+    os.rename(tmp_path, path)
+    if make_active:
+        activate(registry, version)
+    return version
+
+
+def resolve_model_config(config):
+    """
+    Settings pointing at the artifacts to serve, and their model version.
+
+    With a registry, the artifact paths of the active version replace the
+    configured ones and the version is its name. Otherwise the configured
+    paths are kept and the version is a hash of the model files followed by
+    '+' and a hash of the articles file, so that a model retrained in place
+    or a compaction (see ingest.py) is also detected. In both cases the part
+    before any '+' names the model itself.
+
+    Returns:
+        tuple: (config, model version)
+    """
+    registry = config.get('MODEL_REGISTRY_PATH')
+    version = current_version(registry) if registry else None
+    if version is None:
+        digests = []
+        for paths in ([config['TOKENIZER_PATH'], config['KMEANS_PATH']], [config['ARTICLES_PATH']]):
+            fingerprint = source_fingerprint([path for path in paths if os.path.exists(path)])
+            digests.append(hashlib.sha1(json.dumps(fingerprint, sort_keys=True).encode('utf-8')).hexdigest()[:12])
+        return dict(config), '+'.join(digests)
+
+    path = os.path.join(registry, version)
+    resolved = dict(config)
+    for name, file_name in ARTIFACT_FILES.items():
+        resolved[name] = os.path.join(path, file_name)
+    resolved['SNAPSHOT_PATH'] = os.path.join(path, 'snapshot')
+    resolved['INDEX_PATH'] = os.path.join(path, 'index')
+    return resolved, version
+
+
+class Reloader:
+    """
+    Loads a new engine in the background when the served model changes.
+
+    Attributes:
+        load (callable): Builds the new engine (runs in a background thread)
+        served_version (callable): Model version currently served
+        target_version (callable): Model version that should be served
+        interval (float): Seconds between two checks, 0 to only reload on request
+        reloads (int): Completed reloads
+        failures (int): Reloads that raised an error
+        last_error (str): Error of the last failed reload, if any
+    """
+
+    def __init__(self, load, served_version, target_version, interval=10.0):
+        self.load = load
+        self.served_version = served_version
+        self.target_version = target_version
+        self.interval = interval
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_reload = None
+        self.running = False
+        self._failed_version = None
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def ensure_started(self):
+        """
+        Start the checking thread in this process (threads do not survive a fork).
+        """
+        if self.interval > 0 and self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    threading.Thread(target=self._watch, name='model-reloader', daemon=True).start()
+                    self._pid = os.getpid()
+
+    def request(self):
+        """
+        Start a reload in the background.
+
+        Returns:
+            bool: False if a reload is already running
+        """
+        with self._lock:
+            if self.running:
+                return False
+            self.running = True
+        threading.Thread(target=self._reload, name='model-reload', daemon=True).start()
+        return True
+
+    def _reload(self):
+        started = time.perf_counter()
+        target = self.target_version()
+        try:
+            self.load()
+            self.reloads += 1
+            self.last_error = None
+            self._failed_version = None
+            self.last_reload = {
+                'version': self.served_version(),
+                'at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'seconds': round(time.perf_counter() - started, 3),
+            }
+            print(f"Reloaded model version {self.served_version()} in {self.last_reload['seconds']}s")
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            # Not retried by the checking thread until the version changes again
+            self._failed_version = target
+            print(f"Model reload failed: {e}")
+        finally:
+            self.running = False
+
+    def _watch(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                target = self.target_version()
+                if not self.running and target not in (self.served_version(), self._failed_version):
+                    self.request()
+            except Exception as e:
+                print(f"Could not check the model version: {e}")
+
+    def stats(self):
+        """
+        Reload counters, for the status endpoint.
+        """
+        return {
+            'running': self.running,
+            'reloads': self.reloads,
+            'failures': self.failures,
+            'last_reload': self.last_reload,
+            'last_error': self.last_error,
+        }
+
+
+def main():
+    """
+    Command-line entry point managing the model registry.
+    """
+    parser = argparse.ArgumentParser(description="Publish and activate model versions.")
+    parser.add_argument('--registry', default=os.environ.get("MODEL_REGISTRY_PATH") or "models")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    publish_parser = subparsers.add_parser('publish', help="Copy trained artifacts into a new version")
+    publish_parser.add_argument('--tfidf', default="tfidf.pkl")
+    publish_parser.add_argument('--kmeans', default="kmeans_model.pkl")
+    publish_parser.add_argument('--articles', default="Articles_clustered.csv")
+    publish_parser.add_argument('--name', default=None, help="Version name (default: UTC timestamp)")
+    publish_parser.add_argument('--no-activate', action='store_true', help="Publish without serving it")
+    activate_parser = subparsers.add_parser('activate', help="Serve a published version")
+    activate_parser.add_argument('version')
+    subparsers.add_parser('list', help="List the published versions")
+    args = parser.parse_args()
+
+    if args.command == 'publish':
+        start = time.perf_counter()
+        version = publish(args.registry, args.tfidf, args.kmeans, args.articles, args.name,
+                          make_active=not args.no_activate)
+        state = "active" if not args.no_activate else "not activated"
+        print(f"Published model version '{version}' ({state}) in {time.perf_counter() - start:.2f}s")
+    elif args.command == 'activate':
+        activate(args.registry, args.version)
+        print(f"Activated model version '{args.version}'")
+    else:
+        active = current_version(args.registry)
+        for version in list_versions(args.registry):
+            print(f"{'*' if version == active else ' '} {version}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Choice of the number of clusters.
+
+Every candidate k is fitted in its own process, and the silhouette score is
+computed on a sample stratified by cluster instead of the whole corpus
+(exact silhouette is quadratic in the number of articles). MiniBatchKMeans
+can replace KMeans for large corpora.
+
+Usage:
+    python model_selection.py --articles Articles_clustered.csv --k-min 2 --k-max 20 \
+        --algorithm minibatch --sample-size 10000 --report k_selection.csv
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+from threadpoolctl import threadpool_limits
+
+ALGORITHMS = ('kmeans', 'minibatch')
+SILHOUETTE_SAMPLE_SIZE = 10000
+MINIBATCH_SIZE = 4096
+RANDOM_STATE = 42
+REPORT_FIELDS = ('k', 'inertia', 'silhouette', 'fit_seconds', 'silhouette_seconds')
+
+_matrix = None
+
+
+def make_kmeans(k, algorithm='kmeans', random_state=RANDOM_STATE):
+    """
+    Unfitted clustering model for k clusters.
+
+    Raises:
+        ValueError: If the algorithm name is unknown
+    """
+    if algorithm == 'kmeans':
+        return KMeans(n_clusters=k, init='k-means++', random_state=random_state)
+    if algorithm == 'minibatch':
+        return MiniBatchKMeans(n_clusters=k, init='k-means++', batch_size=MINIBATCH_SIZE,
+                               random_state=random_state)
+    raise ValueError(f"Unknown algorithm '{algorithm}', expected one of {ALGORITHMS}")
+
+
+def stratified_sample(labels, size, random_state=RANDOM_STATE):
+    """
+    Indices of about `size` rows drawn from every cluster in proportion to
+    its size (at least two per cluster, so each one has a silhouette).
+
+    Returns:
+        ndarray: Sorted row indices, or all rows if there are at most `size`
+    """
+    labels = np.asarray(labels)
+    if len(labels) <= size:
+        return np.arange(len(labels))
+    rng = np.random.default_rng(random_state)
+    indices = []
+    for label in np.unique(labels):
+        members = np.flatnonzero(labels == label)
+        count = min(len(members), max(2, int(round(size * len(members) / len(labels)))))
+        indices.append(rng.choice(members, count, replace=False))
+    return np.sort(np.concatenate(indices))
+
+
+def evaluate_k(X, k, algorithm='kmeans', sample_size=SILHOUETTE_SAMPLE_SIZE, random_state=RANDOM_STATE):
+    """
+    Fit a model for k clusters and score it.
+
+    Returns:
+        dict: k, inertia, silhouette (on a stratified sample) and timings
+    """
+    start = time.perf_counter()
+    model = make_kmeans(k, algorithm, random_state).fit(X)
+    fitted = time.perf_counter()
+    sample = stratified_sample(model.labels_, sample_size, random_state)
+    silhouette = silhouette_score(X[sample], model.labels_[sample])
+    return {
+        'k': k,
+        'inertia': float(model.inertia_),
+        'silhouette': float(silhouette),
+        'fit_seconds': round(fitted - start, 3),
+        'silhouette_seconds': round(time.perf_counter() - fitted, 3),
+    }
+
+
+def _init_worker(X, threads):
+    global _matrix
+    _matrix = X
+    # Keep processes x BLAS/OpenMP threads within the available cores
+    threadpool_limits(threads)
+
+
+def _evaluate(k, algorithm, sample_size, random_state):
+    return evaluate_k(_matrix, k, algorithm, sample_size, random_state)
+
+
+def select_k(X, k_values, algorithm='kmeans', sample_size=SILHOUETTE_SAMPLE_SIZE, workers=None,
+             random_state=RANDOM_STATE):
+    """
+    Evaluate every k, in parallel across processes.
+
+    The matrix is sent once to each worker rather than once per k.
+
+    Args:
+        X (sparse matrix): TF-IDF vectors of the articles
+        k_values (list): Numbers of clusters to evaluate
+        algorithm (str): 'kmeans' or 'minibatch'
+        sample_size (int): Rows used for the silhouette score
+        workers (int): Number of processes, all cores if None
+        random_state (int): Seed of the fits and of the sample
+
+    Returns:
+        list: One evaluate_k result per k, in the order of k_values
+    """
+    k_values = list(k_values)
+    cores = os.cpu_count() or 1
+    workers = min(workers or cores, len(k_values))
+    report = []
+
+    def record(row):
+        report.append(row)
+        print(f"k={row['k']}: inertia={row['inertia']:.2f} silhouette={row['silhouette']:.4f} "
+              f"({row['fit_seconds']}s fit, {row['silhouette_seconds']}s silhouette)")
+
+    if workers <= 1:
+        for k in k_values:
+            record(evaluate_k(X, k, algorithm, sample_size, random_state))
+        return report
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(X, max(cores // workers, 1))) as executor:
+        futures = [executor.submit(_evaluate, k, algorithm, sample_size, random_state) for k in k_values]
+        for future in futures:
+            record(future.result())
+    return report
+
+
+def best_k(report):
+    """
+    k with the highest silhouette score.
+    """
+    return max(report, key=lambda row: row['silhouette'])['k']
+
+
+def write_report(report, path):
+    """
+    Write the per-k results as CSV if the path ends in .csv, JSON otherwise.
+    """
+    if path.endswith('.csv'):
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(report)
+    else:
+        with open(path, 'w') as f:
+            json.dump({'best_k': best_k(report), 'results': report}, f, indent=2)
+
+
+def main():
+    """
+    Command-line entry point for the k selection sweep.
+    """
+    parser = argparse.ArgumentParser(description="Evaluate numbers of clusters for the KMeans model.")
+    parser.add_argument('--articles', default="Articles_clustered.csv")
+    parser.add_argument('--column', default="combined", help="Column holding the cleaned text")
+    parser.add_argument('--vectorizer', default="tfidf.pkl")
+    parser.add_argument('--k-min', type=int, default=2)
+    parser.add_argument('--k-max', type=int, default=20, help="Largest k evaluated, excluded")
+    parser.add_argument('--algorithm', choices=ALGORITHMS, default='kmeans')
+    parser.add_argument('--sample-size', type=int, default=SILHOUETTE_SAMPLE_SIZE)
+    parser.add_argument('--workers', type=int, default=None, help="Processes (default: all cores)")
+    parser.add_argument('--report', default="k_selection.json", help="Output report (.json or .csv)")
+    args = parser.parse_args()
+
+    texts = pd.read_csv(args.articles, usecols=[args.column])[args.column].fillna('')
+    X = joblib.load(args.vectorizer).transform(texts)
+    start = time.perf_counter()
+    report = select_k(X, range(args.k_min, args.k_max), algorithm=args.algorithm,
+                      sample_size=args.sample_size, workers=args.workers)
+    write_report(report, args.report)
+    print(f"Evaluated {len(report)} values of k in {time.perf_counter() - start:.2f}s; "
+          f"best silhouette at k={best_k(report)}. Report written to '{args.report}'")
+
+
+if __name__ == "__main__":
+    main()
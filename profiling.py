@@ -0,0 +1,155 @@
+"""
+On-demand profiling of the running application.
+
+Two modes are available, both behind the admin token (see ADMIN_TOKEN):
+
+- per request: a request sent with an X-Profile header runs under cProfile;
+  the pstats dump and a text report are written to PROFILE_DIR
+- sampling: a background thread records the stack of every request thread
+  every few milliseconds for a number of seconds, and writes the counts as
+  collapsed stacks ("frame;frame;frame count"), the input format of
+  flamegraph.pl and speedscope
+
+The text report of a profiled request lists the hot paths of the query
+pipeline first: text cleaning, the vectorizer transform and journal lookups.
+"""
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+# pstats restrictions (regular expressions on "file:line(function)")
+FOCUS_FUNCTIONS = {
+    'clean_text': r'data_preprocessing\.py:\d+\(__call__\)',
+    'transform': r'\(transform\)',
+    'journal_details': r'\((journal_details|lookup)\)',
+}
+REPORT_LINES = 30
+
+
+def profile_name(label):
+    """
+    File name stem of a profile: UTC timestamp plus a sanitized label.
+    """
+    safe = ''.join(char if char.isalnum() else '_' for char in label).strip('_') or 'profile'
+    return f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{os.getpid()}-{safe}"
+
+
+def write_report(profiler, path):
+    """
+    Text summary of a cProfile run: the focus functions, then the overall
+    top functions by cumulative time.
+    """
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream).sort_stats('cumulative')
+    for name, pattern in FOCUS_FUNCTIONS.items():
+        stream.write(f"==== {name} ====\n")
+        stats.print_stats(pattern)
+    stream.write("==== top functions ====\n")
+    stats.print_stats(REPORT_LINES)
+    with open(path, 'w') as f:
+        f.write(stream.getvalue())
+
+
+def dump_profile(profiler, directory, label):
+    """
+    Write a finished cProfile run as <name>.prof (load with pstats or
+    snakeviz) and a text report <name>.txt.
+
+    Returns:
+        str: Path of the .prof file
+    """
+    os.makedirs(directory, exist_ok=True)
+    stem = os.path.join(directory, profile_name(label))
+    profiler.dump_stats(f"{stem}.prof")
+    write_report(profiler, f"{stem}.txt")
+    return f"{stem}.prof"
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler sampling the stacks of all other threads.
+
+    Attributes:
+        interval (float): Seconds between samples
+        samples (Counter): Collapsed stack -> number of samples
+        running (bool): Whether a sampling run is in progress
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = Counter()
+        self.running = False
+        self._lock = threading.Lock()
+
+    def sample(self):
+        """
+        Record the current stack of every thread but the sampler's own.
+        """
+        current = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == current:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame))
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def run(self, seconds):
+        """
+        Sample for a number of seconds in the calling thread.
+
+        Returns:
+            int: Number of sampling rounds
+        """
+        rounds = 0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            self.sample()
+            rounds += 1
+            time.sleep(self.interval)
+        return rounds
+
+    def write_collapsed(self, path):
+        """
+        Write the samples as collapsed stacks, one "stack count" per line.
+        """
+        with open(path, 'w') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def start(self, seconds, directory, label='sampling'):
+        """
+        Sample in a background thread, then write the collapsed stacks.
+
+        Returns:
+            str: Path the collapsed stacks will be written to, or None if a
+            run is already in progress
+        """
+        with self._lock:
+            if self.running:
+                return None
+            self.running = True
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{profile_name(label)}.collapsed")
+
+        def sample_and_write():
+            try:
+                self.samples = Counter()
+                rounds = self.run(seconds)
+                self.write_collapsed(path)
+                print(f"Wrote {rounds} stack samples to '{path}'")
+            finally:
+                self.running = False
+
+        threading.Thread(target=sample_and_write, name='sampling-profiler', daemon=True).start()
+        return path
@@ -0,0 +1,553 @@
+"""
+Recommendation engine behind the web application.
+
+All dataset and model state lives in one Recommender object built by
+Recommender.load(). The Flask app factory in app.py creates it once; when
+gunicorn preloads the app, it is built in the master process and inherited
+by the forked workers. Everything a request reads is held in NumPy arrays
+(or memory-mapped files), so serving does not write to the shared pages.
+"""
+import copy
+import hashlib
+import json
+import os
+import time
+
+import joblib
+import nltk
+import numpy as np
+import pandas as pd
+
+from article_batches import load_batches, merge_batches
+from article_index import ArticleIndex
+from article_store import ArticleStore
+from artifacts import source_fingerprint
+from data_preprocessing import TextNormalizer
+from dataset_stats import DatasetStats
+from journal_catalog import JournalCatalog
+from journal_ranker import JournalRanker
+from model_registry import resolve_model_config
+from result_builder import ResultBuilder
+from result_cache import cache_key, make_result_cache
+from retrievers import make_retriever
+
+DEFAULT_CONFIG = {
+    # Paths to required files
+    'TOKENIZER_PATH': "tfidf.pkl",
+    'KMEANS_PATH': "kmeans_model.pkl",
+    'ARTICLES_PATH': "Articles_clustered.csv",
+    'INDEX_PATH': "index",
+    'SNAPSHOT_PATH': "snapshot",
+    'JOURNAL_INFO_PATH': "journal_info.csv",
+    # Retrieval backend: 'cluster' (nearest KMeans clusters), 'exact' or 'lsh'
+    'RETRIEVER_BACKEND': os.environ.get("RETRIEVER_BACKEND", "cluster"),
+    'CLUSTER_PROBES': int(os.environ.get("CLUSTER_PROBES", "1")),
+    # Response cache: 'memory' (per process), 'sqlite' (shared file) or 'none'
+    'RESULT_CACHE': os.environ.get("RESULT_CACHE", "memory"),
+    'RESULT_CACHE_PATH': os.environ.get("RESULT_CACHE_PATH", "result_cache.sqlite"),
+    'RESULT_CACHE_SIZE': int(os.environ.get("RESULT_CACHE_SIZE", "1024")),
+    'RESULT_CACHE_TTL': int(os.environ.get("RESULT_CACHE_TTL", "3600")),
+    # Micro-batching of concurrent single requests (0 disables it)
+    'COALESCE_WINDOW_MS': float(os.environ.get("COALESCE_WINDOW_MS", "0")),
+    'COALESCE_MAX_BATCH': int(os.environ.get("COALESCE_MAX_BATCH", "32")),
+    # Send per-stage timings in an X-Timing header on every response
+    # (clients can also ask for it by sending an X-Timing request header)
+    'TIMING_HEADER': os.environ.get("TIMING_HEADER", "0") == "1",
+    # Admin endpoints (profiling) are disabled unless a token is set
+    'ADMIN_TOKEN': os.environ.get("ADMIN_TOKEN", ""),
+    'PROFILE_DIR': os.environ.get("PROFILE_DIR", "profiles"),
+    # Batches of new articles written by `python ingest.py add`, and how often
+    # a running app applies new ones live (0, the default, leaves them to
+    # `python ingest.py compact` and the reload that follows; applying them
+    # live copies the store and index into each worker's private memory)
+    'INGEST_PATH': os.environ.get("INGEST_PATH", "ingested"),
+    'INGEST_POLL_SECONDS': float(os.environ.get("INGEST_POLL_SECONDS", "0")),
+    # Versioned models published by `python model_registry.py publish` (the
+    # paths above are used when unset), and how often a running app checks
+    # for a new active version or changed model and article files. Checking
+    # runs a thread in every worker, so it is off (0) unless a registry is
+    # set; POST /admin/reload still reloads on request
+    'MODEL_REGISTRY_PATH': os.environ.get("MODEL_REGISTRY_PATH", ""),
+    'MODEL_POLL_SECONDS': float(os.environ.get(
+        "MODEL_POLL_SECONDS", "10" if os.environ.get("MODEL_REGISTRY_PATH") else "0"
+    )),
+}
+
+RECOMMENDATION_MODES = ('articles', 'journals')
+
+
+def shipped_sources(articles_paths):
+    """
+    The articles files to check a snapshot or index against. Deployments may
+    ship those artifacts without the CSV they were built from, which is then
+    not checked; the model files are always loaded, so always checked.
+    """
+    shipped = [path for path in articles_paths if os.path.exists(path)]
+    for path in articles_paths:
+        if path not in shipped:
+            print(f"'{path}' not found, using the prebuilt artifacts without checking them against it")
+    return shipped
+
+
+def load_article_store(config):
+    """
+    Open the article snapshot, or parse the CSV when the snapshot is missing
+    or was converted from another version of it.
+    """
+    articles_path, snapshot_path = config['ARTICLES_PATH'], config['SNAPSHOT_PATH']
+    try:
+        store = ArticleStore.load(snapshot_path)
+        if store.is_current(shipped_sources([articles_path])):
+            print(f"Opened article snapshot '{snapshot_path}'")
+            return store
+        print(f"Article snapshot in '{snapshot_path}' is stale, run `python article_store.py convert` to refresh it")
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Article snapshot not available ({e})")
+
+    print(f"Parsing {articles_path}...")
+    return ArticleStore.from_dataframe(pd.read_csv(articles_path))
+
+
+def load_article_index(config, store, vectorizer):
+    """
+    Memory-map the prebuilt article index, or vectorize the corpus in memory
+    when the index is missing or was built from other input files.
+    """
+    if not store.has('combined'):
+        return None
+
+    index_path = config['INDEX_PATH']
+    try:
+        index = ArticleIndex.load(index_path)
+        sources = shipped_sources([config['ARTICLES_PATH']]) + [config['TOKENIZER_PATH'], config['KMEANS_PATH']]
+        if index.is_current(sources) and len(index) == len(store):
+            print(f"Memory-mapped article index from '{index_path}'")
+            return index
+        print(f"Article index in '{index_path}' is stale, run `python article_index.py build` to refresh it")
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Article index not available ({e})")
+
+    print("Vectorizing articles in memory...")
+    return ArticleIndex.build(store, vectorizer)
+
+
+def artifact_version(config, store, article_index, batches=()):
+    """
+    Short hash identifying the models, dataset, index and ingested batches
+    being served, and the retrieval settings. Cached results of another
+    version are discarded.
+    """
+    paths = [config[name] for name in ('TOKENIZER_PATH', 'KMEANS_PATH', 'ARTICLES_PATH')]
+    parts = {
+        'sources': source_fingerprint([path for path in paths if os.path.exists(path)]),
+        'snapshot': store.manifest.get('sources'),
+        'index': article_index.manifest.get('created_at') if article_index is not None else None,
+        'retriever': [config['RETRIEVER_BACKEND'], config['CLUSTER_PROBES']],
+    }
+    if batches:
+        parts['batches'] = list(batches)
+    return hashlib.sha1(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+
+def ensure_nltk_data():
+    """
+    Download required NLTK data (run once).
+    """
+    try:
+        nltk.data.find('tokenizers/punkt')
+        nltk.data.find('corpora/stopwords')
+        nltk.data.find('corpora/wordnet')
+    except LookupError:
+        nltk.download('punkt')
+        nltk.download('stopwords')
+        nltk.download('wordnet')
+
+
+class Recommender:
+    """
+    Dataset, models and indexes needed to answer recommendation queries.
+
+    Attributes:
+        store (ArticleStore): Articles dataset
+        vectorizer (TfidfVectorizer): Fitted TF-IDF vectorizer
+        kmeans_model (KMeans): Fitted clustering model
+        article_index (ArticleIndex): Article vectors, or None without texts
+        retriever (Retriever): Candidate retrieval backend, or None
+        clean_text (TextNormalizer): Query text cleaning
+        catalog (JournalCatalog): Journal metadata and metrics
+        journal_ranker (JournalRanker): Journal centroids for 'journals' mode
+        result_builder (ResultBuilder): Response payload builder
+        stats (DatasetStats): Aggregates for the home and statistics pages
+        startup_timings (dict): Milliseconds spent in each loading stage
+        version (str): Artifact version, see artifact_version()
+        model_version (str): Registry version (or model files hash) being served
+        cache (ResultCache): Cache of responses, or None
+        config (dict): Settings the engine was loaded with, with the
+            artifact paths of the model version
+        batches (list): Names of the ingested batches being served
+    """
+
+    def __init__(self, store, vectorizer, kmeans_model, article_index, retriever, clean_text,
+                 catalog, journal_ranker, result_builder, stats, startup_timings=None, version=None, cache=None,
+                 config=None, batches=None, model_version=None):
+        self.store = store
+        self.vectorizer = vectorizer
+        self.kmeans_model = kmeans_model
+        self.article_index = article_index
+        self.retriever = retriever
+        self.clean_text = clean_text
+        self.catalog = catalog
+        self.journal_ranker = journal_ranker
+        self.result_builder = result_builder
+        self.stats = stats
+        self.startup_timings = startup_timings or {}
+        self.version = version
+        self.cache = cache
+        self.config = config or dict(DEFAULT_CONFIG)
+        self.batches = batches or []
+        self.model_version = model_version
+
+    @classmethod
+    def load(cls, config=None):
+        """
+        Load the dataset and models and build the derived structures.
+
+        Args:
+            config (Mapping): Settings overriding DEFAULT_CONFIG
+
+        Returns:
+            Recommender: Engine ready to serve queries
+        """
+        config, model_version = resolve_model_config({**DEFAULT_CONFIG, **(config or {})})
+        startup_timings = {}
+        stage_started = time.perf_counter()
+
+        def end_startup_stage(name):
+            nonlocal stage_started
+            now = time.perf_counter()
+            startup_timings[name] = round((now - stage_started) * 1000, 3)
+            stage_started = now
+
+        print(f"Loading datasets and models (model version {model_version})...")
+        # Typed columns (float64 numbers, journal codes, text buffers) replace the DataFrame
+        store = load_article_store(config)
+        end_startup_stage('articles')
+        vectorizer = joblib.load(config['TOKENIZER_PATH'])
+        kmeans_model = joblib.load(config['KMEANS_PATH'])
+        end_startup_stage('models')
+        ensure_nltk_data()
+        end_startup_stage('nltk')
+        print(f"Loaded {len(store)} articles with {len(np.unique(store.clusters))} clusters")
+
+        # Vectorize the whole corpus once; queries are scored against cluster slices
+        article_index = load_article_index(config, store, vectorizer)
+        end_startup_stage('index')
+
+        # Articles ingested since the snapshot and index were built
+        batches = load_batches(config['INGEST_PATH'])
+        store, article_index = merge_batches(store, article_index, batches, vectorizer, kmeans_model, model_version)
+        if batches:
+            print(f"Added {sum(len(batch.store) for batch in batches)} articles from {len(batches)} ingested batches")
+        end_startup_stage('ingested')
+
+        return cls.assemble(config, store, vectorizer, kmeans_model, article_index,
+                            [batch.name for batch in batches], end_startup_stage, startup_timings,
+                            model_version=model_version)
+
+    @classmethod
+    def assemble(cls, config, store, vectorizer, kmeans_model, article_index, batches=(), end_stage=None,
+                 startup_timings=None, clean_text=None, stats=None, cache=None, model_version=None):
+        """
+        Build the structures derived from the articles and models.
+
+        Args:
+            config (Mapping): Complete settings
+            store (ArticleStore): Articles dataset
+            vectorizer (TfidfVectorizer): Fitted TF-IDF vectorizer
+            kmeans_model (KMeans): Fitted clustering model
+            article_index (ArticleIndex): Article vectors, or None without texts
+            batches (list): Names of the ingested batches included in the store
+            end_stage (callable): Called with the name of each finished stage
+            startup_timings (dict): Stage timings recorded by end_stage
+            clean_text (TextNormalizer): Reused instead of building a new one
+            stats (DatasetStats): Up-to-date aggregates, computed if None
+            cache (ResultCache): Reused result cache, created from config if None
+            model_version (str): Registry version (or model files hash) of the models
+
+        Returns:
+            Recommender: Engine ready to serve queries
+        """
+        end_stage = end_stage or (lambda name: None)
+        backend = config['RETRIEVER_BACKEND']
+        retriever = None
+        if article_index is not None:
+            options = {'n_probe': config['CLUSTER_PROBES']} if backend == 'cluster' else {}
+            retriever = make_retriever(backend, article_index, kmeans_model, **options)
+        print(f"Using '{backend}' retrieval backend")
+
+        # Text cleaning with a frozen stopword set, a regex tokenizer and cached lemmas
+        clean_text = clean_text or TextNormalizer()
+
+        # Journal catalog: journal_info.csv joined with per-journal article metrics
+        journal_info_path = config['JOURNAL_INFO_PATH']
+        journal_info = pd.read_csv(journal_info_path) if os.path.exists(journal_info_path) else None
+        catalog = JournalCatalog.build(store, journal_info)
+        end_stage('catalog')
+        print(f"Journal catalog holds {len(catalog)} journals")
+
+        # Typed response columns (int64 citations and years) extracted once
+        result_builder = ResultBuilder(store, catalog)
+        end_stage('results')
+
+        # Journal centroids (articles + thematic scope) for journal-level ranking
+        journal_ranker = JournalRanker.build(catalog, article_index, vectorizer, clean_text)
+        end_stage('journal_ranker')
+
+        # Page statistics, updated incrementally when articles change
+        stats = stats or DatasetStats.build(store)
+        end_stage('stats')
+
+        version = artifact_version(config, store, article_index, batches)
+        if cache is None:
+            cache = make_result_cache(
+                config['RESULT_CACHE'], path=config['RESULT_CACHE_PATH'],
+                max_size=config['RESULT_CACHE_SIZE'], ttl=config['RESULT_CACHE_TTL'], version=version
+            )
+        if cache is not None:
+            cache.set_version(version)
+        end_stage('result_cache')
+        print(f"Serving artifact version {version}")
+
+        return cls(store, vectorizer, kmeans_model, article_index, retriever, clean_text,
+                   catalog, journal_ranker, result_builder, stats, startup_timings, version, cache,
+                   config, list(batches), model_version)
+
+    def add_batches(self, batches):
+        """
+        New engine serving the articles of ingested batches as well.
+
+        The new articles are appended to the store and index without
+        re-vectorizing the existing ones, and the page statistics are updated
+        incrementally. This engine is left untouched, so requests already
+        running on it finish on the previous data.
+
+        Args:
+            batches (list): Batch tuples, see article_batches.load_batches
+
+        Returns:
+            Recommender: Engine over the existing and the new articles
+        """
+        n_existing = len(self.store)
+        store, article_index = merge_batches(self.store, self.article_index, batches,
+                                             self.vectorizer, self.kmeans_model, self.model_version)
+
+        stats = copy.deepcopy(self.stats)
+        citations = store.numbers.get('citations')
+        stats.add(store.clusters[n_existing:], store.journal_codes[n_existing:],
+                  citations[n_existing:] if citations is not None else None, store.journal_names)
+
+        print(f"Adding {len(store) - n_existing} articles from {len(batches)} ingested batches")
+        return self.assemble(self.config, store, self.vectorizer, self.kmeans_model, article_index,
+                             self.batches + [batch.name for batch in batches], startup_timings=self.startup_timings,
+                             clean_text=self.clean_text, stats=stats, cache=self.cache,
+                             model_version=self.model_version)
+
+    def journal_details(self, journal_name):
+        """
+        Get comprehensive journal information including metrics and scope.
+        """
+        return self.catalog.lookup(journal_name)
+
+    def rank_journals(self, text_vector, count=5):
+        """
+        Rank journals directly by similarity between the query and journal centroids.
+        """
+        rows, scores = self.journal_ranker.rank(text_vector, k=count)
+        return self.journal_profiles(rows, scores)
+
+    def journal_profiles(self, rows, scores):
+        """
+        Journal recommendations for catalog rows ranked by the journal ranker.
+        """
+        journal_recommendations = []
+        for row, score in zip(rows, scores):
+            journal_details = self.catalog.profile(row)
+            journal_details['similarity'] = round(float(score) * 100, 2)
+            if journal_details['total_articles']:
+                journal_details['recommended_based_on'] = f"Journal profile ({journal_details['total_articles']} indexed articles)"
+            else:
+                journal_details['recommended_based_on'] = "Journal thematic scope"
+            journal_recommendations.append(journal_details)
+        return journal_recommendations
+
+    def recommend(self, title, abstract, keywords, k=10, mode='articles', n_probe=None):
+        """
+        Get comprehensive recommendations including detailed journal information.
+
+        In 'articles' mode journals are taken from the most similar articles; in
+        'journals' mode they are ranked directly against journal centroids.
+        n_probe overrides the number of KMeans clusters searched for this request.
+        The time spent in each stage is returned in milliseconds under 'timings'.
+        Responses are cached by cleaned text, k, mode and n_probe.
+        """
+        timings = {}
+        stage_start = time.perf_counter()
+
+        def end_stage(name):
+            nonlocal stage_start
+            now = time.perf_counter()
+            timings[name] = round((now - stage_start) * 1000, 3)
+            stage_start = now
+
+        # Combine and clean input text
+        input_text = f"{title} {abstract} {keywords}"
+        cleaned_text = self.clean_text(input_text)
+        end_stage('clean_text')
+
+        if not cleaned_text:
+            return {'journals': [], 'articles': [], 'cluster_info': None, 'timings': timings}
+
+        # Resubmissions of the same text are served from the cache
+        key = cache_key(cleaned_text, k, mode, n_probe) if self.cache is not None else None
+        if key is not None:
+            cached = self.cache.get(key, self.version)
+            end_stage('cache')
+            if cached is not None:
+                cached['timings'] = timings
+                return cached
+
+        # Transform to TF-IDF vector
+        text_vector = self.vectorizer.transform([cleaned_text])
+        end_stage('transform')
+
+        # Distances to the centroids, computed once: the nearest is the
+        # predicted cluster, and the cluster backend probes them in order
+        distances = self.kmeans_model.transform(text_vector)
+        predicted_cluster = int(np.argmin(distances[0]))
+        end_stage('predict')
+
+        if self.retriever is None:
+            return {'journals': [], 'articles': [], 'cluster_info': None, 'timings': timings}
+
+        # Top-k articles among the candidates chosen by the retrieval backend
+        result = self.retriever.search(text_vector, k=k, n_probe=n_probe, distances=distances)
+        end_stage('search')
+        for stage, elapsed in result.timings.items():
+            timings[f'search.{stage}'] = round(elapsed, 3)
+
+        if result.n_candidates == 0:
+            return {'journals': [], 'articles': [], 'cluster_info': None, 'timings': timings}
+
+        # Rank journals against their centroids instead of the top articles
+        ranked_journals = self.rank_journals(text_vector, count=5) if mode == 'journals' else None
+        response = self.build_response(result, predicted_cluster, k, ranked_journals)
+        if key is not None:
+            self.cache.put(key, response, self.version)
+        end_stage('build_response')
+        response['timings'] = timings
+        return response
+
+    def recommend_batch(self, items, k=10, mode='articles', n_probe=None):
+        """
+        Recommendations for many manuscripts at once.
+
+        The cleaned texts are vectorized with one transform call, their
+        distances to the centroids (predicted and probed clusters) computed
+        with one more, and the candidates scored with sparse matrix-matrix
+        products shared by the whole batch.
+
+        Args:
+            items (list): Dicts with optional 'title', 'abstract' and 'keywords'
+            k (int): Number of articles per item
+            mode (str): 'articles' or 'journals', as in recommend()
+            n_probe (int): Number of KMeans clusters searched per item
+
+        Returns:
+            tuple: (one response dict per item, in order, without timings;
+            milliseconds spent in each stage for the whole batch)
+        """
+        timings = {}
+        stage_start = time.perf_counter()
+
+        def end_stage(name):
+            nonlocal stage_start
+            now = time.perf_counter()
+            timings[name] = round((now - stage_start) * 1000, 3)
+            stage_start = now
+
+        responses = [{'journals': [], 'articles': [], 'cluster_info': None} for _ in items]
+        cleaned = [
+            self.clean_text(f"{item.get('title', '')} {item.get('abstract', '')} {item.get('keywords', '')}")
+            for item in items
+        ]
+        positions = [i for i, text in enumerate(cleaned) if text]
+        end_stage('clean_text')
+
+        keys = {}
+        if self.cache is not None:
+            keys = {i: cache_key(cleaned[i], k, mode, n_probe) for i in positions}
+            misses = []
+            for i in positions:
+                cached = self.cache.get(keys[i], self.version)
+                if cached is not None:
+                    responses[i] = cached
+                else:
+                    misses.append(i)
+            positions = misses
+            end_stage('cache')
+        if not positions:
+            return responses, timings
+
+        text_vectors = self.vectorizer.transform([cleaned[i] for i in positions])
+        end_stage('transform')
+        distances = self.kmeans_model.transform(text_vectors)
+        predicted_clusters = np.argmin(distances, axis=1)
+        end_stage('predict')
+        if self.retriever is None:
+            return responses, timings
+
+        results = self.retriever.search_batch(text_vectors, k=k, n_probe=n_probe, distances=distances)
+        ranked = self.journal_ranker.rank_batch(text_vectors, k=5) if mode == 'journals' else None
+        end_stage('search')
+
+        for j, position in enumerate(positions):
+            ranked_journals = self.journal_profiles(*ranked[j]) if ranked is not None else None
+            responses[position] = self.build_response(results[j], predicted_clusters[j], k, ranked_journals)
+            if keys:
+                self.cache.put(keys[position], responses[position], self.version)
+        end_stage('build_response')
+        return responses, timings
+
+    def build_response(self, result, predicted_cluster, k, ranked_journals=None):
+        """
+        Response dict (journals, articles, cluster_info) for a search result.
+
+        Journals are ranked_journals when given ('journals' mode), otherwise
+        the distinct journals of the top articles.
+        """
+        if result.n_candidates == 0:
+            return {'journals': [], 'articles': [], 'cluster_info': None}
+
+        if ranked_journals is not None:
+            journal_recommendations = ranked_journals
+        else:
+            # Extract unique journals with their best similarity scores
+            journal_recommendations = self.result_builder.journals(result.rows, result.similarities, count=5)
+
+        # Prepare article recommendations
+        article_recommendations = self.result_builder.articles(result.rows, result.similarities)
+
+        # Cluster information
+        cluster_info = {
+            'cluster_id': int(predicted_cluster),
+            'total_articles': result.n_candidates,
+            'top_similarity': round(float(result.similarities[0]) * 100, 2) if len(result.similarities) else 0.0,
+            'avg_similarity': round(result.mean_similarity * 100, 2),
+            'clusters_searched': [int(cluster) for cluster in result.clusters] if result.clusters else None
+        }
+
+        return {
+            'journals': journal_recommendations[:5],  # Top 5 journals
+            'articles': article_recommendations[:k],
+            'cluster_info': cluster_info
+        }
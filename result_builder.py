@@ -0,0 +1,94 @@
+"""
+Build recommendation payloads from the typed article store.
+
+Citations and publication years are converted to int64 once at startup, so
+that a request only indexes NumPy arrays for its top-k rows instead of
+iterating over DataFrame rows and converting values with pd.to_numeric.
+Text fields are kept as StringColumn buffers and only the top-k rows are
+decoded per request.
+"""
+import numpy as np
+
+MISSING_YEAR = -1
+ABSTRACT_PREVIEW_LENGTH = 200
+BASED_ON_LENGTH = 100
+TEXT_FIELDS = ('title', 'authors', 'doi', 'abstract')
+
+
+def _int_array(store, field, missing):
+    """
+    int64 copy of a numeric store field, with `missing` where it is NaN.
+    """
+    numbers = store.numbers.get(field)
+    if numbers is None:
+        return np.full(len(store), missing, dtype=np.int64)
+    return np.where(np.isnan(numbers), missing, numbers).astype(np.int64)
+
+
+class ResultBuilder:
+    """
+    Turns (article rows, similarities) into the response payload.
+
+    Attributes:
+        store (ArticleStore): Articles dataset
+        catalog (JournalCatalog): Journal catalog with article_rows mapping
+        citations (ndarray): int64 citation counts, 0 when missing
+        years (ndarray): int64 publication years, MISSING_YEAR when missing
+        text (dict): Response field -> StringColumn
+    """
+
+    def __init__(self, store, catalog):
+        self.store = store
+        self.catalog = catalog
+        self.citations = _int_array(store, 'citations', 0)
+        self.years = _int_array(store, 'year', MISSING_YEAR)
+        self.text = {field: store.string_column(field) for field in TEXT_FIELDS}
+
+    def articles(self, rows, similarities):
+        """
+        Article recommendation dictionaries for the given rows, in order.
+        """
+        rows = np.asarray(rows)
+        titles, authors, dois, abstracts = (
+            [self.text[field][row] for row in rows] for field in TEXT_FIELDS
+        )
+        journals = [self.store.journal_name(row) for row in rows]
+        years = self.years[rows].tolist()
+        citations = self.citations[rows].tolist()
+        scores = np.round(np.asarray(similarities) * 100, 2).tolist()
+
+        return [
+            {
+                'title': titles[i] or 'N/A',
+                'authors': authors[i] or 'N/A',
+                'journal': journals[i] or 'N/A',
+                'year': years[i] if years[i] != MISSING_YEAR else 'N/A',
+                'citations': citations[i],
+                'doi': dois[i] or 'N/A',
+                'similarity': scores[i],
+                'abstract': abstracts[i][:ABSTRACT_PREVIEW_LENGTH] + '...' if abstracts[i] else 'N/A'
+            }
+            for i in range(len(rows))
+        ]
+
+    def journals(self, rows, similarities, count=5):
+        """
+        Distinct journals of the given articles, in order of their best article.
+
+        Each journal carries the similarity and title of its best-ranked article.
+        """
+        journal_rows = self.catalog.article_rows[np.asarray(rows)]
+        scores = np.round(np.asarray(similarities) * 100, 2).tolist()
+
+        recommendations, seen = [], set()
+        for i, journal_row in enumerate(journal_rows.tolist()):
+            if journal_row < 0 or journal_row in seen:
+                continue
+            seen.add(journal_row)
+            details = self.catalog.profile(journal_row)
+            details['similarity'] = scores[i]
+            details['recommended_based_on'] = (self.text['title'][rows[i]] or 'Unknown Article')[:BASED_ON_LENGTH]
+            recommendations.append(details)
+            if len(recommendations) == count:
+                break
+        return recommendations
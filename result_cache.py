@@ -0,0 +1,228 @@
+"""
+Cache of recommendation responses keyed on the cleaned query text.
+
+Resubmissions of the same manuscript (e.g. with a tweaked title that cleans
+to the same text) are answered without running the TF-IDF, clustering and
+similarity stages again. Two backends are available:
+
+- 'memory': per-process LRU dictionary with a TTL
+- 'sqlite': a SQLite file shared by every worker on the machine
+
+Each entry is stored with the artifact version of the engine that computed
+it (see Recommender.version) and only returned to an engine of that version,
+so a new model or index never serves stale results, even while requests
+pinned to the previous engine finish after a reload. The memory backend
+drops the entries of other versions when it switches version; in the shared
+SQLite file, where workers may briefly serve different versions, they are
+left to expire (TTL) or to be pruned as least recently used.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def cache_key(cleaned_text, k, mode, n_probe=None):
+    """
+    Hash of the cleaned query text and the options changing its results.
+    """
+    raw = f"{cleaned_text}\x00{k}\x00{mode}\x00{n_probe}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    In-process LRU cache with time-to-live, holding JSON-encoded responses.
+
+    Responses are stored encoded so every hit returns a fresh copy that the
+    caller is free to modify.
+
+    Attributes:
+        max_size (int): Maximum number of entries
+        ttl (float): Seconds an entry stays valid
+        version (str): Artifact version being served; entries of other
+            versions are dropped when it changes
+        hits, misses, evictions (int): Counters since startup
+    """
+    backend = 'memory'
+
+    def __init__(self, max_size=1024, ttl=3600, version=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        """
+        Response cached for a key by an engine of the given version, or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            if entry is None or entry[1] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return json.loads(entry[2])
+
+    def put(self, key, response, version):
+        """
+        Store a response computed by an engine of the given version, evicting
+        the least recently used entries if full.
+        """
+        encoded = json.dumps(response)
+        with self._lock:
+            self._entries[key] = (time.time(), version, encoded)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def set_version(self, version):
+        """
+        Switch to another artifact version, dropping the responses of others.
+        """
+        with self._lock:
+            if version != self.version:
+                for key in [key for key, entry in self._entries.items() if entry[1] != version]:
+                    del self._entries[key]
+            self.version = version
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """
+        Counters and size, for the status endpoint.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'backend': self.backend,
+            'version': self.version,
+            'size': len(self),
+            'max_size': self.max_size,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SQLiteResultCache(ResultCache):
+    """
+    Result cache in a SQLite file shared by several worker processes.
+
+    Each thread opens its own connection on first use, so the cache can be
+    created before gunicorn forks its workers. Expired entries and the least
+    recently used ones beyond max_size are pruned every PRUNE_INTERVAL
+    writes and when the version changes; entries of another version are not
+    deleted early, as other workers may still serve it. Hit and miss counters
+    are per process.
+    """
+    backend = 'sqlite'
+    PRUNE_INTERVAL = 64
+
+    def __init__(self, path, max_size=10000, ttl=3600, version=None):
+        super().__init__(max_size=max_size, ttl=ttl, version=version)
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        connection = sqlite3.connect(path, timeout=10)
+        with connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, version TEXT, response TEXT, created REAL, accessed REAL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+        connection.close()
+
+    def _connection(self):
+        """
+        Connection of the current thread (and process).
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or getattr(self._local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=10)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key, version):
+        now = time.time()
+        connection = self._connection()
+        with connection:
+            row = connection.execute(
+                "SELECT response, created FROM results WHERE key = ? AND version IS ?", (key, version)
+            ).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                connection.execute("DELETE FROM results WHERE key = ?", (key,))
+                self.evictions += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            connection.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, response, version):
+        now = time.time()
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO results (key, version, response, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, version, json.dumps(response), now, now)
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_INTERVAL == 0:
+                self._prune(connection)
+
+    def _prune(self, connection):
+        """
+        Delete expired entries and the least recently used ones beyond max_size.
+        """
+        connection.execute("DELETE FROM results WHERE created < ?", (time.time() - self.ttl,))
+        deleted = connection.execute(
+            "DELETE FROM results WHERE key IN ("
+            "SELECT key FROM results ORDER BY accessed DESC LIMIT -1 OFFSET ?)", (self.max_size,)
+        ).rowcount
+        self.evictions += max(deleted, 0)
+
+    def set_version(self, version):
+        self.version = version
+        connection = self._connection()
+        with connection:
+            self._prune(connection)
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+def make_result_cache(backend, path=None, max_size=1024, ttl=3600, version=None):
+    """
+    Instantiate a result cache by backend name; 'none' disables caching.
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    if backend in (None, '', 'none'):
+        return None
+    if backend == SQLiteResultCache.backend:
+        return SQLiteResultCache(path, max_size=max_size, ttl=ttl, version=version)
+    if backend == ResultCache.backend:
+        return ResultCache(max_size=max_size, ttl=ttl, version=version)
+    raise ValueError(f"Unknown result cache '{backend}', expected 'none', "
+                     f"'{ResultCache.backend}' or '{SQLiteResultCache.backend}'")
@@ -0,0 +1,446 @@
+"""
+Candidate retrieval backends for the recommender.
+
+Every backend takes a TF-IDF query vector and returns the articles it scored
+(positions in the articles DataFrame) with their cosine similarities:
+
+- 'exact':   brute force over every article
+- 'cluster': search the n_probe KMeans clusters closest to the query, merging
+             the per-cluster top-k with a heap
+- 'lsh':     random-projection locality-sensitive hashing, then exact rescoring
+
+Usage:
+    python retrievers.py recall --backend lsh --queries 200 --k 10
+"""
+import argparse
+import heapq
+import time
+from collections import namedtuple
+
+import numpy as np
+from sklearn.preprocessing import normalize
+
+# Articles scored for a query; 'clusters' lists the clusters searched, if any
+Candidates = namedtuple('Candidates', ['rows', 'similarities', 'clusters'])
+
+# Top-k articles of a search, with statistics over every scored candidate and
+# the time spent in each stage of the search, in milliseconds
+SearchResult = namedtuple('SearchResult', [
+    'rows', 'similarities', 'clusters', 'n_candidates', 'mean_similarity', 'timings'
+])
+
+# Upper bound on the dense (articles x queries) similarity block scored at once
+MAX_BATCH_CELLS = 1 << 22
+
+
+def top_k(similarities, k):
+    """
+    Positions of the k largest similarities, best first, in O(n + k log k).
+    """
+    k = min(k, len(similarities))
+    if k == 0:
+        return np.zeros(0, dtype=np.int64)
+    top = np.argpartition(-similarities, k - 1)[:k]
+    return top[np.argsort(-similarities[top], kind='stable')]
+
+
+def query_chunks(queries, n_rows):
+    """
+    Split query positions into chunks whose n_rows x chunk similarity block
+    stays under MAX_BATCH_CELLS.
+    """
+    size = max(1, MAX_BATCH_CELLS // max(n_rows, 1))
+    return [queries[start:start + size] for start in range(0, len(queries), size)]
+
+
+class Retriever:
+    """
+    Base class of the retrieval backends.
+    """
+    name = None
+
+    def __init__(self, article_index):
+        self.article_index = article_index
+
+    def retrieve(self, query_vector, n_probe=None):
+        """
+        Score the candidate articles for a 1 x n_features query vector.
+
+        Args:
+            query_vector (sparse matrix): TF-IDF query vector
+            n_probe (int): Clusters to search; ignored by backends without clusters
+
+        Returns:
+            Candidates: Articles scored by this backend
+        """
+        raise NotImplementedError
+
+    def search(self, query_vector, k=10, n_probe=None, distances=None):
+        """
+        Top-k candidate articles, best first.
+
+        Args:
+            query_vector (sparse matrix): TF-IDF query vector
+            k (int): Number of articles
+            n_probe (int): Clusters to search; ignored by backends without clusters
+            distances (ndarray): Distances from the query to the KMeans
+                centroids, if the caller already computed them
+
+        Returns:
+            SearchResult: At most k articles and the candidate statistics
+        """
+        start = time.perf_counter()
+        candidates = self.retrieve(query_vector, n_probe=n_probe)
+        scored = time.perf_counter()
+        top = top_k(candidates.similarities, k)
+        done = time.perf_counter()
+        similarities = candidates.similarities
+        return SearchResult(
+            candidates.rows[top], similarities[top], candidates.clusters, len(similarities),
+            float(similarities.mean()) if len(similarities) else 0.0,
+            {'score': (scored - start) * 1000, 'select': (done - scored) * 1000}
+        )
+
+    def search_batch(self, query_vectors, k=10, n_probe=None, distances=None):
+        """
+        Top-k candidate articles for every row of a query matrix.
+
+        Backends override this to score the whole batch with sparse
+        matrix-matrix products; the default searches one query at a time.
+        distances has one row of centroid distances per query, as in search().
+
+        Returns:
+            list: One SearchResult per query, in order
+        """
+        return [
+            self.search(query_vectors[i], k=k, n_probe=n_probe,
+                        distances=distances[i:i + 1] if distances is not None else None)
+            for i in range(query_vectors.shape[0])
+        ]
+
+
+class ExactRetriever(Retriever):
+    """
+    Brute-force cosine similarity against every indexed article.
+    """
+    name = 'exact'
+
+    def retrieve(self, query_vector, n_probe=None):
+        index = self.article_index
+        similarities = (index.matrix @ normalize(query_vector).T).toarray().ravel()
+        return Candidates(index.row_ids, similarities, None)
+
+    def search_batch(self, query_vectors, k=10, n_probe=None, distances=None):
+        """
+        Score the whole batch against every article with one product per chunk.
+        """
+        index = self.article_index
+        queries = normalize(query_vectors)
+        results = []
+        for chunk in query_chunks(np.arange(queries.shape[0]), len(index)):
+            start = time.perf_counter()
+            similarities = (index.matrix @ queries[chunk].T).toarray()
+            scored = time.perf_counter()
+            for j in range(len(chunk)):
+                column = similarities[:, j]
+                top = top_k(column, k)
+                results.append(SearchResult(
+                    index.row_ids[top], column[top], None, len(column), float(column.mean()),
+                    {'score': (scored - start) * 1000 / len(chunk)}
+                ))
+        return results
+
+
+class ClusterProbeRetriever(Retriever):
+    """
+    Exhaustive search inside the n_probe KMeans clusters nearest to the query.
+
+    With n_probe=1 this is the original behaviour of the app: only the
+    predicted cluster is searched.
+    """
+    name = 'cluster'
+
+    def __init__(self, article_index, kmeans_model, n_probe=1):
+        super().__init__(article_index)
+        self.kmeans_model = kmeans_model
+        self.n_probe = n_probe
+
+    def probe_order(self, query_vector, distances=None):
+        """
+        Cluster labels sorted by distance from the query to their centroids
+        (computed unless given, as a 1 x n_clusters array).
+        """
+        if distances is None:
+            distances = self.kmeans_model.transform(query_vector)
+        return np.argsort(distances[0], kind='stable')
+
+    def retrieve(self, query_vector, n_probe=None):
+        n_probe = n_probe or self.n_probe
+        clusters = self.probe_order(query_vector)[:n_probe].tolist()
+        scored = [self.article_index.score_cluster(query_vector, cluster) for cluster in clusters]
+        rows = np.concatenate([cluster_rows for cluster_rows, _ in scored])
+        similarities = np.concatenate([cluster_similarities for _, cluster_similarities in scored])
+        return Candidates(rows, similarities, clusters)
+
+    def search(self, query_vector, k=10, n_probe=None, distances=None):
+        """
+        Top-k articles over the n_probe nearest clusters.
+
+        Each cluster is scored and reduced to its own top-k, and the sorted
+        per-cluster lists are merged with a heap, so no candidate array larger
+        than one cluster is ever built or sorted.
+        """
+        n_probe = n_probe or self.n_probe
+        start = time.perf_counter()
+        clusters = self.probe_order(query_vector, distances)[:n_probe].tolist()
+        probed = time.perf_counter()
+
+        per_cluster, n_candidates, similarity_sum = [], 0, 0.0
+        for cluster in clusters:
+            cluster_rows, similarities = self.article_index.score_cluster(query_vector, cluster)
+            top = top_k(similarities, k)
+            per_cluster.append(zip((-similarities[top]).tolist(), cluster_rows[top].tolist()))
+            n_candidates += len(similarities)
+            similarity_sum += float(similarities.sum())
+        scored = time.perf_counter()
+
+        merged = list(heapq.merge(*per_cluster))[:k]
+        done = time.perf_counter()
+        return SearchResult(
+            np.array([row for _, row in merged], dtype=np.int64),
+            np.array([-score for score, _ in merged], dtype=np.float64),
+            clusters, n_candidates,
+            similarity_sum / n_candidates if n_candidates else 0.0,
+            {
+                'probe': (probed - start) * 1000,
+                'score': (scored - probed) * 1000,
+                'merge': (done - scored) * 1000,
+            }
+        )
+
+    def search_batch(self, query_vectors, k=10, n_probe=None, distances=None):
+        """
+        Top-k articles over the n_probe nearest clusters of every query.
+
+        Queries are grouped by probed cluster, and each cluster is scored once
+        against all the queries probing it with a single sparse matrix-matrix
+        product.
+        """
+        n_probe = n_probe or self.n_probe
+        index = self.article_index
+        n_queries = query_vectors.shape[0]
+        start = time.perf_counter()
+        if distances is None:
+            distances = self.kmeans_model.transform(query_vectors)
+        probes = np.argsort(distances, axis=1, kind='stable')[:, :n_probe]
+        queries = normalize(query_vectors)
+        probed = time.perf_counter()
+
+        per_query = [[] for _ in range(n_queries)]
+        n_candidates = np.zeros(n_queries, dtype=np.int64)
+        similarity_sums = np.zeros(n_queries)
+        for cluster in np.unique(probes).tolist():
+            lo, hi = index.cluster_slice(cluster)
+            cluster_matrix, cluster_rows = index.rows(lo, hi), index.row_ids[lo:hi]
+            members = np.flatnonzero((probes == cluster).any(axis=1))
+            for chunk in query_chunks(members, hi - lo):
+                similarities = (cluster_matrix @ queries[chunk].T).toarray()
+                for j, query in enumerate(chunk.tolist()):
+                    column = similarities[:, j]
+                    top = top_k(column, k)
+                    per_query[query].append(zip((-column[top]).tolist(), cluster_rows[top].tolist()))
+                n_candidates[chunk] += hi - lo
+                similarity_sums[chunk] += similarities.sum(axis=0)
+        scored = time.perf_counter()
+
+        results = []
+        for query in range(n_queries):
+            merged = list(heapq.merge(*per_query[query]))[:k]
+            count = int(n_candidates[query])
+            results.append(SearchResult(
+                np.array([row for _, row in merged], dtype=np.int64),
+                np.array([-score for score, _ in merged], dtype=np.float64),
+                probes[query].tolist(), count,
+                float(similarity_sums[query]) / count if count else 0.0,
+                {}
+            ))
+        done = time.perf_counter()
+
+        timings = {
+            'probe': (probed - start) * 1000 / max(n_queries, 1),
+            'score': (scored - probed) * 1000 / max(n_queries, 1),
+            'merge': (done - scored) * 1000 / max(n_queries, 1),
+        }
+        for result in results:
+            result.timings.update(timings)
+        return results
+
+
+class RandomProjectionRetriever(Retriever):
+    """
+    Approximate search with sign-random-projection LSH.
+
+    Each of n_tables hash tables buckets articles by the signs of n_bits random
+    projections (cosine LSH). A query collects the articles sharing its bucket
+    in any table, optionally also the buckets one bit away, and rescores
+    them exactly.
+    """
+    name = 'lsh'
+
+    def __init__(self, article_index, n_tables=8, n_bits=None, multiprobe=True, seed=42):
+        super().__init__(article_index)
+        n_rows, n_features = article_index.matrix.shape
+        if n_bits is None:
+            # Aim for a few dozen articles per bucket
+            n_bits = int(np.clip(np.log2(max(n_rows, 1) / 32), 4, 20))
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.multiprobe = multiprobe
+
+        rng = np.random.default_rng(seed)
+        self.projections = rng.standard_normal((n_features, n_tables * n_bits))
+        self.bit_values = np.left_shift(np.int64(1), np.arange(n_bits, dtype=np.int64))
+
+        codes = self._hash(article_index.matrix)
+        self.orders = np.argsort(codes, axis=0, kind='stable').T
+        self.sorted_codes = np.take_along_axis(codes, self.orders.T, axis=0).T
+
+    def _hash(self, vectors):
+        """
+        Bucket code of each row of a sparse matrix, one column per table.
+        """
+        signs = np.asarray(vectors @ self.projections) > 0
+        signs = signs.reshape(vectors.shape[0], self.n_tables, self.n_bits)
+        return signs.astype(np.int64) @ self.bit_values
+
+    def candidate_rows(self, query_vector):
+        """
+        Matrix rows sharing a bucket (or a neighbouring one) with the query.
+        """
+        codes = self._hash(query_vector)[0]
+        found = []
+        for table, code in enumerate(codes):
+            probes = [code]
+            if self.multiprobe:
+                probes.extend(code ^ self.bit_values)
+            sorted_codes = self.sorted_codes[table]
+            for probe in probes:
+                start = np.searchsorted(sorted_codes, probe, side='left')
+                stop = np.searchsorted(sorted_codes, probe, side='right')
+                if stop > start:
+                    found.append(self.orders[table, start:stop])
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+    def retrieve(self, query_vector, n_probe=None):
+        index = self.article_index
+        rows = self.candidate_rows(query_vector)
+        if len(rows) == 0:
+            return Candidates(rows, np.zeros(0), None)
+        similarities = (index.matrix[rows] @ normalize(query_vector).T).toarray().ravel()
+        return Candidates(index.row_ids[rows], similarities, None)
+
+
+RETRIEVERS = {
+    ExactRetriever.name: ExactRetriever,
+    ClusterProbeRetriever.name: ClusterProbeRetriever,
+    RandomProjectionRetriever.name: RandomProjectionRetriever,
+}
+
+
+def make_retriever(name, article_index, kmeans_model=None, **options):
+    """
+    Instantiate a retrieval backend by name.
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    if name not in RETRIEVERS:
+        raise ValueError(f"Unknown retriever '{name}', expected one of {sorted(RETRIEVERS)}")
+    if name == ClusterProbeRetriever.name:
+        return ClusterProbeRetriever(article_index, kmeans_model, **options)
+    return RETRIEVERS[name](article_index, **options)
+
+
+def evaluate_recall(retriever, reference, query_vectors, k=10):
+    """
+    Recall@k of a retriever against a reference (normally exact) retriever.
+
+    Args:
+        retriever (Retriever): Backend under evaluation
+        reference (Retriever): Backend providing the true neighbours
+        query_vectors (sparse matrix): One query per row
+        k (int): Number of neighbours compared
+
+    Returns:
+        dict: Mean recall, mean candidate count and mean latency in milliseconds
+    """
+    recalls, candidate_counts, latencies = [], [], []
+    for i in range(query_vectors.shape[0]):
+        query = query_vectors[i]
+        expected = reference.search(query, k).rows
+        start = time.perf_counter()
+        result = retriever.search(query, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found = result.rows
+        candidate_counts.append(result.n_candidates)
+        if len(expected):
+            recalls.append(len(np.intersect1d(expected, found)) / len(expected))
+    return {
+        'backend': retriever.name,
+        'recall_at_k': float(np.mean(recalls)) if recalls else 0.0,
+        'mean_candidates': float(np.mean(candidate_counts)) if candidate_counts else 0.0,
+        'mean_latency_ms': float(np.mean(latencies)) if latencies else 0.0,
+    }
+
+
+def main():
+    """
+    Command-line entry point reporting backend recall against brute force.
+    """
+    import joblib
+    import pandas as pd
+
+    from article_index import ArticleIndex
+    from article_store import ArticleStore
+
+    parser = argparse.ArgumentParser(description="Evaluate retrieval backends against brute force.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    recall_parser = subparsers.add_parser('recall', help="Report recall@k of retrieval backends")
+    recall_parser.add_argument('--backend', choices=sorted(RETRIEVERS), action='append',
+                               help="Backend to evaluate (repeatable, default: all)")
+    recall_parser.add_argument('--index', default="index")
+    recall_parser.add_argument('--articles', default="Articles_clustered.csv")
+    recall_parser.add_argument('--vectorizer', default="tfidf.pkl")
+    recall_parser.add_argument('--kmeans', default="kmeans_model.pkl")
+    recall_parser.add_argument('--n-probe', type=int, default=1)
+    recall_parser.add_argument('--queries', type=int, default=200)
+    recall_parser.add_argument('--k', type=int, default=10)
+    recall_parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        article_index = ArticleIndex.load(args.index)
+    except (FileNotFoundError, ValueError):
+        article_index = ArticleIndex.build(
+            ArticleStore.from_dataframe(pd.read_csv(args.articles)), joblib.load(args.vectorizer)
+        )
+    kmeans_model = joblib.load(args.kmeans)
+
+    # Articles of the corpus serve as queries
+    rng = np.random.default_rng(args.seed)
+    sample = rng.choice(len(article_index), size=min(args.queries, len(article_index)), replace=False)
+    queries = article_index.matrix[np.sort(sample)]
+
+    reference = ExactRetriever(article_index)
+    for name in args.backend or sorted(RETRIEVERS):
+        options = {'n_probe': args.n_probe} if name == ClusterProbeRetriever.name else {}
+        retriever = make_retriever(name, article_index, kmeans_model, **options)
+        report = evaluate_recall(retriever, reference, queries, k=args.k)
+        print(f"{report['backend']:>8}: recall@{args.k}={report['recall_at_k']:.3f} "
+              f"candidates={report['mean_candidates']:.0f} latency={report['mean_latency_ms']:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the top level of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def nltk_data():
+    """
+    Skip tests that need the NLTK stopwords, WordNet and punkt data.
+    """
+    from nltk.corpus import stopwords
+    from nltk.stem import WordNetLemmatizer
+    from nltk.tokenize import word_tokenize
+    try:
+        stopwords.words('english')
+        stopwords.words('french')
+        WordNetLemmatizer().lemmatize('tests')
+        word_tokenize('tests')
+    except LookupError:
+        pytest.skip("NLTK data is not installed")
+
+
+@pytest.fixture(scope='session')
+def corpus():
+    """
+    Small clustered corpus: (ArticleStore, fitted vectorizer, fitted KMeans).
+    """
+    import numpy as np
+    import pandas as pd
+    from sklearn.cluster import KMeans
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    from article_store import ArticleStore
+
+    rng = np.random.default_rng(0)
+    topics = [[f"topic{t}word{w}" for w in range(12)] for t in range(6)]
+    shared = [f"common{w}" for w in range(30)]
+    texts, journals = [], []
+    for i in range(300):
+        topic = i % len(topics)
+        words = list(rng.choice(topics[topic], 10)) + list(rng.choice(shared, 4))
+        texts.append(' '.join(words))
+        journals.append(f"Journal {topic}{'AB'[i % 2]}")
+    vectorizer = TfidfVectorizer().fit(texts)
+    kmeans_model = KMeans(n_clusters=6, n_init=3, random_state=0).fit(vectorizer.transform(texts))
+    store = ArticleStore.from_dataframe(pd.DataFrame({
+        'title': [f"Article {i}" for i in range(len(texts))],
+        'journal_name': journals,
+        'citations': rng.integers(0, 100, len(texts)).astype(float),
+        'combined': texts,
+        'cluster': kmeans_model.labels_,
+    }))
+    return store, vectorizer, kmeans_model
+
+
+@pytest.fixture
+def corpus_files(tmp_path, corpus):
+    """
+    The corpus written as trained artifacts: config paths of its tfidf.pkl,
+    kmeans_model.pkl and Articles_clustered.csv.
+    """
+    import joblib
+    import pandas as pd
+
+    store, vectorizer, kmeans_model = corpus
+    paths = {
+        'TOKENIZER_PATH': str(tmp_path / 'tfidf.pkl'),
+        'KMEANS_PATH': str(tmp_path / 'kmeans_model.pkl'),
+        'ARTICLES_PATH': str(tmp_path / 'Articles_clustered.csv'),
+    }
+    joblib.dump(vectorizer, paths['TOKENIZER_PATH'])
+    joblib.dump(kmeans_model, paths['KMEANS_PATH'])
+    pd.DataFrame({
+        field: store.column(field) for field in ('title', 'journal_name', 'citations', 'combined')
+    }).assign(cluster=store.clusters).to_csv(paths['ARTICLES_PATH'], index=False)
+    return paths
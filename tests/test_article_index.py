@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+import pytest
+
+from article_index import ArticleIndex
+from artifacts import sources_match, write_manifest
+from recommender import DEFAULT_CONFIG, load_article_index
+
+
+@pytest.fixture
+def index_config(tmp_path, corpus, corpus_files):
+    """
+    Settings pointing at the corpus files and an index saved from them.
+    """
+    store, vectorizer, _ = corpus
+    config = {**DEFAULT_CONFIG, **corpus_files, 'INDEX_PATH': str(tmp_path / 'index')}
+    ArticleIndex.build(store, vectorizer).save(config['INDEX_PATH'], sources=list(corpus_files.values()))
+    return config
+
+
+def test_memory_mapped_index_scores_like_the_built_one(corpus, index_config):
+    store, vectorizer, kmeans_model = corpus
+    built = ArticleIndex.build(store, vectorizer)
+    loaded = ArticleIndex.load(index_config['INDEX_PATH'])
+
+    assert isinstance(loaded.matrix.data, np.memmap)
+    np.testing.assert_array_equal(loaded.row_ids, built.row_ids)
+    np.testing.assert_array_equal(loaded.cluster_ids, np.arange(kmeans_model.n_clusters))
+    queries = vectorizer.transform(["topic0word1 topic0word2 common3", "topic4word7 topic2word5"])
+    for query in queries:
+        for cluster in built.cluster_ids:
+            loaded_rows, loaded_scores = loaded.score_cluster(query, cluster)
+            built_rows, built_scores = built.score_cluster(query, cluster)
+            np.testing.assert_array_equal(loaded_rows, built_rows)
+            np.testing.assert_allclose(loaded_scores, built_scores, rtol=1e-12)
+    assert loaded.score_cluster(queries[0], 99)[0].size == 0
+
+
+def test_rows_slice_the_matrix(index_config):
+    index = ArticleIndex.load(index_config['INDEX_PATH'])
+    for cluster in index.cluster_ids:
+        start, stop = index.cluster_slice(cluster)
+        np.testing.assert_array_equal(index.rows(start, stop).toarray(), index.matrix[start:stop].toarray())
+    assert index.rows(10, 10).shape == (0, index.matrix.shape[1])
+    assert len(index) == 300 and int(index.offsets[-1]) == 300
+
+
+def test_current_index_is_memory_mapped(corpus, index_config):
+    store, vectorizer, _ = corpus
+    index = load_article_index(index_config, store, vectorizer)
+    assert index.manifest and isinstance(index.matrix.data, np.memmap)
+
+
+@pytest.mark.parametrize('changed', ['ARTICLES_PATH', 'TOKENIZER_PATH', 'KMEANS_PATH'])
+def test_changed_source_forces_a_rebuild(corpus, index_config, changed):
+    store, vectorizer, _ = corpus
+    with open(index_config[changed], 'ab') as f:
+        f.write(b'\n')
+
+    index = load_article_index(index_config, store, vectorizer)
+    assert not index.manifest and not isinstance(index.matrix.data, np.memmap)
+    assert len(index) == len(store)
+
+
+def test_missing_model_file_forces_a_rebuild(corpus, index_config):
+    store, vectorizer, _ = corpus
+    os.remove(index_config['KMEANS_PATH'])
+    assert not load_article_index(index_config, store, vectorizer).manifest
+
+
+def test_index_shipped_without_the_articles_file_is_used(corpus, index_config):
+    store, vectorizer, _ = corpus
+    os.remove(index_config['ARTICLES_PATH'])
+    assert load_article_index(index_config, store, vectorizer).manifest
+
+
+def test_missing_source_does_not_match(tmp_path):
+    source = tmp_path / 'tfidf.pkl'
+    source.write_bytes(b'model')
+    manifest = write_manifest(str(tmp_path), {}, sources=[str(source)])
+
+    assert sources_match(manifest, [str(source)])
+    assert not sources_match(manifest, [str(source), str(tmp_path / 'kmeans_model.pkl')])
+    source.unlink()
+    assert not sources_match(manifest, [str(source)])
+    assert sources_match(manifest, [])
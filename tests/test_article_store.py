@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from article_store import MISSING_CODE, ArticleStore
+
+ARTICLES = pd.DataFrame({
+    'title': ["Protein folding", "River flows", "Soil carbon", "Ice sheets"],
+    'journal_name': ["Bioinformatics", "Water Research", None, "Bioinformatics"],
+    'DOI': ["10.1/a", None, "10.1/c", "10.1/d"],
+    'citations': [12, None, 3, 0],
+    'sjr': ["4.5", "No SJR", "1.2", None],
+    'abstract': ["We fold proteins.", None, "Carbon in boreal soils — réseaux.", ""],
+    'combined': ["protein fold", "river flow", "soil carbon", "ice sheet"],
+    'cluster': [0, 1, 1, 2],
+})
+FIELDS = ('title', 'journal_name', 'doi', 'citations', 'sjr', 'abstract', 'combined')
+
+
+def assert_same_values(store, other):
+    assert len(store) == len(other)
+    for field in FIELDS:
+        values, other_values = store.column(field), other.column(field)
+        if field in store.numbers:
+            np.testing.assert_array_equal(values, other_values)
+        else:
+            assert list(values) == list(other_values), field
+    np.testing.assert_array_equal(store.clusters, other.clusters)
+    assert [store.journal_name(i) for i in range(len(store))] == [other.journal_name(i) for i in range(len(other))]
+
+
+def test_dataframe_is_converted_to_typed_columns():
+    store = ArticleStore.from_dataframe(ARTICLES)
+
+    assert store.get('title', 0) == "Protein folding"
+    assert store.get('doi', 1) is None
+    np.testing.assert_array_equal(store.numbers['sjr'], [4.5, np.nan, 1.2, np.nan])
+    assert np.isnan(store.get('citations', 1))
+    assert store.get('abstract', 2) == "Carbon in boreal soils — réseaux." and store.get('abstract', 1) is None
+    assert list(store.journal_names) == ["Bioinformatics", "Water Research"]
+    assert store.journal_codes.tolist() == [0, 1, MISSING_CODE, 0]
+    assert store.column('journal_name').tolist() == ["Bioinformatics", "Water Research", None, "Bioinformatics"]
+    assert not store.has('authors') and store.get('authors', 0) is None
+
+
+def test_notebook_column_names_are_accepted():
+    store = ArticleStore.from_dataframe(ARTICLES.rename(columns={'journal_name': 'journal name'}))
+    assert store.column('journal_name').tolist() == ["Bioinformatics", "Water Research", None, "Bioinformatics"]
+
+
+def test_snapshot_loads_back_the_same_values(tmp_path):
+    store = ArticleStore.from_dataframe(ARTICLES)
+    source = tmp_path / 'Articles_clustered.csv'
+    ARTICLES.to_csv(source, index=False)
+    store.save(str(tmp_path / 'snapshot'), sources=[str(source)])
+
+    loaded = ArticleStore.load(str(tmp_path / 'snapshot'))
+    # Only the cluster labels and journal codes are read up front
+    assert loaded.numbers.loaded() == loaded.strings.loaded() == loaded.texts.loaded() == []
+    assert isinstance(loaded.clusters, np.memmap)
+    assert_same_values(loaded, store)
+    assert list(loaded.journal_names) == list(store.journal_names)
+    assert list(loaded.string_column('title')) == list(store.column('title'))
+    assert loaded.is_current([str(source)])
+    assert loaded.manifest['n_rows'] == 4 and loaded.manifest['n_journals'] == 2
+
+
+def test_append_remaps_the_journal_codes():
+    store = ArticleStore.from_dataframe(ARTICLES)
+    other = ArticleStore.from_dataframe(pd.DataFrame({
+        'title': ["Glacier melt", "Genome assembly", "Untitled"],
+        'journal_name': ["Journal of Glaciology", "Bioinformatics", None],
+        'authors': ["Doe, J.", None, "Roe, R."],
+        'cluster': [2, 0, 1],
+    }))
+    assert other.journal_codes.tolist() == [0, 1, MISSING_CODE]
+
+    combined = store.append(other)
+
+    assert list(combined.journal_names) == ["Bioinformatics", "Water Research", "Journal of Glaciology"]
+    assert combined.journal_codes.tolist() == [0, 1, MISSING_CODE, 0, 2, 0, MISSING_CODE]
+    assert [combined.journal_name(i) for i in range(4, 7)] == ["Journal of Glaciology", "Bioinformatics", None]
+    assert combined.clusters.tolist() == [0, 1, 1, 2, 2, 0, 1]
+    # Fields missing from one side are empty for its rows
+    assert combined.column('authors').tolist() == [None] * 4 + ["Doe, J.", None, "Roe, R."]
+    assert np.isnan(combined.numbers['citations'][4:]).all()
+    assert combined.column('abstract').tolist()[4:] == [None] * 3
+    assert_same_values(ArticleStore.from_dataframe(ARTICLES), store)
+
+
+def test_append_to_a_snapshot_round_trips(tmp_path):
+    ArticleStore.from_dataframe(ARTICLES).save(str(tmp_path / 'snapshot'))
+    loaded = ArticleStore.load(str(tmp_path / 'snapshot'))
+    new_articles = pd.DataFrame({
+        'title': ["Glacier melt"], 'journal_name': ["Water Research"], 'DOI': ["10.1/e"], 'citations': [1],
+        'sjr': ["2.0"], 'abstract': ["Melting ice."], 'combined': ["glacier melt"], 'cluster': [2],
+    })
+
+    combined = loaded.append(ArticleStore.from_dataframe(new_articles))
+    expected = ArticleStore.from_dataframe(pd.concat([ARTICLES, new_articles], ignore_index=True))
+    assert_same_values(combined, expected)
+    assert combined.journal_codes.tolist() == [0, 1, MISSING_CODE, 0, 1]
+
+    combined.save(str(tmp_path / 'merged'))
+    assert_same_values(ArticleStore.load(str(tmp_path / 'merged')), expected)
+
+
+def test_snapshot_of_another_format_is_rejected(tmp_path):
+    store = ArticleStore.from_dataframe(ARTICLES)
+    store.save(str(tmp_path / 'snapshot'))
+    manifest_path = tmp_path / 'snapshot' / 'manifest.json'
+    manifest_path.write_text(manifest_path.read_text().replace('"format_version": 1', '"format_version": 0'))
+
+    with pytest.raises(ValueError, match="Unsupported format version"):
+        ArticleStore.load(str(tmp_path / 'snapshot'))
+    with pytest.raises(FileNotFoundError):
+        ArticleStore.load(str(tmp_path / 'missing'))
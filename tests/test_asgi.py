@@ -0,0 +1,88 @@
+import asyncio
+import importlib
+import sys
+import time
+
+import pytest
+from flask import Flask, Response, current_app, g, request, stream_with_context
+
+
+def make_streaming_app():
+    flask_app = Flask('streaming')
+
+    @flask_app.route('/stream')
+    def stream():
+        g.name = request.args['name']
+
+        def generate():
+            for i in range(5):
+                # Flask's request and app contexts must still be active here
+                time.sleep(0.005)
+                yield f"{current_app.name}:{g.name}:{request.args['name']}:{i}\n"
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    @flask_app.route('/slow')
+    def slow():
+        time.sleep(0.3)
+        return 'done'
+
+    return flask_app
+
+
+@pytest.fixture
+def bridge(monkeypatch):
+    import app as app_module
+    monkeypatch.setattr(app_module, 'create_app', make_streaming_app)
+    sys.modules.pop('asgi', None)
+    asgi = importlib.import_module('asgi')
+    yield asgi.WSGIBridge(make_streaming_app(), threads=4, max_pending=16, timeout=5)
+    sys.modules.pop('asgi', None)
+
+
+async def call(bridge, path, query):
+    messages = []
+    scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query, 'headers': []}
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await bridge(scope, receive, send)
+    status = messages[0]['status']
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    return status, body.decode('utf-8')
+
+
+def test_concurrent_streams_keep_their_context(bridge):
+    async def run():
+        return await asyncio.gather(*(call(bridge, '/stream', f'name=r{i}'.encode()) for i in range(8)))
+
+    results = asyncio.run(run())
+    for i, (status, body) in enumerate(results):
+        assert status == 200
+        lines = body.splitlines()
+        assert lines == [f"streaming:r{i}:r{i}:{j}" for j in range(5)]
+    assert bridge.pending == 0
+
+
+def test_timeout_answers_504_and_releases_the_request(bridge):
+    bridge.timeout = 0.05
+
+    async def run():
+        result = await call(bridge, '/slow', b'')
+        # The request stays pending until its thread finishes
+        pending = bridge.pending
+        for _ in range(100):
+            if bridge.pending == 0:
+                break
+            await asyncio.sleep(0.01)
+        return result, pending
+
+    (status, _), pending = asyncio.run(run())
+    assert status == 504
+    assert pending == 1
+    assert bridge.pending == 0
+    assert bridge.timed_out == 1
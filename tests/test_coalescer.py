@@ -0,0 +1,171 @@
+import threading
+import time
+
+from coalescer import RequestCoalescer
+
+TIMINGS = {'clean_text': 2.0, 'transform': 1.0, 'search': 3.0}
+
+
+class FakeRecommender:
+    """
+    Answers each item with its title, recording the batches it was given.
+    """
+
+    def __init__(self, error=None, delay=0.0):
+        self.error = error
+        self.delay = delay
+        self.batches = []
+        self.cache = None
+        self.version = self.model_version = 'test'
+
+    def recommend_batch(self, items, k=10, mode='articles', n_probe=None):
+        self.batches.append([item['title'] for item in items])
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return [{'title': item['title'], 'k': k, 'mode': mode} for item in items], dict(TIMINGS)
+
+
+def submit(call, titles, **options):
+    """
+    Send one request per title from concurrent threads; results (or
+    errors) by title.
+    """
+    results, start = {}, threading.Barrier(len(titles))
+
+    def send(title):
+        start.wait()
+        try:
+            results[title] = call(title, "abstract", "keywords", **options)
+        except Exception as e:
+            results[title] = e
+
+    threads = [threading.Thread(target=send, args=(title,)) for title in titles]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results
+
+
+def test_requests_within_the_window_share_a_batch():
+    recommender, observed = FakeRecommender(), []
+    coalescer = RequestCoalescer(recommender, window_ms=300, max_batch=32, observe_batch=observed.append)
+    titles = [f"Manuscript {i}" for i in range(6)]
+
+    results = submit(coalescer.recommend, titles)
+
+    assert len(recommender.batches) == 1 and sorted(recommender.batches[0]) == titles
+    assert observed == [TIMINGS]
+    assert coalescer.stats()['batch_sizes'] == {'6': 1}
+    for title in titles:
+        assert results[title]['title'] == title
+        timings = dict(results[title]['timings'])
+        assert 0 <= timings.pop('coalesce.wait') < 1000
+        assert timings == TIMINGS
+
+
+def test_full_batch_is_scored_without_waiting_for_the_window():
+    recommender = FakeRecommender()
+    coalescer = RequestCoalescer(recommender, window_ms=60_000, max_batch=4)
+    titles = [f"Manuscript {i}" for i in range(4)]
+
+    started = time.perf_counter()
+    results = submit(coalescer.recommend, titles)
+
+    assert time.perf_counter() - started < 5
+    assert [results[title]['title'] for title in titles] == titles
+    assert coalescer.stats()['batch_sizes'] == {'4': 1}
+
+
+def test_window_closes_on_a_lone_request():
+    recommender = FakeRecommender()
+    coalescer = RequestCoalescer(recommender, window_ms=20, max_batch=32)
+
+    assert coalescer.recommend("First", "", "")['title'] == "First"
+    assert coalescer.recommend("Second", "", "")['title'] == "Second"
+    assert recommender.batches == [["First"], ["Second"]]
+    assert coalescer.stats()['mean_batch_size'] == 1.0
+
+
+def test_results_keep_the_order_of_the_batch():
+    # A slow batch lets the next requests queue up in a known order
+    recommender = FakeRecommender(delay=0.2)
+    coalescer = RequestCoalescer(recommender, window_ms=1, max_batch=32)
+    first = threading.Thread(target=coalescer.recommend, args=("First", "", ""))
+    first.start()
+    time.sleep(0.05)
+
+    results = {}
+    threads = []
+    for i in range(5):
+        title = f"Manuscript {i}"
+        threads.append(threading.Thread(
+            target=lambda title=title: results.setdefault(title, coalescer.recommend(title, "", ""))
+        ))
+        threads[-1].start()
+        time.sleep(0.01)
+    for thread in threads + [first]:
+        thread.join(timeout=10)
+
+    assert recommender.batches == [["First"], [f"Manuscript {i}" for i in range(5)]]
+    assert all(response['title'] == title for title, response in results.items())
+
+
+def test_options_and_engines_are_scored_separately():
+    recommender, other = FakeRecommender(), FakeRecommender()
+    coalescer = RequestCoalescer(recommender, window_ms=300, max_batch=32)
+    calls = {
+        "A": {}, "B": {'k': 5}, "C": {'mode': 'journals'}, "D": {'recommender': other}, "E": {},
+    }
+    results, start = {}, threading.Barrier(len(calls))
+
+    def send(title, options):
+        start.wait()
+        results[title] = coalescer.recommend(title, "", "", **options)
+
+    threads = [threading.Thread(target=send, args=item) for item in calls.items()]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert sorted(map(sorted, recommender.batches)) == [["A", "E"], ["B"], ["C"]]
+    assert other.batches == [["D"]]
+    assert (results["B"]['k'], results["C"]['mode']) == (5, 'journals')
+
+
+def test_errors_reach_every_request_of_the_batch():
+    error = RuntimeError("index unavailable")
+    observed = []
+    coalescer = RequestCoalescer(FakeRecommender(error=error), window_ms=300, max_batch=32,
+                                 observe_batch=observed.append)
+    titles = [f"Manuscript {i}" for i in range(3)]
+
+    results = submit(coalescer.recommend, titles)
+
+    assert all(results[title] is error for title in titles)
+    assert observed == []
+    # The batching thread survives the error
+    coalescer.recommender = FakeRecommender()
+    assert coalescer.recommend("After", "", "")['title'] == "After"
+
+
+def test_app_records_batch_stages_once_per_batch():
+    import app as app_module
+
+    app = app_module.create_app({'COALESCE_WINDOW_MS': 300, 'MODEL_POLL_SECONDS': 0}, FakeRecommender())
+    metrics = app.extensions['metrics']
+
+    def recommend(title, abstract, keywords):
+        with app.test_request_context():
+            return app_module.recommend(title, abstract, keywords)
+
+    submit(recommend, [f"Manuscript {i}" for i in range(4)])
+
+    def counts(histogram):
+        return {stage: series[-1] for (stage,), series in histogram._series.items()}
+
+    assert counts(metrics.batch_stages) == {stage: 1 for stage in TIMINGS}
+    assert counts(metrics.stages) == {'coalesce.wait': 4}
+    assert app.extensions['coalescer'].stats()['batches'] == 1
@@ -0,0 +1,39 @@
+import numpy as np
+
+from columnar import StringColumn
+
+VALUES = ["Deep learning", "", None, "Réseaux de neurones — santé", float('nan'), "蛋白质折叠", "x"]
+DECODED = ["Deep learning", "", None, "Réseaux de neurones — santé", None, "蛋白质折叠", "x"]
+
+
+def test_values_round_trip():
+    column = StringColumn.from_values(VALUES)
+
+    assert len(column) == len(VALUES)
+    assert list(column) == DECODED
+    assert column.missing.tolist() == [value is None for value in DECODED]
+    assert column.get(1, 'default') == '' and column.get(2, 'default') == 'default'
+    assert column.buffer.dtype == np.uint8 and column.offsets[-1] == column.buffer.size
+
+
+def test_empty_column():
+    column = StringColumn.from_values([])
+    assert len(column) == 0 and list(column) == []
+    assert list(StringColumn.concat([column, StringColumn.from_values(["a"])])) == ["a"]
+
+
+def test_concat_keeps_the_rows_in_order():
+    first, second = StringColumn.from_values(VALUES[:3]), StringColumn.from_values(VALUES[3:])
+    assert list(StringColumn.concat([first, second])) == DECODED
+    assert list(StringColumn.concat([])) == []
+
+
+def test_concat_of_sliced_columns():
+    column = StringColumn.from_values(VALUES)
+    # Rows 3-5 as a view on the same buffer, whose offsets do not start at 0
+    tail = StringColumn(column.buffer, column.offsets[3:6], column.missing[3:5])
+
+    assert list(tail) == DECODED[3:5]
+    combined = StringColumn.concat([tail, StringColumn.from_values(["end"])])
+    assert list(combined) == DECODED[3:5] + ["end"]
+    assert combined.offsets[0] == 0 and combined.offsets[-1] == combined.buffer.size
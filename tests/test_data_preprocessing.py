@@ -0,0 +1,70 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_preprocessing import TREEBANK_SPLITS, TextNormalizer, check_parity, clean_text_reference
+
+ARTICLES_PATH = os.environ.get("ARTICLES_PATH", "Articles_clustered.csv")
+SAMPLE_SIZE = 500
+
+TEXTS = [
+    "Deep Learning for Protein-Folding: a 2021 review (v2.0)",
+    "We cannot say they're gonna wanna use it; gimme, lemme & gotta too.",
+    "Les réseaux de neurones et l'apprentissage profond dans la santé",
+    "CANNOT.cannot_Cannot—GoNNa",
+    "x-ray ab initio e.g. i.e. n=42 DNA/RNA",
+    "",
+    "   \t\n",
+]
+
+
+@pytest.fixture
+def tokenizer():
+    # Tokenizing needs no NLTK data; the stopword lists are only loaded per language
+    return TextNormalizer(languages=())
+
+
+def test_tokenize_keeps_lowercase_letter_runs(tokenizer):
+    assert tokenizer.tokenize("Deep-Learning, 3D & X-ray: v2.0") == ['deep', 'learning', 'd', 'x', 'ray', 'v']
+    assert tokenizer.tokenize("Réseaux naïfs") == ['r', 'seaux', 'na', 'fs']
+    assert tokenizer.tokenize("") == []
+    assert tokenizer.tokenize("1234 !?") == []
+
+
+@pytest.mark.parametrize('word, parts', sorted(TREEBANK_SPLITS.items()))
+def test_tokenize_splits_treebank_contractions(tokenizer, word, parts):
+    assert tokenizer.tokenize(f"we {word.upper()} go") == ['we', *parts, 'go']
+    # Only whole tokens are split
+    assert tokenizer.tokenize(f"{word}s") == [f"{word}s"]
+
+
+def test_non_string_input_normalizes_to_empty(tokenizer):
+    for value in (None, np.nan, 42, 3.5, ['a', 'list']):
+        assert tokenizer(value) == ""
+
+
+def test_tokenize_matches_word_tokenize(nltk_data, tokenizer):
+    from nltk.tokenize import word_tokenize
+    for text in TEXTS:
+        assert tokenizer.tokenize(text) == word_tokenize(re.sub(r'[^a-zA-Z\s]', ' ', text.lower()))
+
+
+def test_min_length_drops_short_tokens(nltk_data):
+    assert TextNormalizer(min_length=3)("AI in big lab work") == "big lab work"
+    assert TextNormalizer(min_length=4)("AI in big lab work") == "work"
+    assert TextNormalizer(min_length=1)("x ray") == "x ray"
+
+
+def test_parity_with_reference(nltk_data):
+    assert check_parity(TEXTS + [None, np.nan]) == []
+    assert TextNormalizer()(TEXTS[0]) == clean_text_reference(TEXTS[0])
+
+
+def test_parity_with_reference_on_articles(nltk_data):
+    if not os.path.exists(ARTICLES_PATH):
+        pytest.skip(f"{ARTICLES_PATH} is not available")
+    texts = pd.read_csv(ARTICLES_PATH, usecols=['combined'], nrows=SAMPLE_SIZE)['combined']
+    assert check_parity(texts) == []
@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.cluster import KMeans
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+import ingest
+from data_preprocessing import clean_texts
+from recommender import DEFAULT_CONFIG, Recommender
+from train import prepare_articles, train
+
+ARTICLES = pd.DataFrame({
+    'title': ["Deep <i>learning</i> for protein folding", "Graph networks &amp; molecules",
+              "Soil carbon in boreal forests", "Bayesian inference of river flows"],
+    'abstract': ["We fold proteins with networks. © 2021 Elsevier Ltd. All rights reserved.",
+                 "Message passing predicts molecular properties.", None,
+                 "<p>Hydrological models</p> are calibrated with MCMC. © The Authors"],
+    'author keywords': ["proteins; deep learning", None, "soil; carbon", "hydrology"],
+    'journal name': ["Bioinformatics", "Journal of Chemical Information", "Forest Ecology", "Water Research"],
+    'DOI': ["10.1/a", "10.1/b", "10.1/c", "10.1/d"],
+})
+
+
+def train_pipeline(articles_df):
+    articles_df = prepare_articles(articles_df)
+    articles_df['combined'] = clean_texts(articles_df['combined'].tolist(), workers=1)
+    return articles_df
+
+
+def test_records_are_featurized_as_in_training(nltk_data):
+    pytest.importorskip('bs4')
+    trained = train_pipeline(ARTICLES)
+    vectorizer = TfidfVectorizer().fit(trained['combined'])
+    kmeans_model = KMeans(n_clusters=2, n_init=1, random_state=0).fit(vectorizer.transform(trained['combined']))
+
+    records_df, vectors = ingest.prepare_records(ARTICLES, vectorizer, kmeans_model, workers=1)
+
+    assert records_df['combined'].tolist() == trained['combined'].tolist()
+    assert "elsevier" not in records_df['combined'][0] and "bioinformatic" in records_df['combined'][0]
+    np.testing.assert_allclose(vectors.toarray(), vectorizer.transform(trained['combined']).toarray())
+    assert records_df['cluster'].tolist() == kmeans_model.labels_.tolist()
+
+
+def test_records_without_text_columns_are_rejected():
+    with pytest.raises(ValueError, match="none of the text columns"):
+        ingest.prepare_records(pd.DataFrame({'DOI': ["10.1/a"]}), None, None, workers=1)
+
+
+TOPICS = {
+    "Bioinformatics": "protein folding sequence alignment genome",
+    "Journal of Hydrology": "river flow rainfall groundwater catchment",
+    "Forest Ecology and Management": "forest tree canopy soil carbon",
+    # Same topic as the ingested journal, so that the vocabulary covers it
+    "The Cryosphere": "glacier ice sheet melt snow",
+}
+
+
+def notebook_articles(topics, per_topic, doi_prefix):
+    """
+    Articles in the notebook schema (articles_cleaned.csv column names).
+    """
+    records = []
+    for journal, words in topics.items():
+        for i in range(per_topic):
+            records.append({
+                'title': f"Study {i} of {words.split()[i % 4]} dynamics",
+                'abstract': f"We measure {words} in case {i}.",
+                'author keywords': words.replace(' ', '; '),
+                'journal name': journal,
+                'DOI': f"{doi_prefix}/{journal[:4]}.{i}",
+                'citations': i,
+            })
+    return pd.DataFrame(records)
+
+
+@pytest.fixture
+def deployment(tmp_path, nltk_data):
+    articles_path = tmp_path / 'articles_cleaned.csv'
+    notebook_articles(TOPICS, 4, '10.1').to_csv(articles_path, index=False)
+    train(str(articles_path), out_dir=str(tmp_path), work_dir=str(tmp_path / 'cache'), k=4, workers=1)
+    return {
+        **DEFAULT_CONFIG,
+        'TOKENIZER_PATH': str(tmp_path / 'tfidf.pkl'),
+        'KMEANS_PATH': str(tmp_path / 'kmeans_model.pkl'),
+        'ARTICLES_PATH': str(tmp_path / 'Articles_clustered.csv'),
+        'INDEX_PATH': str(tmp_path / 'index'),
+        'SNAPSHOT_PATH': str(tmp_path / 'snapshot'),
+        'JOURNAL_INFO_PATH': str(tmp_path / 'journal_info.csv'),
+        'INGEST_PATH': str(tmp_path / 'ingested'),
+        'MODEL_REGISTRY_PATH': '',
+        'RESULT_CACHE': 'none',
+    }
+
+
+def assert_serves_glaciology(config):
+    recommender = Recommender.load(config)
+    response = recommender.recommend("Glacier ice melt", "Glacier ice sheet melt and snow", "glacier; ice")
+    assert "Journal of Glaciology" in [journal['name'] for journal in response['journals']]
+    assert recommender.stats.payload()['top_journals']["Journal of Glaciology"] == 4
+    assert recommender.stats.summary()['total_journals'] == 5
+    assert recommender.catalog.lookup("Journal of Glaciology")['total_articles'] == 4
+
+
+@pytest.mark.parametrize('schema', ['notebook', 'app'])
+def test_ingested_articles_are_recommended_and_counted(deployment, tmp_path, schema):
+    records_df = notebook_articles({"Journal of Glaciology": "glacier ice sheet melt snow"}, 4, '10.2')
+    if schema == 'app':
+        records_df = records_df.rename(columns={'journal name': 'journal_name'})
+    records_path = tmp_path / 'new_articles.csv'
+    records_df.to_csv(records_path, index=False)
+
+    assert ingest.add(deployment, str(records_path), workers=1) is not None
+    assert_serves_glaciology(deployment)
+
+    assert ingest.compact(deployment) == 4
+    assert_serves_glaciology(deployment)
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from article_store import ArticleStore
+from journal_catalog import FuzzyNameIndex, JournalCatalog, loose_journal_key, normalize_journal_name
+
+# Distinct journals with near-identical names, and their real ISSNs
+JOURNAL_INFO = pd.DataFrame([
+    ("Physical Review B", "2469-9950", 1.3),
+    ("Physical Review E", "2470-0045", 0.9),
+    ("Journal of Chemical Physics", "0021-9606", 1.1),
+    ("Hepatology", "0270-9139", 5.0),
+    ("Journal of Hepatology", "0168-8278", 6.0),
+    ("Neuroscience", "0306-4522", 1.0),
+    ("Journal of Neuroscience", "0270-6474", 2.5),
+    ("Immunology", "0019-2805", 1.2),
+    ("Journal of Immunology", "0022-1767", 1.6),
+    ("Chemistry of Materials", "0897-4756", 2.4),
+    ("Journal of Materials Chemistry", "0959-9428", 1.9),
+], columns=['title', 'issn', 'sjr_score'])
+
+
+def make_store(journals):
+    """
+    Store with one article per (journal name, ISSN) pair.
+    """
+    return ArticleStore.from_dataframe(pd.DataFrame({
+        'title': [f"Article {i}" for i in range(len(journals))],
+        'journal_name': [name for name, _ in journals],
+        'issn': [issn for _, issn in journals],
+        'citations': np.arange(len(journals), dtype=float),
+        'cluster': np.zeros(len(journals), dtype=np.int64),
+    }))
+
+
+def journal_of(catalog, article):
+    return catalog.profile(catalog.article_rows[article])
+
+
+@pytest.mark.parametrize('name, issn', [
+    ("Physical Review A", "2469-9926"),
+    ("Physical Review D", "2470-0010"),
+    ("Chemical Physics", "0301-0104"),
+    ("Journal of Pathology", "0022-3417"),
+])
+def test_name_matches_with_another_issn_are_rejected(name, issn):
+    catalog = JournalCatalog.build(make_store([(name, issn)]), JOURNAL_INFO)
+
+    journal = journal_of(catalog, 0)
+    assert journal['name'] == name
+    assert journal['issn'] == issn
+    assert journal['sjr_score'] == 'N/A'
+    assert len(catalog) == len(JOURNAL_INFO) + 1
+    assert catalog.lookup(name)['issn'] == issn
+
+
+@pytest.mark.parametrize('name', ["Physical Review D", "Journal of Pathology", "Chemical Physics"])
+def test_similar_names_without_issn_stay_apart(name):
+    catalog = JournalCatalog.build(make_store([(name, None)]), JOURNAL_INFO)
+
+    assert journal_of(catalog, 0)['name'] == name
+    assert len(catalog) == len(JOURNAL_INFO) + 1
+
+
+def test_each_journal_keeps_its_own_row():
+    journals = [(name, None) for name in JOURNAL_INFO['title']]
+    catalog = JournalCatalog.build(make_store(journals), JOURNAL_INFO)
+
+    assert len(catalog) == len(JOURNAL_INFO)
+    for article, (name, issn) in enumerate(zip(JOURNAL_INFO['title'], JOURNAL_INFO['issn'])):
+        assert journal_of(catalog, article)['name'] == name
+        assert journal_of(catalog, article)['issn'] == issn
+        assert catalog.lookup(name)['issn'] == issn
+
+
+def test_loose_keys_keep_distinct_journals_apart():
+    keys = [loose_journal_key(name) for name in JOURNAL_INFO['title']]
+    assert len(set(keys)) == len(keys)
+    assert loose_journal_key("The Journal of Hepatology") == loose_journal_key("Journal of Hepatology")
+
+
+def test_spelling_variants_join_the_listed_journal():
+    journals = [
+        ("The Journal of Hepatology", None),
+        ("JOURNAL OF NEUROSCIENCE", "0270-6474"),
+        ("Journal of Immunolgoy", None),
+        ("Physical Review E", "2470-0045"),
+        ("Phys. Review E", "2470-0045"),
+    ]
+    catalog = JournalCatalog.build(make_store(journals), JOURNAL_INFO)
+
+    assert len(catalog) == len(JOURNAL_INFO)
+    assert [journal_of(catalog, article)['name'] for article in range(len(journals))] == [
+        "Journal of Hepatology", "Journal of Neuroscience", "Journal of Immunology",
+        "Physical Review E", "Physical Review E",
+    ]
+    assert journal_of(catalog, 3)['total_articles'] == 2
+
+
+def test_fuzzy_index_requires_the_same_distinguishing_words():
+    index = FuzzyNameIndex([normalize_journal_name(name) for name in JOURNAL_INFO['title']])
+
+    assert index.matches("physical review d") == []
+    assert index.matches("journal of pathology") == []
+    assert index.matches("journal of immunolgoy") == ["journal of immunology"]
+    assert index.matches("chemistry of materails") == ["chemistry of materials"]
@@ -0,0 +1,201 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from article_index import ArticleIndex
+from article_store import ArticleStore
+from artifacts import MANIFEST_FILE
+from model_registry import Reloader, activate, current_version, list_versions, publish, resolve_model_config
+from recommender import DEFAULT_CONFIG
+
+
+def publish_corpus(registry, corpus_files, version, make_active=True):
+    return publish(registry, corpus_files['TOKENIZER_PATH'], corpus_files['KMEANS_PATH'],
+                   corpus_files['ARTICLES_PATH'], version, make_active=make_active)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out")
+        time.sleep(0.005)
+
+
+def test_publish_copies_the_artifacts_with_a_snapshot_and_index(tmp_path, corpus_files):
+    registry = str(tmp_path / 'models')
+    assert publish_corpus(registry, corpus_files, 'v1') == 'v1'
+
+    assert list_versions(registry) == ['v1']
+    assert current_version(registry) == 'v1'
+    path = os.path.join(registry, 'v1')
+    assert sorted(os.listdir(path)) == sorted([
+        MANIFEST_FILE, 'tfidf.pkl', 'kmeans_model.pkl', 'Articles_clustered.csv', 'snapshot', 'index',
+    ])
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        assert json.load(f)['n_articles'] == 300
+    sources = [os.path.join(path, name) for name in ('tfidf.pkl', 'kmeans_model.pkl', 'Articles_clustered.csv')]
+    store = ArticleStore.load(os.path.join(path, 'snapshot'))
+    assert len(store) == 300 and store.is_current(sources[2:])
+    index = ArticleIndex.load(os.path.join(path, 'index'))
+    assert len(index) == 300 and index.is_current(sources)
+
+    with pytest.raises(ValueError, match="already exists"):
+        publish_corpus(registry, corpus_files, 'v1')
+
+
+def test_activate_switches_the_current_version(tmp_path, corpus_files):
+    registry = str(tmp_path / 'models')
+    publish_corpus(registry, corpus_files, 'v1')
+    publish_corpus(registry, corpus_files, 'v2', make_active=False)
+    assert current_version(registry) == 'v1'
+
+    activate(registry, 'v2')
+    assert current_version(registry) == 'v2'
+    with pytest.raises(ValueError, match="Unknown model version"):
+        activate(registry, 'v3')
+    assert current_version(registry) == 'v2'
+    assert sorted(os.listdir(registry)) == ['CURRENT', 'v1', 'v2']
+
+
+def test_resolve_model_config_points_at_the_active_version(tmp_path, corpus_files):
+    registry = str(tmp_path / 'models')
+    config = {**DEFAULT_CONFIG, **corpus_files, 'MODEL_REGISTRY_PATH': registry}
+    # Nothing activated yet: the configured paths are served
+    resolved, version = resolve_model_config(config)
+    assert resolved == config and '+' in version
+
+    publish_corpus(registry, corpus_files, 'v1')
+    resolved, version = resolve_model_config(config)
+    assert version == 'v1'
+    path = os.path.join(registry, 'v1')
+    assert resolved['KMEANS_PATH'] == os.path.join(path, 'kmeans_model.pkl')
+    assert resolved['ARTICLES_PATH'] == os.path.join(path, 'Articles_clustered.csv')
+    assert (resolved['SNAPSHOT_PATH'], resolved['INDEX_PATH']) == (os.path.join(path, 'snapshot'),
+                                                                    os.path.join(path, 'index'))
+    assert config['KMEANS_PATH'] == corpus_files['KMEANS_PATH']
+
+
+def test_resolve_model_config_tracks_the_files_without_registry(corpus_files):
+    config = {**DEFAULT_CONFIG, **corpus_files, 'MODEL_REGISTRY_PATH': ''}
+    model, articles = resolve_model_config(config)[1].split('+')
+
+    with open(corpus_files['ARTICLES_PATH'], 'a') as f:
+        f.write("Article 300,Journal 0A,1.0,topic0word0,0\n")
+    new_model, new_articles = resolve_model_config(config)[1].split('+')
+    assert (new_model, new_articles != articles) == (model, True)
+
+    with open(corpus_files['KMEANS_PATH'], 'ab') as f:
+        f.write(b'\0')
+    assert resolve_model_config(config)[1].split('+')[0] != model
+
+
+class Engines:
+    """
+    Stand-in for the served engine: load() swaps in the target version.
+    """
+
+    def __init__(self):
+        self.served = 'v1'
+        self.target = 'v1'
+        self.failing = False
+        self.loads = 0
+
+    def load(self):
+        self.loads += 1
+        if self.failing:
+            raise RuntimeError("corrupt artifacts")
+        self.served = self.target
+
+    def reloader(self, interval=0):
+        return Reloader(self.load, lambda: self.served, lambda: self.target, interval=interval)
+
+
+def test_requested_reload_swaps_the_engine():
+    engines = Engines()
+    reloader = engines.reloader()
+    engines.target = 'v2'
+
+    assert reloader.request()
+    wait_for(lambda: not reloader.running)
+    assert engines.served == 'v2'
+    stats = reloader.stats()
+    assert (stats['reloads'], stats['failures'], stats['last_reload']['version']) == (1, 0, 'v2')
+
+
+def test_one_reload_at_a_time():
+    engines, release = Engines(), threading.Event()
+    reloader = Reloader(release.wait, lambda: engines.served, lambda: engines.target, interval=0)
+
+    assert reloader.request()
+    assert not reloader.request()
+    release.set()
+    wait_for(lambda: not reloader.running)
+    assert reloader.request()
+    wait_for(lambda: not reloader.running)
+    assert reloader.reloads == 2
+
+
+def test_checking_reloads_new_versions_but_not_failed_ones():
+    engines = Engines()
+    reloader = engines.reloader(interval=0.01)
+    reloader.ensure_started()
+    engines.target = 'v2'
+    wait_for(lambda: engines.served == 'v2')
+
+    engines.failing, engines.target = True, 'v3'
+    wait_for(lambda: reloader.failures == 1)
+    time.sleep(0.1)
+    assert (engines.loads, engines.served) == (2, 'v2')
+    assert reloader.stats()['last_error'] == "corrupt artifacts"
+
+
+def test_no_checking_thread_without_interval():
+    reloader = Engines().reloader(interval=0)
+    reloader.ensure_started()
+    assert reloader._pid is None
+
+
+def test_app_reloads_an_activated_version(tmp_path, corpus_files, nltk_data):
+    from app import create_app, get_recommender
+
+    registry = str(tmp_path / 'models')
+    publish_corpus(registry, corpus_files, 'v1')
+    publish_corpus(registry, corpus_files, 'v2', make_active=False)
+    app = create_app({
+        'MODEL_REGISTRY_PATH': registry, 'MODEL_POLL_SECONDS': 0, 'ADMIN_TOKEN': 'secret',
+        'INGEST_PATH': str(tmp_path / 'ingested'), 'JOURNAL_INFO_PATH': str(tmp_path / 'journal_info.csv'),
+        'RESULT_CACHE': 'none',
+    })
+    client = app.test_client()
+    assert client.get('/api/status').headers['X-Model-Version'] == 'v1'
+
+    response = client.post('/admin/reload?version=v2', headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 202
+    reloader = app.extensions['reloader']
+    wait_for(lambda: not reloader.running)
+    assert reloader.failures == 0
+    assert current_version(registry) == 'v2'
+    with app.app_context():
+        assert get_recommender().model_version == 'v2'
+    assert client.get('/api/status').headers['X-Model-Version'] == 'v2'
+
+
+@pytest.mark.parametrize('environ, interval', [
+    ({}, 0.0),
+    ({'MODEL_REGISTRY_PATH': 'models'}, 10.0),
+    ({'MODEL_REGISTRY_PATH': 'models', 'MODEL_POLL_SECONDS': '0'}, 0.0),
+    ({'MODEL_POLL_SECONDS': '30'}, 30.0),
+])
+def test_checking_is_off_by_default_without_registry(environ, interval):
+    env = {name: value for name, value in os.environ.items() if not name.startswith('MODEL_')}
+    output = subprocess.check_output(
+        [sys.executable, '-c', "from recommender import DEFAULT_CONFIG; print(DEFAULT_CONFIG['MODEL_POLL_SECONDS'])"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), env={**env, **environ}, text=True
+    )
+    assert float(output) == interval
@@ -0,0 +1,110 @@
+import types
+
+import pytest
+
+import result_cache
+from result_cache import ResultCache, SQLiteResultCache, cache_key, make_result_cache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(result_cache, 'time', types.SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_cache(request, tmp_path, clock):
+    def make(max_size=3, ttl=60, version='v1'):
+        return make_result_cache(request.param, str(tmp_path / 'cache.sqlite'), max_size=max_size, ttl=ttl,
+                                 version=version)
+    return make
+
+
+def test_hits_return_a_fresh_copy(make_cache):
+    cache = make_cache()
+    key = cache_key("protein folding", 10, 'articles')
+    assert cache.get(key, 'v1') is None
+
+    cache.put(key, {'journals': ['Bioinformatics']}, 'v1')
+    hit = cache.get(key, 'v1')
+    assert hit == {'journals': ['Bioinformatics']}
+    hit['journals'].append('modified')
+    assert cache.get(key, 'v1') == {'journals': ['Bioinformatics']}
+    assert (cache.stats()['hits'], cache.stats()['misses']) == (2, 1)
+
+
+def test_keys_depend_on_the_options():
+    keys = {cache_key("text", 10, 'articles'), cache_key("text", 5, 'articles'),
+            cache_key("text", 10, 'journals'), cache_key("text", 10, 'articles', n_probe=2)}
+    assert len(keys) == 4
+
+
+def test_entries_expire_after_the_ttl(make_cache, clock):
+    cache = make_cache(ttl=60)
+    cache.put('a', 1, 'v1')
+    clock.now += 59
+    assert cache.get('a', 'v1') == 1
+    clock.now += 2
+    assert cache.get('a', 'v1') is None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_least_recently_used_entries_are_evicted(make_cache, clock):
+    cache = make_cache(max_size=3)
+    if isinstance(cache, SQLiteResultCache):
+        cache.PRUNE_INTERVAL = 1
+    for key in 'abc':
+        cache.put(key, key, 'v1')
+        clock.now += 1
+    assert cache.get('a', 'v1') == 'a'
+    clock.now += 1
+    cache.put('d', 'd', 'v1')
+
+    assert len(cache) == 3
+    assert cache.get('b', 'v1') is None
+    assert [cache.get(key, 'v1') for key in 'acd'] == ['a', 'c', 'd']
+
+
+def test_entries_of_another_version_are_never_returned(make_cache):
+    cache = make_cache()
+    cache.put('a', 'old', 'v1')
+    cache.set_version('v2')
+    # A request pinned to the previous engine finishes after the reload
+    cache.put('b', 'old', 'v1')
+
+    assert cache.get('a', 'v2') is None
+    assert cache.get('b', 'v2') is None
+    cache.put('a', 'new', 'v2')
+    assert cache.get('a', 'v2') == 'new'
+    assert cache.get('a', 'v1') is None
+
+
+def test_memory_cache_drops_other_versions_when_switching():
+    cache = ResultCache(version='v1')
+    cache.put('a', 1, 'v1')
+    cache.set_version('v2')
+    assert len(cache) == 0
+
+
+def test_sqlite_workers_keep_the_entries_of_other_versions(tmp_path, clock):
+    path = str(tmp_path / 'cache.sqlite')
+    old_worker = SQLiteResultCache(path, ttl=60, version='v1')
+    old_worker.put('a', 'old', 'v1')
+    # Another worker loads the new version during a rolling reload
+    new_worker = SQLiteResultCache(path, ttl=60, version='v1')
+    new_worker.set_version('v2')
+    new_worker.put('b', 'new', 'v2')
+
+    assert old_worker.get('a', 'v1') == 'old'
+    assert old_worker.get('b', 'v2') == 'new'
+    # Entries of the old version go once expired
+    clock.now += 61
+    new_worker.set_version('v2')
+    assert len(new_worker) == 0
+
+
+def test_unknown_backend_is_rejected():
+    assert make_result_cache('none') is None
+    with pytest.raises(ValueError, match="Unknown result cache"):
+        make_result_cache('redis')
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from article_index import ArticleIndex
+from retrievers import ClusterProbeRetriever, ExactRetriever, RandomProjectionRetriever, evaluate_recall
+
+K = 10
+
+
+@pytest.fixture(scope='module')
+def setup(corpus):
+    store, vectorizer, kmeans_model = corpus
+    index = ArticleIndex.build(store, vectorizer)
+    queries = vectorizer.transform([store.texts['combined'][i] + " common1 topic0word3" for i in range(0, 300, 7)])
+    return index, kmeans_model, queries
+
+
+def assert_best_first(result):
+    assert np.all(np.diff(result.similarities) <= 1e-12)
+
+
+def test_probing_every_cluster_is_exact(setup):
+    index, kmeans_model, queries = setup
+    exact = ExactRetriever(index)
+    probe = ClusterProbeRetriever(index, kmeans_model, n_probe=kmeans_model.n_clusters)
+    for i in range(queries.shape[0]):
+        expected, result = exact.search(queries[i], K), probe.search(queries[i], K)
+        np.testing.assert_allclose(result.similarities, expected.similarities)
+        assert set(result.rows) == set(expected.rows)
+        assert result.n_candidates == len(index)
+
+
+def test_cluster_probe_searches_the_nearest_clusters(setup):
+    index, kmeans_model, queries = setup
+    exact = ExactRetriever(index)
+    retriever = ClusterProbeRetriever(index, kmeans_model, n_probe=1)
+    for i in range(queries.shape[0]):
+        result = retriever.search(queries[i], K)
+        nearest = int(kmeans_model.predict(queries[i])[0])
+        assert result.clusters == [nearest]
+        assert_best_first(result)
+        # The same articles as an exact search restricted to that cluster
+        expected = exact.search(queries[i], len(index))
+        in_cluster = np.isin(expected.rows, index.score_cluster(queries[i], nearest)[0])
+        np.testing.assert_allclose(result.similarities, expected.similarities[in_cluster][:K])
+    report = evaluate_recall(retriever, exact, queries, K)
+    assert report['recall_at_k'] >= 0.9
+    assert report['mean_candidates'] < len(index) / 2
+
+
+def test_given_distances_give_the_same_results(setup):
+    index, kmeans_model, queries = setup
+    retriever = ClusterProbeRetriever(index, kmeans_model, n_probe=2)
+    distances = kmeans_model.transform(queries)
+    batch = retriever.search_batch(queries, K)
+    batch_with_distances = retriever.search_batch(queries, K, distances=distances)
+    for i in range(queries.shape[0]):
+        single = retriever.search(queries[i], K, distances=distances[i:i + 1])
+        for result in (batch[i], batch_with_distances[i]):
+            assert result.clusters == single.clusters
+            np.testing.assert_array_equal(result.rows, single.rows)
+            np.testing.assert_allclose(result.similarities, single.similarities)
+
+
+def test_lsh_rescores_candidates_exactly(setup):
+    index, _, queries = setup
+    exact = ExactRetriever(index)
+    # Narrow buckets, so that only part of the corpus is rescored
+    retriever = RandomProjectionRetriever(index, n_tables=8, n_bits=8, seed=0)
+    for i in range(queries.shape[0]):
+        result = retriever.search(queries[i], K)
+        assert_best_first(result)
+        reference = exact.retrieve(queries[i])
+        positions = {row: j for j, row in enumerate(reference.rows.tolist())}
+        expected = reference.similarities[[positions[row] for row in result.rows.tolist()]]
+        np.testing.assert_allclose(result.similarities, expected)
+    report = evaluate_recall(retriever, exact, queries, K)
+    assert report['recall_at_k'] >= 0.8
+    assert report['mean_candidates'] < len(index) / 2
+
+
+def test_batch_search_matches_single_queries(setup):
+    index, kmeans_model, queries = setup
+    for retriever in (ExactRetriever(index), ClusterProbeRetriever(index, kmeans_model, n_probe=2),
+                      RandomProjectionRetriever(index, n_bits=8, seed=0)):
+        for i, result in enumerate(retriever.search_batch(queries, K)):
+            single = retriever.search(queries[i], K)
+            np.testing.assert_allclose(result.similarities, single.similarities)
+            assert set(result.rows) == set(single.rows)
@@ -0,0 +1,273 @@
+"""
+Model training pipeline (the stages of model.ipynb as a script).
+
+Stages:
+
+1. prepare: strip copyright notices and HTML, combine the text fields
+2. clean: normalize the combined text with TextNormalizer, in parallel
+3. vectorize: fit the TF-IDF vectorizer (or the vocabulary-free hashing
+   vectorizer, see hashing_vectorizer.py)
+4. sweep (optional): inertia and silhouette score for a range of k, in
+   parallel (see model_selection.py)
+5. cluster: fit the final KMeans (or MiniBatchKMeans) model and label every
+   article
+
+Each stage's output is cached in the work directory under a key derived from
+its parameters and the key of the stage before it (the first stage is keyed
+on the input file's size and modification time), so a re-run only recomputes
+the stages whose inputs changed.
+
+Usage:
+    python train.py --articles articles_cleaned.csv --k 6
+    python train.py --articles articles_cleaned.csv --sweep 2 20 --k best --report k_selection.csv
+    python train.py --articles articles_cleaned.csv --k 6 --out build --registry models
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+
+import joblib
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from article_store import canonical_columns
+from artifacts import source_fingerprint
+from data_preprocessing import clean_texts
+from hashing_vectorizer import N_FEATURES, HashingTfidfVectorizer
+from model_registry import publish
+from model_selection import (ALGORITHMS, RANDOM_STATE, SILHOUETTE_SAMPLE_SIZE, best_k, make_kmeans, select_k,
+                             write_report)
+
+# Text fields concatenated into the 'combined' column, in order (notebook
+# column names are renamed first, see article_store.COLUMN_ALIASES)
+COMBINED_COLUMNS = ('title', 'abstract', 'author keywords', 'journal_name')
+HTML_COLUMNS = ('title', 'abstract', 'journal_name')
+COPYRIGHT_PATTERN = re.compile(r'©.*$')
+VECTORIZERS = ('tfidf', 'hashing')
+
+def clean_copyright(text):
+    """
+    Remove copyright notices and text that appears after © symbol.
+    """
+    return COPYRIGHT_PATTERN.sub('', text).strip()
+
+
+def strip_html(text):
+    """
+    Text content of an HTML fragment (unchanged if it has no markup).
+    """
+    if '<' not in text and '&' not in text:
+        return text
+    # bs4 is only needed for text with markup
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(text, 'html.parser').get_text()
+
+
+def prepare_articles(articles_df):
+    """
+    Clean the raw text fields and add the 'combined' column.
+
+    Missing values are treated as empty strings, so an article without an
+    abstract or keywords still gets a combined text. Notebook column names
+    are renamed as in Articles_clustered.csv.
+    """
+    articles_df = canonical_columns(articles_df).copy()
+    columns = [column for column in COMBINED_COLUMNS if column in articles_df.columns]
+    for column in columns:
+        articles_df[column] = articles_df[column].fillna('').astype(str)
+    if 'abstract' in articles_df.columns:
+        articles_df['abstract'] = articles_df['abstract'].map(clean_copyright)
+    for column in HTML_COLUMNS:
+        if column in articles_df.columns:
+            articles_df[column] = articles_df[column].map(strip_html)
+    articles_df['combined'] = articles_df[columns].agg(' '.join, axis=1)
+    return articles_df
+
+
+class StageCache:
+    """
+    Outputs of pipeline stages stored with joblib under a content key.
+
+    Attributes:
+        directory (str): Where stage outputs are stored
+        enabled (bool): Whether cached outputs are reused
+    """
+
+    def __init__(self, directory, enabled=True):
+        self.directory = directory
+        self.enabled = enabled
+
+    @staticmethod
+    def key(name, *parts):
+        """
+        Key of a stage: hash of its name and of the JSON-encoded parameters
+        (including the key of the stage it depends on).
+        """
+        raw = json.dumps([name, *parts], sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+    def run(self, name, key, compute):
+        """
+        Load the output of a stage if cached under this key, otherwise
+        compute and store it.
+        """
+        path = os.path.join(self.directory, f"{name}-{key}.joblib")
+        if self.enabled and os.path.exists(path):
+            print(f"[{name}] cached ({key})")
+            return joblib.load(path)
+
+        start = time.perf_counter()
+        result = compute()
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = path + '.tmp'
+        joblib.dump(result, tmp_path)
+        os.replace(tmp_path, path)
+        print(f"[{name}] done in {time.perf_counter() - start:.2f}s ({key})")
+        return result
+
+
+def make_vectorizer(kind='tfidf', max_features=1000, n_features=N_FEATURES):
+    """
+    Unfitted vectorizer of the given kind.
+
+    Raises:
+        ValueError: If the kind is unknown
+    """
+    if kind == 'tfidf':
+        return TfidfVectorizer(max_features=max_features)
+    if kind == 'hashing':
+        return HashingTfidfVectorizer(n_features=n_features)
+    raise ValueError(f"Unknown vectorizer '{kind}', expected one of {VECTORIZERS}")
+
+
+def train(articles_path, out_dir='.', work_dir='.train_cache', k=6, sweep=None, max_features=1000,
+          workers=None, use_cache=True, algorithm='kmeans', sample_size=SILHOUETTE_SAMPLE_SIZE,
+          report_path=None, vectorizer_kind='tfidf', n_features=N_FEATURES):
+    """
+    Run the training pipeline and write tfidf.pkl, kmeans_model.pkl and
+    Articles_clustered.csv to out_dir.
+
+    Args:
+        articles_path (str): Cleaned articles CSV (output of preprocessing.ipynb)
+        out_dir (str): Directory receiving the trained artifacts
+        work_dir (str): Stage cache directory
+        k (int or str): Number of clusters, or 'best' for the best silhouette of the sweep
+        sweep (tuple): (k_min, k_max) range to evaluate, k_max excluded
+        max_features (int): TF-IDF vocabulary size
+        workers (int): Processes used for text cleaning and the sweep, all cores if None
+        use_cache (bool): Reuse cached stage outputs
+        algorithm (str): 'kmeans' or 'minibatch' (for large corpora)
+        sample_size (int): Rows used for the silhouette scores of the sweep
+        report_path (str): Where to write the sweep report (.json or .csv)
+        vectorizer_kind (str): 'tfidf', or 'hashing' for the vocabulary-free vectorizer
+        n_features (int): Hashed features of the 'hashing' vectorizer
+
+    Returns:
+        dict: Summary of the run (k, feature count, cluster sizes, sweep report)
+    """
+    cache = StageCache(work_dir, enabled=use_cache)
+
+    prepare_key = cache.key('prepare', source_fingerprint([articles_path]), COMBINED_COLUMNS)
+    articles_df = cache.run('prepare', prepare_key, lambda: prepare_articles(pd.read_csv(articles_path)))
+
+    clean_key = cache.key('clean', prepare_key)
+    cleaned = cache.run('clean', clean_key, lambda: clean_texts(articles_df['combined'].tolist(), workers))
+    articles_df['combined'] = cleaned
+
+    options = [max_features] if vectorizer_kind == 'tfidf' else [vectorizer_kind, n_features]
+    vectorize_key = cache.key('vectorize', clean_key, *options)
+
+    def vectorize():
+        vectorizer = make_vectorizer(vectorizer_kind, max_features, n_features)
+        return vectorizer, vectorizer.fit_transform(cleaned)
+
+    vectorizer, X = cache.run('vectorize', vectorize_key, vectorize)
+    print(f"TF-IDF matrix shape: {X.shape}")
+
+    report = None
+    if sweep is not None:
+        k_values = list(range(*sweep))
+        sweep_key = cache.key('sweep', vectorize_key, k_values, algorithm, sample_size, RANDOM_STATE)
+        report = cache.run('sweep', sweep_key, lambda: select_k(X, k_values, algorithm, sample_size, workers))
+        if report_path:
+            write_report(report, report_path)
+    if k == 'best':
+        if report is None:
+            raise ValueError("k='best' requires a sweep")
+        k = best_k(report)
+    k = int(k)
+
+    kmeans = cache.run('cluster', cache.key('cluster', vectorize_key, k, algorithm, RANDOM_STATE),
+                       lambda: make_kmeans(k, algorithm).fit(X))
+    articles_df['cluster'] = kmeans.labels_
+
+    # Written next to their final names and moved in together, as running
+    # apps reload these files when they change
+    os.makedirs(out_dir, exist_ok=True)
+    outputs = {
+        'tfidf.pkl': lambda path: joblib.dump(vectorizer, path),
+        'kmeans_model.pkl': lambda path: joblib.dump(kmeans, path),
+        'Articles_clustered.csv': lambda path: articles_df.to_csv(path, index=False),
+    }
+    for name, write in outputs.items():
+        write(os.path.join(out_dir, f".{name}.tmp"))
+    for name in outputs:
+        os.replace(os.path.join(out_dir, f".{name}.tmp"), os.path.join(out_dir, name))
+
+    cluster_counts = articles_df['cluster'].value_counts().sort_index()
+    return {
+        'k': k,
+        'articles': len(articles_df),
+        'features': len(vectorizer.vocabulary_) if hasattr(vectorizer, 'vocabulary_') else vectorizer.n_features,
+        'clusters': {int(cluster): int(count) for cluster, count in cluster_counts.items()},
+        'sweep': report,
+    }
+
+
+def main():
+    """
+    Command-line entry point for model training.
+    """
+    parser = argparse.ArgumentParser(description="Train the TF-IDF vectorizer and KMeans model.")
+    parser.add_argument('--articles', default="articles_cleaned.csv")
+    parser.add_argument('--out', default=".", help="Directory receiving the trained artifacts")
+    parser.add_argument('--work-dir', default=".train_cache", help="Stage cache directory")
+    parser.add_argument('--k', default="6", help="Number of clusters, or 'best' (requires --sweep)")
+    parser.add_argument('--sweep', type=int, nargs=2, metavar=('K_MIN', 'K_MAX'),
+                        help="Evaluate k in [K_MIN, K_MAX) before clustering")
+    parser.add_argument('--algorithm', choices=ALGORITHMS, default='kmeans',
+                        help="Use 'minibatch' for large corpora")
+    parser.add_argument('--sample-size', type=int, default=SILHOUETTE_SAMPLE_SIZE,
+                        help="Articles sampled for the sweep's silhouette scores")
+    parser.add_argument('--report', default=None, help="Write the sweep report to this .json or .csv file")
+    parser.add_argument('--max-features', type=int, default=1000, help="TF-IDF vocabulary size")
+    parser.add_argument('--vectorizer', choices=VECTORIZERS, default='tfidf',
+                        help="'hashing' hashes terms into --n-features columns instead of keeping a vocabulary")
+    parser.add_argument('--n-features', type=int, default=N_FEATURES, help="Hashed features")
+    parser.add_argument('--workers', type=int, default=None, help="Processes (default: all cores)")
+    parser.add_argument('--no-cache', action='store_true', help="Recompute every stage")
+    parser.add_argument('--registry', default=None,
+                        help="Publish the trained artifacts as a new active version of this model registry")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    summary = train(args.articles, out_dir=args.out, work_dir=args.work_dir,
+                    k=args.k if args.k == 'best' else int(args.k), sweep=args.sweep,
+                    max_features=args.max_features, workers=args.workers, use_cache=not args.no_cache,
+                    algorithm=args.algorithm, sample_size=args.sample_size, report_path=args.report,
+                    vectorizer_kind=args.vectorizer, n_features=args.n_features)
+    print(f"Trained k={summary['k']} on {summary['articles']} articles "
+          f"({summary['features']} features) in {time.perf_counter() - start:.2f}s")
+    for cluster, count in summary['clusters'].items():
+        print(f"Cluster {cluster}: {count} articles")
+    if args.registry:
+        version = publish(args.registry, *(os.path.join(args.out, name)
+                                           for name in ('tfidf.pkl', 'kmeans_model.pkl', 'Articles_clustered.csv')))
+        print(f"Published model version '{version}' to '{args.registry}'")
+
+
+if __name__ == "__main__":
+    main()